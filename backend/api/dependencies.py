@@ -0,0 +1,29 @@
+# Services resolved per request through Depends. Each loads its heavy
+# libraries (torch/BERTScore, LangChain, SciPy) on first use, and tests can
+# swap them with app.dependency_overrides.
+
+from services.eval_service import EvaluationService, eval_service
+from services.evaluation_stats import EvaluationStatsService, evaluation_stats_service
+from services.job_service import GenerationJobService, job_service
+from services.llm_scheduler import LLMScheduler, llm_scheduler
+from services.rag_service import RAGService, rag_service
+
+
+def get_rag_service() -> RAGService:
+    return rag_service
+
+
+def get_eval_service() -> EvaluationService:
+    return eval_service
+
+
+def get_evaluation_stats_service() -> EvaluationStatsService:
+    return evaluation_stats_service
+
+
+def get_job_service() -> GenerationJobService:
+    return job_service
+
+
+def get_llm_scheduler() -> LLMScheduler:
+    return llm_scheduler
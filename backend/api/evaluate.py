@@ -1,25 +1,104 @@
-from fastapi import APIRouter
+import asyncio
+from typing import List, Optional
 
-from models.evaluation import EvaluationCreate, EvaluationResponse
-from services.eval_service import eval_service
-from services.neo4j_service import neo4j_service
-from services.rag_service import rag_service
+from fastapi import APIRouter, Depends, HTTPException
+
+from models.evaluation import (
+    BulkEvaluationResponse,
+    EvaluationCreate,
+    EvaluationResponse,
+    EvaluationStatsResponse,
+)
+from api.dependencies import (
+    get_eval_service,
+    get_evaluation_stats_service,
+    get_rag_service,
+)
+from api.params import UTCDatetime
+from services.bulk_evaluation import cohort_statistics, evaluate_many
+from services.eval_service import EvaluationService, ScoringUnavailableError
+from services.evaluation_stats import EvaluationStatsService
+from services.llm_scheduler import LLMBusyError
+from services.neo4j_service import async_neo4j_service
+from services.rag_service import (
+    GenerationError,
+    GenerationTimeoutError,
+    RAGService,
+    RouteNotFoundError,
+)
+from services.retrieval import retrieval_service
 
 router = APIRouter(prefix="/api/evaluate", tags=["Evaluation"])
 
 
-@router.post("/{route_id}", response_model=EvaluationResponse)
-async def evaluate_route(route_id: str, evaluation: EvaluationCreate):
-    # Get AI travelogue (generate if not exists, otherwise fetch from Neo4j)
-    # TODO: fetch the stored travelogue
-    ai_travelogue = rag_service.generate_travelogue(route_id)
+@router.get("/stats", response_model=EvaluationStatsResponse)
+async def evaluation_statistics(
+    route_id: Optional[str] = None,
+    route_status: Optional[str] = None,
+    created_after: Optional[UTCDatetime] = None,
+    created_before: Optional[UTCDatetime] = None,
+    stats_service: EvaluationStatsService = Depends(get_evaluation_stats_service),
+):
+    """
+    Cohort statistics across all evaluations, or those matching the filters.
+    """
+    return await stats_service.get_statistics(
+        route_id=route_id,
+        route_status=route_status,
+        created_after=created_after,
+        created_before=created_before,
+    )
+
 
-    # Calculate bertscore
-    scores = eval_service.calculate_bertscore(ai_travelogue, evaluation.human_journal)
+@router.post("/bulk", response_model=BulkEvaluationResponse)
+async def evaluate_bulk(evaluations: List[EvaluationCreate]):
+    """
+    Evaluate many (routeId, humanJournal) pairs with batched scoring and
+    writes, then run the statistical tests over the whole cohort.
+    """
+    results = [result async for result in evaluate_many(evaluations)]
+    return {"results": results, "statistics": await cohort_statistics(results)}
+
+
+@router.post("/{route_id}", response_model=EvaluationResponse)
+async def evaluate_route(
+    route_id: str,
+    evaluation: EvaluationCreate,
+    rag_service: RAGService = Depends(get_rag_service),
+    eval_service: EvaluationService = Depends(get_eval_service),
+):
+    # Get AI travelogue (reused from Neo4j unless the route has changed)
+    try:
+        ai_travelogue = await rag_service.run_generation(route_id)
+    except RouteNotFoundError:
+        raise HTTPException(status_code=404, detail="Route not found")
+    except LLMBusyError as e:
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
+    except GenerationTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
+    except GenerationError as e:
+        # Never score or store an error message as if it were a travelogue
+        raise HTTPException(status_code=500, detail=str(e))
 
-    # 3. Calculate sentiment
-    human_sent = eval_service.calculate_sentiment(evaluation.human_journal)
-    ai_sent = eval_service.calculate_sentiment(ai_travelogue)
+    # Calculate bertscore and sentiment on the scoring executor
+    try:
+        scores, (human_sent, ai_sent) = await asyncio.gather(
+            eval_service.acalculate_bertscore(ai_travelogue, evaluation.human_journal),
+            eval_service.acalculate_sentiments(
+                [evaluation.human_journal, ai_travelogue]
+            ),
+        )
+    except ScoringUnavailableError as e:
+        # Nothing is stored, so a failed score never reaches the aggregates
+        raise HTTPException(
+            status_code=503,
+            detail=str(e),
+            headers={"Retry-After": str(e.retry_after)},
+        )
 
     # Build result JSON
     result = {
@@ -32,6 +111,9 @@ async def evaluate_route(route_id: str, evaluation: EvaluationCreate):
     }
 
     # Store in neo4j
-    neo4j_service.store_evaluation(route_id, result)
+    await async_neo4j_service.store_evaluation(route_id, result)
+    await asyncio.to_thread(
+        retrieval_service.index_journals, [(route_id, evaluation.human_journal)]
+    )
 
     return result
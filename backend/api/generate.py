@@ -1,22 +1,152 @@
-from fastapi import APIRouter, HTTPException
-from services.rag_service import rag_service
-from services.neo4j_service import neo4j_service
+import json
+from typing import List, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Response
+from fastapi.responses import StreamingResponse
+
+from api.dependencies import get_job_service, get_llm_scheduler, get_rag_service
+from models.job import JobResponse
+from services.job_service import GenerationJobService, QueueFullError
+from services.llm_scheduler import LLMBusyError, LLMScheduler
+from services.rag_service import (
+    GenerationError,
+    GenerationTimeoutError,
+    RAGService,
+    RouteNotFoundError,
+)
+from services.neo4j_service import async_neo4j_service
 
 router = APIRouter(prefix="/api/generate", tags=["Generation"])
 
+
+def _busy(e: LLMBusyError) -> HTTPException:
+    return HTTPException(
+        status_code=503, detail=str(e), headers={"Retry-After": str(e.retry_after)}
+    )
+
+
+@router.get("/scheduler")
+async def scheduler_stats(
+    llm_scheduler: LLMScheduler = Depends(get_llm_scheduler),
+):
+    """
+    LLM scheduler occupancy, queue depth and wait times.
+    """
+    return llm_scheduler.stats()
+
+
 @router.post("/{route_id}")
-async def generate_travelogue(route_id: str):
-    # Check if route exists
-    route = neo4j_service.get_route(route_id)
-    if not route:
-        raise HTTPException(status_code=404, detail="Route not found")
-        
+async def generate_travelogue(
+    route_id: str,
+    refresh: bool = False,
+    rag_service: RAGService = Depends(get_rag_service),
+):
     try:
-        travelogue = rag_service.generate_travelogue(route_id)
+        travelogue = await rag_service.run_generation(route_id, refresh=refresh)
         return {
             "route_id": route_id,
             "status": "completed",
             "travelogue": travelogue
         }
+    except RouteNotFoundError:
+        raise HTTPException(status_code=404, detail="Route not found")
+    except LLMBusyError as e:
+        raise _busy(e)
+    except GenerationTimeoutError as e:
+        raise HTTPException(status_code=504, detail=str(e))
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
+
+
+def _sse(event: str, data: dict) -> str:
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+@router.get("/{route_id}/stream")
+async def stream_travelogue(
+    route_id: str,
+    refresh: bool = False,
+    rag_service: RAGService = Depends(get_rag_service),
+    llm_scheduler: LLMScheduler = Depends(get_llm_scheduler),
+):
+    """
+    Stream the travelogue as Server-Sent Events: one `token` event per chunk,
+    then `done` with the full text (or `error`).
+    """
+    try:
+        loaded = await rag_service.aload_route(route_id)
+    except RouteNotFoundError:
+        raise HTTPException(status_code=404, detail="Route not found")
+    # A still-valid stored travelogue is streamed without touching the LLM
+    if rag_service.needs_generation(loaded, refresh) and llm_scheduler.is_full():
+        raise _busy(
+            LLMBusyError("LLM generation queue is full", llm_scheduler.retry_after())
+        )
+
+    async def events():
+        chunks = []
+        try:
+            async for chunk in rag_service.astream_generation(
+                route_id, refresh, loaded=loaded
+            ):
+                chunks.append(chunk)
+                yield _sse("token", {"text": chunk})
+        except GenerationError as e:
+            yield _sse("error", {"detail": str(e)})
+            return
+        except LLMBusyError as e:
+            yield _sse("error", {"detail": str(e), "retry_after": e.retry_after})
+            return
+        yield _sse(
+            "done",
+            {
+                "route_id": route_id,
+                "status": "completed",
+                "travelogue": "".join(chunks),
+            },
+        )
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.post("/{route_id}/jobs", response_model=JobResponse, status_code=202)
+async def submit_generation_job(
+    route_id: str,
+    response: Response,
+    job_service: GenerationJobService = Depends(get_job_service),
+):
+    route = await async_neo4j_service.get_route(route_id)
+    if not route:
+        raise HTTPException(status_code=404, detail="Route not found")
+
+    try:
+        job, created = await job_service.submit(route_id)
+    except QueueFullError as e:
+        raise HTTPException(
+            status_code=503, detail=str(e), headers={"Retry-After": "10"}
+        )
+    if not created:
+        response.status_code = 200
+    return job
+
+
+@router.get("/jobs", response_model=List[JobResponse])
+async def list_generation_jobs(
+    route_id: Optional[str] = None,
+    job_service: GenerationJobService = Depends(get_job_service),
+):
+    return await job_service.list_jobs(route_id)
+
+
+@router.get("/jobs/{job_id}", response_model=JobResponse)
+async def get_generation_job(
+    job_id: str, job_service: GenerationJobService = Depends(get_job_service)
+):
+    job = await job_service.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job
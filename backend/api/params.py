@@ -0,0 +1,21 @@
+# Query parameter types shared by the routers.
+
+from datetime import datetime, timezone
+from typing import Annotated
+
+from pydantic import AfterValidator
+
+
+def _naive_utc(value: datetime) -> datetime:
+    """
+    Convert an offset-aware timestamp to naive UTC, the form every created_at
+    is stored in (datetime.utcnow()). Naive input is taken to be UTC already.
+    """
+    if value.tzinfo is None:
+        return value
+    return value.astimezone(timezone.utc).replace(tzinfo=None)
+
+
+# Accepts "2024-01-01T00:00:00", "...Z" or "...+02:00" alike, so range filters
+# compare against stored timestamps instead of failing on mixed naive/aware values
+UTCDatetime = Annotated[datetime, AfterValidator(_naive_utc)]
@@ -1,33 +1,191 @@
-from fastapi import APIRouter, HTTPException
+from typing import List, Optional
 
-from models.route import RouteCreate, RouteResponse, RouteUpdate
-from services.neo4j_service import neo4j_service
+from fastapi import APIRouter, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from api.params import UTCDatetime
+from models.route import (
+    NearbyRoute,
+    RouteCreate,
+    RoutePage,
+    RouteResponse,
+    RouteUpdate,
+    SentimentTimeline,
+)
+from models.waypoint import WaypointPage, WaypointResponse
+from services.neo4j_service import async_neo4j_service
+from utils.config import settings
+from utils.geo import check_bbox
+from utils.pagination import decode_cursor, encode_cursor
 
 router = APIRouter(prefix="/api/routes", tags=["Routes"])
 
+PageSize = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX)
+
+
+def _parse_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        return decode_cursor(cursor)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+
+def _page(items: list, limit: int, key: str):
+    """
+    Trim a limit + 1 fetch to one page and derive the next cursor from it.
+    """
+    if len(items) <= limit:
+        return {"items": items, "next_cursor": None}
+    items = items[:limit]
+    return {
+        "items": items,
+        "next_cursor": encode_cursor(items[-1][key], items[-1]["id"]),
+    }
+
+
+def _ndjson(records, model):
+    async def lines():
+        async for record in records:
+            yield model.model_validate(record).model_dump_json(by_alias=True) + "\n"
+
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 
 @router.post("/", response_model=RouteResponse, status_code=201)
 async def create_route(route: RouteCreate):
     try:
-        node = neo4j_service.create_route(route)
+        node = await async_neo4j_service.create_route(route)
         return dict(node)
     except Exception as e:
         raise HTTPException(status_code=500, detail=str(e))
 
 
+@router.get("/", response_model=RoutePage)
+async def list_routes(
+    status: Optional[str] = None,
+    created_after: Optional[UTCDatetime] = None,
+    created_before: Optional[UTCDatetime] = None,
+    limit: int = PageSize,
+    cursor: Optional[str] = None,
+):
+    """
+    Keyset-paginated routes, newest first. Pass nextCursor back as cursor.
+    """
+    routes = await async_neo4j_service.list_routes(
+        limit + 1,
+        cursor=_parse_cursor(cursor),
+        status=status,
+        created_after=created_after,
+        created_before=created_before,
+    )
+    return _page(routes, limit, "created_at")
+
+
+@router.get("/export")
+async def export_routes(
+    status: Optional[str] = None,
+    created_after: Optional[UTCDatetime] = None,
+    created_before: Optional[UTCDatetime] = None,
+):
+    """
+    Stream every matching route as NDJSON without buffering the result set.
+    """
+    return _ndjson(
+        async_neo4j_service.stream_routes(
+            status=status, created_after=created_after, created_before=created_before
+        ),
+        RouteResponse,
+    )
+
+
+@router.get("/nearby", response_model=List[NearbyRoute])
+async def routes_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(500, gt=0, le=settings.SPATIAL_RADIUS_MAX_M),
+    limit: int = PageSize,
+):
+    """
+    Routes that started or passed within radius metres of a point, closest
+    first.
+    """
+    return await async_neo4j_service.find_routes_near(lat, lon, radius, limit)
+
+
+@router.get("/within", response_model=List[NearbyRoute])
+async def routes_within(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    limit: int = PageSize,
+):
+    """
+    Routes that started or passed inside a bounding box, newest first.
+    """
+    try:
+        bbox = check_bbox(south, west, north, east)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await async_neo4j_service.find_routes_in_bbox(bbox, limit)
+
+
 @router.get("/{id}", response_model=RouteResponse)
 async def get_route(id: str):
-    node = neo4j_service.get_route(id)
+    node = await async_neo4j_service.get_route(id)
     if not node:
         raise HTTPException(status_code=404, detail="Route not found")
     return dict(node)
 
 
+@router.get("/{id}/waypoints", response_model=WaypointPage)
+async def list_waypoints(id: str, limit: int = PageSize, cursor: Optional[str] = None):
+    """
+    Keyset-paginated waypoints of a route in the order they were stored.
+    """
+    waypoints = await async_neo4j_service.list_waypoints(
+        id, limit + 1, cursor=_parse_cursor(cursor)
+    )
+    if waypoints is None:
+        raise HTTPException(status_code=404, detail="Route not found")
+    return _page(waypoints, limit, "stored_at")
+
+
+@router.get("/{id}/sentiment", response_model=SentimentTimeline)
+async def sentiment_timeline(id: str):
+    """
+    The route's emotional arc: each waypoint's stored VADER score in walk order.
+    """
+    points = await async_neo4j_service.get_sentiment_timeline(id)
+    if points is None:
+        raise HTTPException(status_code=404, detail="Route not found")
+    scores = [p["sentiment"] for p in points if p["sentiment"] is not None]
+    return {
+        "route_id": id,
+        "points": points,
+        "mean": sum(scores) / len(scores) if scores else None,
+        "minimum": min(scores, default=None),
+        "maximum": max(scores, default=None),
+    }
+
+
+@router.get("/{id}/waypoints/export")
+async def export_waypoints(id: str):
+    """
+    Stream every waypoint of a route as NDJSON in walk order.
+    """
+    if not await async_neo4j_service.get_route(id):
+        raise HTTPException(status_code=404, detail="Route not found")
+    return _ndjson(async_neo4j_service.stream_waypoints(id), WaypointResponse)
+
+
 @router.patch("/{id}", response_model=RouteResponse)
 async def update_route(id: str, update: RouteUpdate):
     # This acts both as a patch and the finalise endpoint for the MVP
     # Ideally, we would update the Neo4j route node with properties
-    node = neo4j_service.update_route(id, update)
+    node = await async_neo4j_service.update_route(id, update)
     if not node:
         raise HTTPException(status_code=404, detail="Route not found")
     return dict(node)
@@ -35,7 +193,7 @@ async def update_route(id: str, update: RouteUpdate):
 
 @router.post("/{id}/finalise", response_model=RouteResponse)
 async def finalise_route(id: str, update: RouteUpdate):
-    node = neo4j_service.update_route(id, update)
+    node = await async_neo4j_service.update_route(id, update)
     if not node:
         raise HTTPException(status_code=404, detail="Route not found")
     return dict(node)
@@ -1,6 +1,19 @@
-from fastapi import APIRouter, HTTPException
-from models.waypoint import WaypointCreate, WaypointResponse
-from services.neo4j_service import neo4j_service
+from typing import List
+
+from fastapi import APIRouter, Body, HTTPException, Query
+from pydantic import ValidationError
+
+from models.waypoint import (
+    NearbyWaypoint,
+    WaypointBatchItem,
+    WaypointBatchResponse,
+    WaypointCreate,
+    WaypointResponse,
+)
+from services.enrichment_service import poi_enrichment_service
+from services.neo4j_service import async_neo4j_service
+from utils.config import settings
+from utils.geo import check_bbox
 from utils.logger import logger
 
 router = APIRouter(prefix="/api/waypoints", tags=["Waypoints"])
@@ -8,8 +21,97 @@ router = APIRouter(prefix="/api/waypoints", tags=["Waypoints"])
 @router.post("/", response_model=WaypointResponse, status_code=201)
 async def submit_waypoint(waypoint: WaypointCreate):
     try:
-        node = neo4j_service.store_waypoint(waypoint)
+        node = await async_neo4j_service.store_waypoint(waypoint)
+        poi_enrichment_service.submit([node])
         return dict(node)
     except Exception as e:
         logger.error(f"Failed to submit waypoint: {e}")
         raise HTTPException(status_code=500, detail=str(e))
+
+
+@router.post("/batch", response_model=WaypointBatchResponse)
+async def submit_waypoints(items: List[dict] = Body(...)):
+    """
+    Store many waypoints in one transaction. Each item is validated on its
+    own, so one bad item does not reject the upload; items carrying an
+    idempotencyKey that was already stored are reported as duplicates.
+    """
+    if len(items) > settings.WAYPOINT_BATCH_MAX_SIZE:
+        raise HTTPException(
+            status_code=413,
+            detail=f"At most {settings.WAYPOINT_BATCH_MAX_SIZE} waypoints per batch",
+        )
+
+    results = {}
+    valid = []
+    for index, item in enumerate(items):
+        try:
+            valid.append((index, WaypointBatchItem.model_validate(item)))
+        except ValidationError as e:
+            results[index] = {
+                "index": index,
+                "status": "invalid",
+                "errors": e.errors(include_url=False, include_context=False),
+            }
+
+    try:
+        stored = await async_neo4j_service.store_waypoints(valid) if valid else {}
+    except Exception as e:
+        logger.error(f"Failed to submit waypoint batch: {e}")
+        raise HTTPException(status_code=500, detail=str(e))
+
+    poi_enrichment_service.submit(
+        node for node, created in stored.values() if created
+    )
+
+    for index, _ in valid:
+        if index not in stored:
+            results[index] = {"index": index, "status": "route_not_found"}
+            continue
+        node, created = stored[index]
+        results[index] = {
+            "index": index,
+            "status": "created" if created else "duplicate",
+            "waypoint": node,
+        }
+
+    ordered = [results[index] for index in range(len(items))]
+    return {
+        "created": sum(1 for r in ordered if r["status"] == "created"),
+        "duplicates": sum(1 for r in ordered if r["status"] == "duplicate"),
+        "failed": sum(
+            1 for r in ordered if r["status"] not in ("created", "duplicate")
+        ),
+        "results": ordered,
+    }
+
+
+@router.get("/nearby", response_model=List[NearbyWaypoint])
+async def waypoints_nearby(
+    lat: float = Query(..., ge=-90, le=90),
+    lon: float = Query(..., ge=-180, le=180),
+    radius: float = Query(500, gt=0, le=settings.SPATIAL_RADIUS_MAX_M),
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+):
+    """
+    Waypoints from any route within radius metres of a point, closest first.
+    """
+    return await async_neo4j_service.find_waypoints_near(lat, lon, radius, limit)
+
+
+@router.get("/within", response_model=List[NearbyWaypoint])
+async def waypoints_within(
+    south: float,
+    west: float,
+    north: float,
+    east: float,
+    limit: int = Query(settings.PAGE_SIZE_DEFAULT, ge=1, le=settings.PAGE_SIZE_MAX),
+):
+    """
+    Waypoints from any route inside a bounding box, oldest first.
+    """
+    try:
+        bbox = check_bbox(south, west, north, east)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return await async_neo4j_service.find_waypoints_in_bbox(bbox, limit)
@@ -0,0 +1,57 @@
+"""
+Backfill VADER sentiment scores onto existing waypoints.
+
+Pages through waypoints whose notes have not been scored, scores each page
+across a process pool and writes the scores back with one UNWIND per page.
+New waypoints are scored when they are written, so this only needs to run
+once over data recorded before that (or with --rescore after a VADER upgrade).
+
+    uv run --env-file ../.env python backfill_sentiment.py --workers 4
+"""
+
+import argparse
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from services.neo4j_service import neo4j_service
+from utils.logger import logger
+from utils.sentiment import score_batch
+
+
+def chunks(rows: list, size: int):
+    for start in range(0, len(rows), size):
+        yield rows[start : start + size]
+
+
+def run(args):
+    scored = 0
+    after = None
+    with ProcessPoolExecutor(max_workers=args.workers) as pool:
+        while True:
+            page = neo4j_service.get_unscored_waypoints(
+                args.batch_size, after=after, rescore=args.rescore
+            )
+            if not page:
+                break
+            chunk_size = max(1, -(-len(page) // args.workers))
+            rows = [
+                row
+                for chunk in pool.map(score_batch, chunks(page, chunk_size))
+                for row in chunk
+            ]
+            neo4j_service.store_waypoint_sentiments(rows)
+            scored += len(rows)
+            after = page[-1][0]
+            logger.info(f"Scored {scored} waypoints")
+    neo4j_service.close()
+    logger.info(f"Sentiment backfill complete: {scored} waypoints scored")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-b", "--batch-size", type=int, default=1000)
+    parser.add_argument("-w", "--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument(
+        "--rescore", action="store_true", help="Rescore notes that already have a score"
+    )
+    run(parser.parse_args())
@@ -0,0 +1,108 @@
+"""
+Check that concurrent evaluation writes keep the running aggregates exact.
+
+Against a running API (with Neo4j and the LLM available), fires single and
+bulk evaluations at one route concurrently, then compares the running
+aggregates behind GET /api/evaluate/stats with the same statistics computed
+from the raw evaluation values (any filter makes the endpoint project them).
+Lost updates show up as a count or mean mismatch. Exits non-zero on a
+mismatch. Run from backend/ while the server is up:
+
+    uv run python -m benchmarks.concurrent_evaluations --requests 16
+"""
+
+import argparse
+import asyncio
+import math
+import sys
+
+import httpx
+
+JOURNAL = (
+    "Concrete and traffic gave way to a calm park full of birdsong, "
+    "and the walk felt lighter from there."
+)
+# Any filter makes the stats endpoint recompute from the Evaluation nodes
+RAW_FILTER = {"created_after": "1970-01-01T00:00:00"}
+FIELDS = ["bertscoreF1", "humanSentiment", "aiSentiment"]
+
+
+async def create_route(client: httpx.AsyncClient) -> str:
+    response = await client.post(
+        "/api/routes/",
+        json={
+            "name": "Concurrent Evaluations",
+            "startLat": 53.3498,
+            "startLon": -6.2603,
+        },
+    )
+    response.raise_for_status()
+    route_id = response.json()["id"]
+    response = await client.post(
+        "/api/waypoints/",
+        json={
+            "routeId": route_id,
+            "latitude": 53.3498,
+            "longitude": -6.2603,
+            "textNote": "A quiet park after the noise of the main road.",
+        },
+    )
+    response.raise_for_status()
+    return route_id
+
+
+async def evaluate(client: httpx.AsyncClient, route_id: str, bulk: bool) -> int:
+    body = {"routeId": route_id, "humanJournal": JOURNAL}
+    if bulk:
+        response = await client.post("/api/evaluate/bulk", json=[body, body])
+        response.raise_for_status()
+        return sum(1 for r in response.json()["results"] if not r.get("error"))
+    response = await client.post(f"/api/evaluate/{route_id}", json=body)
+    response.raise_for_status()
+    return 1
+
+
+def mismatches(running: dict, raw: dict, tolerance: float) -> list[str]:
+    problems = []
+    if running["count"] != raw["count"]:
+        problems.append(f"count {running['count']} != {raw['count']}")
+    for field in FIELDS:
+        for stat in ("mean", "std"):
+            a, b = running[field][stat], raw[field][stat]
+            if not math.isclose(a, b, abs_tol=tolerance):
+                problems.append(f"{field} {stat} {a} != {b}")
+    return problems
+
+
+async def run(args) -> int:
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout) as client:
+        route_id = await create_route(client)
+        # Generate once up front so the evaluations only race on their writes
+        (await client.post(f"/api/generate/{route_id}")).raise_for_status()
+        before = (await client.get("/api/evaluate/stats")).json()["count"]
+        stored = await asyncio.gather(
+            *(evaluate(client, route_id, i % 4 == 3) for i in range(args.requests))
+        )
+        running = (await client.get("/api/evaluate/stats")).json()
+        raw = (await client.get("/api/evaluate/stats", params=RAW_FILTER)).json()
+
+    problems = mismatches(running, raw, args.tolerance)
+    if running["count"] - before != sum(stored):
+        problems.append(
+            f"{sum(stored)} evaluations stored but the count grew by "
+            f"{running['count'] - before}"
+        )
+    for problem in problems:
+        print(f"MISMATCH {problem}", file=sys.stderr)
+    if not problems:
+        print(f"OK {sum(stored)} concurrent evaluations, aggregates match")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("-n", "--requests", type=int, default=16)
+    parser.add_argument("--timeout", type=float, default=300.0)
+    parser.add_argument("--tolerance", type=float, default=1e-9)
+    sys.exit(asyncio.run(run(parser.parse_args())))
@@ -0,0 +1,99 @@
+"""
+Minimal stand-in for the Ollama HTTP API.
+
+Serves /api/generate (streamed NDJSON or a single JSON body) with a fixed
+token count and per-token delay, and counts concurrent generations, so the
+LLM scheduler and generation endpoints can be exercised without a model.
+
+    uv run python benchmarks/fake_ollama.py --port 11500 --tokens 50 --delay 0.02
+    OLLAMA_HOST=http://localhost:11500 uv run fastapi dev main.py
+"""
+
+import argparse
+import asyncio
+import json
+from datetime import datetime, timezone
+
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+app = FastAPI(title="Fake Ollama")
+app.state.tokens = 50
+app.state.delay = 0.02
+app.state.active = 0
+app.state.peak = 0
+app.state.served = 0
+
+
+def _chunk(model: str, text: str, done: bool, count: int = 0) -> dict:
+    chunk = {
+        "model": model,
+        "created_at": datetime.now(timezone.utc).isoformat(),
+        "response": text,
+        "done": done,
+    }
+    if done:
+        chunk.update(
+            {"done_reason": "stop", "eval_count": count, "prompt_eval_count": 0}
+        )
+    return chunk
+
+
+async def _generate(model: str):
+    app.state.active += 1
+    app.state.peak = max(app.state.peak, app.state.active)
+    try:
+        for i in range(app.state.tokens):
+            await asyncio.sleep(app.state.delay)
+            yield _chunk(model, f"word{i} ", False)
+        yield _chunk(model, "", True, app.state.tokens)
+    finally:
+        app.state.active -= 1
+        app.state.served += 1
+
+
+@app.post("/api/generate")
+async def generate(request: Request):
+    body = await request.json()
+    model = body.get("model", "fake")
+    if body.get("stream", True):
+
+        async def lines():
+            async for chunk in _generate(model):
+                yield json.dumps(chunk) + "\n"
+
+        return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+    text = "".join([chunk["response"] async for chunk in _generate(model)])
+    return _chunk(model, text, True, app.state.tokens)
+
+
+@app.get("/api/tags")
+async def tags():
+    return {"models": [{"name": "fake", "model": "fake"}]}
+
+
+@app.get("/stats")
+async def stats():
+    """
+    Concurrency seen by the fake: current, peak and total generations.
+    """
+    return {
+        "active": app.state.active,
+        "peak": app.state.peak,
+        "served": app.state.served,
+    }
+
+
+if __name__ == "__main__":
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=11500)
+    parser.add_argument("--tokens", type=int, default=50)
+    parser.add_argument("--delay", type=float, default=0.02)
+    args = parser.parse_args()
+    app.state.tokens = args.tokens
+    app.state.delay = args.delay
+    uvicorn.run(app, host=args.host, port=args.port)
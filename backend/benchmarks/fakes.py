@@ -0,0 +1,211 @@
+"""
+In-process stand-ins for Neo4j, Ollama and Overpass used by the benchmarks.
+
+Each fake keeps the real code path above it intact: the in-memory store
+reuses the service's parameter builders (so waypoint sentiment is still
+scored on write), the LLM fake is the fake Ollama app behind the real
+LangChain client, and the Overpass fake sits behind the real httpx client.
+"""
+
+import asyncio
+import copy
+import hashlib
+import json
+import os
+import time
+from contextlib import ExitStack
+from datetime import datetime
+from unittest import mock
+
+import httpx
+import numpy as np
+
+from benchmarks import fake_ollama
+from services.neo4j_service import _Neo4jQueries, async_neo4j_service
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures")
+
+
+class InMemoryNeo4jStore(_Neo4jQueries):
+    """
+    Dict-backed replacement for the AsyncNeo4jService methods the benchmark
+    scenarios reach, with an optional per-query latency.
+    """
+
+    def __init__(self, latency_ms: float = 0.0):
+        self.latency = latency_ms / 1000
+        self.routes = {}
+        self.waypoints = {}
+        self.keys = {}
+        self.evaluations = []
+
+    async def _round_trip(self):
+        await asyncio.sleep(self.latency)
+
+    async def create_route(self, route_data):
+        await self._round_trip()
+        route = {**self._route_params(route_data), "status": "active"}
+        self.routes[route["id"]] = route
+        self.waypoints[route["id"]] = []
+        return dict(route)
+
+    async def get_route(self, route_id: str):
+        await self._round_trip()
+        route = self.routes.get(route_id)
+        return dict(route) if route else None
+
+    async def store_waypoint(self, waypoint_data):
+        await self._round_trip()
+        if waypoint_data.route_id not in self.routes:
+            return None
+        waypoint = self._waypoint_params(waypoint_data)
+        self.waypoints[waypoint.pop("route_id")].append(waypoint)
+        return dict(waypoint)
+
+    async def store_waypoints(self, items):
+        await self._round_trip()
+        stored = {}
+        for row in self._waypoint_rows(items):
+            index, key = row.pop("index"), row.pop("idempotency_key")
+            route_id = row.pop("route_id")
+            if route_id not in self.routes:
+                continue
+            if key in self.keys:
+                stored[index] = (dict(self.keys[key]), False)
+                continue
+            self.keys[key] = row
+            self.waypoints[route_id].append(row)
+            stored[index] = (dict(row), True)
+        return stored
+
+    async def get_route_with_waypoints(self, route_id: str):
+        await self._round_trip()
+        route = self.routes.get(route_id)
+        if not route:
+            return None, []
+        return dict(route), copy.deepcopy(self.waypoints[route_id])
+
+    async def store_waypoint_pois(self, waypoints, route_pois):
+        await self._round_trip()
+        by_id = {wp["id"]: wp for wps in self.waypoints.values() for wp in wps}
+        for row in self._poi_rows(waypoints, route_pois):
+            waypoint = by_id.get(row["waypoint_id"])
+            if waypoint:
+                waypoint["pois_enriched_at"] = datetime.utcnow()
+                waypoint["pois"] = sorted(row["pois"], key=lambda p: p["distance_m"])
+
+    async def store_travelogue(self, route_id: str, travelogue: str, content_hash):
+        await self._round_trip()
+        route = self.routes.get(route_id)
+        if route:
+            route.update(travelogue=travelogue, travelogue_hash=content_hash)
+        return route
+
+    async def store_evaluation(self, route_id: str, evaluation_data: dict):
+        stored = await self.store_evaluations([(route_id, evaluation_data)])
+        return stored[0] if stored else None
+
+    async def store_evaluations(self, items):
+        await self._round_trip()
+        rows = [
+            {**row, "created_at": datetime.utcnow()}
+            for row in self._evaluation_rows(items)
+            if row["route_id"] in self.routes
+        ]
+        self.evaluations.extend(rows)
+        return rows
+
+    def install(self, stack: ExitStack):
+        """
+        Patch the shared async Neo4j service to use this store until the
+        stack closes.
+        """
+        for name in (
+            "create_route",
+            "get_route",
+            "store_waypoint",
+            "store_waypoints",
+            "get_route_with_waypoints",
+            "store_waypoint_pois",
+            "store_travelogue",
+            "store_evaluation",
+            "store_evaluations",
+        ):
+            stack.enter_context(
+                mock.patch.object(async_neo4j_service, name, getattr(self, name))
+            )
+
+
+def fake_ollama_llm(tokens: int, token_delay_ms: float):
+    """
+    Real LangChain Ollama client talking to the fake Ollama app in-process.
+    """
+    from langchain_ollama import OllamaLLM
+
+    fake_ollama.app.state.tokens = tokens
+    fake_ollama.app.state.delay = token_delay_ms / 1000
+    return OllamaLLM(
+        base_url="http://fake-ollama",
+        model="fake",
+        async_client_kwargs={"transport": httpx.ASGITransport(app=fake_ollama.app)},
+    )
+
+
+def fake_overpass_transport(latency_ms: float = 0.0):
+    """
+    httpx transport answering every Overpass query with the fixture POIs.
+    """
+    with open(os.path.join(FIXTURES_DIR, "overpass_pois.json")) as f:
+        body = json.load(f)
+
+    async def handler(request):
+        await asyncio.sleep(latency_ms / 1000)
+        return httpx.Response(200, json=body)
+
+    return httpx.MockTransport(handler)
+
+
+class FakeScores(list):
+    def tolist(self):
+        return list(self)
+
+
+class FakeBERTScorer:
+    """
+    BERTScorer stand-in with a fixed cost per batch and per pair, so batching
+    behaviour is visible without loading a model.
+    """
+
+    def __init__(self, batch_ms: float = 20.0, pair_ms: float = 5.0):
+        self.batch_seconds = batch_ms / 1000
+        self.pair_seconds = pair_ms / 1000
+
+    def score(self, cands, refs, verbose=False):
+        time.sleep(self.batch_seconds + self.pair_seconds * len(cands))
+        overlap = [
+            len(set(c.split()) & set(r.split())) / max(len(set(r.split())), 1)
+            for c, r in zip(cands, refs)
+        ]
+        scores = FakeScores(0.8 + 0.2 * o for o in overlap)
+        return scores, scores, scores
+
+
+class FakeTextEmbedder:
+    """
+    TextEmbedder stand-in: hashed bag-of-words vectors with a fixed cost per
+    text, so retrieval runs end to end without a model.
+    """
+
+    def __init__(self, dim: int = 384, text_ms: float = 0.5):
+        self.dim = dim
+        self.text_seconds = text_ms / 1000
+
+    def embed(self, texts):
+        time.sleep(self.text_seconds * len(texts))
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                digest = hashlib.md5(word.encode("utf-8")).digest()
+                vectors[row, int.from_bytes(digest[:4], "little") % self.dim] += 1
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms == 0, 1, norms)
@@ -0,0 +1,395 @@
+"""
+Load-test the API in-process against local fakes and check for regressions.
+
+Drives the FastAPI app over an ASGI transport with an in-memory Neo4j store,
+the fake Ollama app (configurable token latency), fixture Overpass POIs, and
+fixed-cost BERTScorer and embedding stand-ins, so it needs none of the real
+services or models. Each scenario is repeated (--repeats) and reports the
+median throughput and p50/p95/p99 latency over the repeats, with their
+spread. Exits non-zero when a scenario is slower than the stored baseline by
+more than the tolerance: --tolerance, or three times the spread measured in
+either run if that is larger, so noisy scenarios are not flagged on noise.
+
+Latencies are wall-clock, so baseline.json only applies to the machine it
+was recorded on (it records which one, and a run elsewhere warns). Record a
+baseline on the machine that runs the gate before relying on it. Run from
+backend/:
+
+    uv run python -m benchmarks.run
+    uv run python -m benchmarks.run --update-baseline
+"""
+
+import argparse
+import asyncio
+import gc
+import json
+import math
+import os
+import platform
+import statistics
+import sys
+import time
+from contextlib import ExitStack
+from unittest import mock
+
+# Keep runs deterministic: no on-disk POI cache, no background warm-up, and
+# scoring on threads so the fake scorer below is the one used
+os.environ.setdefault("POI_CACHE_ENABLED", "false")
+os.environ.setdefault("WARMUP_SERVICES", "[]")
+os.environ.setdefault("SCORING_PROCESSES", "0")
+
+import httpx  # noqa: E402
+
+from benchmarks.fakes import (  # noqa: E402
+    FakeBERTScorer,
+    FakeTextEmbedder,
+    InMemoryNeo4jStore,
+    fake_ollama_llm,
+    fake_overpass_transport,
+)
+from main import app  # noqa: E402
+from services.eval_service import eval_service  # noqa: E402
+from services.job_service import JobStore, job_service  # noqa: E402
+from services.rag_service import rag_service  # noqa: E402
+from services.retrieval import retrieval_service  # noqa: E402
+from utils.config import settings  # noqa: E402
+from utils.osm_client import async_osm_client  # noqa: E402
+from utils.vector_index import VectorIndex  # noqa: E402
+
+BASELINE_PATH = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "baseline.json"
+)
+
+START = (53.3498, -6.2603)
+NOTES = [
+    "Starting the walk. The urban ambient noise is overwhelming, grey concrete.",
+    "Stumbled into a quiet park. The mood shifted. Greener colors, birds chirping.",
+    "Rain again, everyone hurrying past with their heads down.",
+    "A busker on the corner playing something joyful, people stopping to listen.",
+    None,
+]
+# Allowed slowdown per unit of measured spread (relative median absolute
+# deviation over the repeats)
+SPREAD_FACTOR = 3
+MACHINE_KEY = "_machine"
+
+JOURNAL = (
+    "I walked from the noisy centre into the calm of the park. The concrete gave "
+    "way to trees and birdsong, and by the canal I felt lighter than when I set off."
+)
+
+
+def _percentile(sorted_values: list[float], q: float) -> float:
+    # Nearest-rank percentile
+    index = max(math.ceil(q / 100 * len(sorted_values)) - 1, 0)
+    return sorted_values[index]
+
+
+def _spread(values: list[float]) -> float:
+    # Relative median absolute deviation
+    middle = statistics.median(values)
+    if not middle:
+        return 0.0
+    return statistics.median(abs(v - middle) for v in values) / middle
+
+
+def summarise(runs: list[dict]) -> dict:
+    """
+    Median of each metric over repeated runs of a scenario, with the
+    relative spread of p95 latency and throughput.
+    """
+    summary = {
+        "requests": runs[0]["requests"],
+        "errors": sum(run["errors"] for run in runs),
+        "repeats": len(runs),
+    }
+    for key in ("throughput_rps", "p50_ms", "p95_ms", "p99_ms"):
+        summary[key] = round(statistics.median(run[key] for run in runs), 2)
+    summary["p95_spread"] = round(_spread([run["p95_ms"] for run in runs]), 3)
+    summary["throughput_spread"] = round(
+        _spread([run["throughput_rps"] for run in runs]), 3
+    )
+    return summary
+
+
+def machine() -> dict:
+    return {
+        "platform": platform.platform(),
+        "processor": platform.processor() or platform.machine(),
+        "cpus": os.cpu_count(),
+        "python": platform.python_version(),
+    }
+
+
+def _waypoint(route_id: str, i: int) -> dict:
+    return {
+        "routeId": route_id,
+        "latitude": START[0] - 0.0004 * i,
+        "longitude": START[1] + 0.0002 * i,
+        "textNote": NOTES[i % len(NOTES)],
+    }
+
+
+async def drive(requests: int, concurrency: int, send) -> dict:
+    """
+    Issue `requests` calls of send(i) with at most `concurrency` in flight.
+    """
+    latencies = []
+    errors = 0
+    limit = asyncio.Semaphore(concurrency)
+
+    async def one(i):
+        nonlocal errors
+        async with limit:
+            started = time.perf_counter()
+            response = await send(i)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": requests,
+        "errors": errors,
+        "throughput_rps": round(requests / elapsed, 2),
+        "p50_ms": round(_percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(_percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(_percentile(latencies, 99) * 1000, 2),
+    }
+
+
+async def _create_routes(client, count: int) -> list[str]:
+    ids = []
+    for i in range(count):
+        response = await client.post(
+            "/api/routes/",
+            json={
+                "name": f"Benchmark walk {i}",
+                "startLat": START[0],
+                "startLon": START[1],
+            },
+        )
+        ids.append(response.json()["id"])
+    return ids
+
+
+async def scenario_route_create(client, scale: float):
+    n = int(200 * scale)
+
+    def send(i):
+        return client.post(
+            "/api/routes/",
+            json={"name": f"Route {i}", "startLat": START[0], "startLon": START[1]},
+        )
+
+    return await drive(n, 20, send)
+
+
+async def scenario_waypoint_burst(client, scale: float):
+    routes = await _create_routes(client, 10)
+    n = int(500 * scale)
+
+    def send(i):
+        return client.post("/api/waypoints/", json=_waypoint(routes[i % 10], i))
+
+    return await drive(n, 50, send)
+
+
+async def scenario_waypoint_batch(client, scale: float):
+    routes = await _create_routes(client, 5)
+    n = int(20 * scale)
+
+    def send(i):
+        batch = [
+            {**_waypoint(routes[i % 5], j), "idempotencyKey": f"b{i}-{j}"}
+            for j in range(50)
+        ]
+        return client.post("/api/waypoints/batch", json=batch)
+
+    return await drive(n, 5, send)
+
+
+async def _routes_with_waypoints(client, count: int, waypoints: int) -> list[str]:
+    routes = await _create_routes(client, count)
+    for route_id in routes:
+        await client.post(
+            "/api/waypoints/batch",
+            json=[_waypoint(route_id, j) for j in range(waypoints)],
+        )
+    return routes
+
+
+async def scenario_generate(client, scale: float):
+    n = int(16 * scale)
+    routes = await _routes_with_waypoints(client, n, 20)
+
+    def send(i):
+        return client.post(f"/api/generate/{routes[i]}", params={"refresh": True})
+
+    return await drive(n, 8, send)
+
+
+async def scenario_evaluate(client, scale: float):
+    routes = await _routes_with_waypoints(client, 4, 20)
+    # Generate once so evaluations reuse the stored travelogues
+    for route_id in routes:
+        await client.post(f"/api/generate/{route_id}")
+    n = int(64 * scale)
+
+    def send(i):
+        return client.post(
+            f"/api/evaluate/{routes[i % 4]}",
+            json={"routeId": routes[i % 4], "humanJournal": JOURNAL},
+        )
+
+    return await drive(n, 16, send)
+
+
+SCENARIOS = {
+    "route_create": scenario_route_create,
+    "waypoint_burst": scenario_waypoint_burst,
+    "waypoint_batch": scenario_waypoint_batch,
+    "generate": scenario_generate,
+    "evaluate": scenario_evaluate,
+}
+
+
+async def run_suite(args) -> dict:
+    # As on application startup (not run over the ASGI transport)
+    gc.freeze()
+    store = InMemoryNeo4jStore(latency_ms=args.neo4j_latency_ms)
+    overpass = httpx.AsyncClient(
+        transport=fake_overpass_transport(args.overpass_latency_ms)
+    )
+    results = {}
+    with ExitStack() as stack:
+        store.install(stack)
+        stack.enter_context(
+            mock.patch.object(
+                rag_service, "_llm", fake_ollama_llm(args.tokens, args.token_delay_ms)
+            )
+        )
+        stack.enter_context(mock.patch.object(rag_service, "_chain", None))
+        stack.enter_context(
+            mock.patch.object(eval_service, "_scorer", FakeBERTScorer())
+        )
+        stack.enter_context(
+            mock.patch.object(retrieval_service, "embedder", FakeTextEmbedder())
+        )
+        stack.enter_context(
+            mock.patch.object(retrieval_service, "index", VectorIndex())
+        )
+        stack.enter_context(
+            mock.patch.object(job_service, "store", JobStore(":memory:"))
+        )
+        stack.enter_context(mock.patch.object(async_osm_client, "_client", overpass))
+        stack.enter_context(
+            mock.patch.object(
+                async_osm_client,
+                "_semaphore",
+                asyncio.Semaphore(settings.OSM_MAX_CONCURRENCY),
+            )
+        )
+        await eval_service.start()
+        try:
+            async with httpx.AsyncClient(
+                transport=httpx.ASGITransport(app=app),
+                base_url="http://benchmark",
+                timeout=None,
+            ) as client:
+                for name in args.scenarios:
+                    runs = []
+                    for _ in range(args.repeats):
+                        runs.append(await SCENARIOS[name](client, args.scale))
+                        print(f"{name}: {json.dumps(runs[-1])}", file=sys.stderr)
+                    results[name] = summarise(runs)
+        finally:
+            await eval_service.stop()
+            await overpass.aclose()
+    return results
+
+
+def _allowed(tolerance: float, result: dict, base: dict, spread: str) -> float:
+    noise = max(result.get(spread, 0.0), base.get(spread, 0.0))
+    return max(tolerance, SPREAD_FACTOR * noise)
+
+
+def compare(results: dict, baseline: dict, tolerance: float) -> list[str]:
+    """
+    Regressions of median p95 latency or throughput beyond the tolerance (or
+    beyond the measured noise, if larger), plus any scenario that returned
+    errors.
+    """
+    regressions = []
+    for name, result in results.items():
+        if result["errors"]:
+            regressions.append(f"{name}: {result['errors']} failed requests")
+        base = baseline.get(name)
+        if not base:
+            continue
+        allowed = _allowed(tolerance, result, base, "p95_spread")
+        if result["p95_ms"] > base["p95_ms"] * (1 + allowed):
+            regressions.append(
+                f"{name}: p95 {result['p95_ms']}ms vs baseline {base['p95_ms']}ms "
+                f"(allowed +{allowed:.0%})"
+            )
+        allowed = _allowed(tolerance, result, base, "throughput_spread")
+        if result["throughput_rps"] < base["throughput_rps"] * (1 - allowed):
+            regressions.append(
+                f"{name}: {result['throughput_rps']} req/s vs baseline "
+                f"{base['throughput_rps']} req/s (allowed -{allowed:.0%})"
+            )
+    return regressions
+
+
+def main(args) -> int:
+    results = asyncio.run(run_suite(args))
+    print(json.dumps(results, indent=2))
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({MACHINE_KEY: machine(), **results}, f, indent=2)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}", file=sys.stderr)
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("No baseline to compare against", file=sys.stderr)
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline.get(MACHINE_KEY) != machine():
+        print(
+            "Baseline was recorded on a different machine; latencies are not "
+            "comparable, re-record it here with --update-baseline",
+            file=sys.stderr,
+        )
+    regressions = compare(results, baseline, args.tolerance)
+    for regression in regressions:
+        print(f"REGRESSION {regression}", file=sys.stderr)
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-s", "--scenarios", nargs="+", choices=list(SCENARIOS), default=list(SCENARIOS)
+    )
+    parser.add_argument(
+        "--scale", type=float, default=1.0, help="Request count multiplier"
+    )
+    parser.add_argument(
+        "-r", "--repeats", type=int, default=5, help="Runs per scenario"
+    )
+    parser.add_argument("--tolerance", type=float, default=0.3)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--tokens", type=int, default=40)
+    parser.add_argument("--token-delay-ms", type=float, default=5.0)
+    parser.add_argument("--neo4j-latency-ms", type=float, default=1.0)
+    parser.add_argument("--overpass-latency-ms", type=float, default=50.0)
+    sys.exit(main(parser.parse_args()))
@@ -0,0 +1,110 @@
+"""
+Cold-start benchmark for the API process.
+
+Measures, in fresh interpreters, how long `import main` takes and which heavy
+libraries it pulls in, then launches uvicorn and times how long /health takes
+to answer (what the Dockerfile HEALTHCHECK waits for). Run from backend/:
+
+    uv run python benchmarks/startup.py --runs 5
+"""
+
+import argparse
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+import urllib.request
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HEAVY_MODULES = [
+    "torch",
+    "bert_score",
+    "scipy",
+    "vaderSentiment",
+    "langchain_core",
+    "langchain_ollama",
+]
+
+IMPORT_PROBE = f"""
+import json, sys, time
+started = time.perf_counter()
+import main
+elapsed = time.perf_counter() - started
+print(json.dumps({{
+    "seconds": elapsed,
+    "heavy_modules": [m for m in {HEAVY_MODULES!r} if m in sys.modules],
+}}))
+"""
+
+
+def measure_import():
+    output = subprocess.run(
+        [sys.executable, "-c", IMPORT_PROBE],
+        cwd=BACKEND_DIR,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def measure_healthy(timeout: float = 120.0):
+    """
+    Seconds from launching uvicorn until /health returns 200, or None.
+    """
+    port = _free_port()
+    started = time.perf_counter()
+    server = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port)],
+        cwd=BACKEND_DIR,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    try:
+        while time.perf_counter() - started < timeout:
+            try:
+                with urllib.request.urlopen(
+                    f"http://127.0.0.1:{port}/health", timeout=1
+                ) as response:
+                    if response.status == 200:
+                        return time.perf_counter() - started
+            except OSError:
+                time.sleep(0.05)
+        return None
+    finally:
+        server.terminate()
+        server.wait()
+
+
+def run(runs: int, serve: bool) -> dict:
+    imports = [measure_import() for _ in range(runs)]
+    result = {
+        "import_seconds_median": statistics.median(i["seconds"] for i in imports),
+        "import_seconds_max": max(i["seconds"] for i in imports),
+        "heavy_modules_at_import": imports[-1]["heavy_modules"],
+    }
+    if serve:
+        healthy = [measure_healthy() for _ in range(runs)]
+        ok = [h for h in healthy if h is not None]
+        result["healthy_seconds_median"] = statistics.median(ok) if ok else None
+        result["healthy_failures"] = len(healthy) - len(ok)
+    return result
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("-n", "--runs", type=int, default=3)
+    parser.add_argument(
+        "--no-serve", action="store_true", help="Only measure the import time"
+    )
+    args = parser.parse_args()
+    print(json.dumps(run(args.runs, not args.no_serve), indent=2))
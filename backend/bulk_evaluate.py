@@ -0,0 +1,61 @@
+"""
+Offline batch evaluation runner.
+
+Streams (routeId, humanJournal) pairs from a JSONL file, scores them with
+batched BERTScore and VADER, stores the evaluations in Neo4j and runs the
+statistical tests over the whole cohort.
+
+    uv run --env-file ../.env python bulk_evaluate.py journals.jsonl -o results.jsonl
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+
+from models.evaluation import EvaluationCreate
+from services.bulk_evaluation import cohort_statistics, evaluate_many
+from services.eval_service import eval_service
+from services.neo4j_service import async_neo4j_service
+from utils.logger import logger
+from utils.osm_client import async_osm_client
+
+
+def read_items(stream):
+    for line_no, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            yield EvaluationCreate.model_validate_json(line)
+        except ValueError as e:
+            logger.error(f"Skipping invalid line {line_no}: {e}")
+
+
+async def run(args):
+    stream = sys.stdin if args.input == "-" else open(args.input)
+    output = sys.stdout if args.output == "-" else open(args.output, "w")
+    results = []
+    await eval_service.start()
+    try:
+        async for result in evaluate_many(read_items(stream), args.batch_size):
+            results.append(result)
+            output.write(json.dumps(result) + "\n")
+        statistics = await cohort_statistics(results)
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+        if output is not sys.stdout:
+            output.close()
+        await async_osm_client.aclose()
+        await async_neo4j_service.close()
+        await eval_service.stop()
+
+    print(json.dumps(statistics, indent=2), file=sys.stderr)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("input", help="JSONL file of {routeId, humanJournal}, or -")
+    parser.add_argument("-o", "--output", default="-", help="JSONL results file")
+    parser.add_argument("-b", "--batch-size", type=int, default=None)
+    asyncio.run(run(parser.parse_args()))
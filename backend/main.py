@@ -1,8 +1,23 @@
-from fastapi import FastAPI
+import asyncio
+import gc
+import time
+
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import JSONResponse, PlainTextResponse
 from api import routes, waypoints, generate, evaluate
+from services.enrichment_service import poi_enrichment_service
+from services.eval_service import eval_service
+from services.job_service import job_service
+from services.neo4j_service import async_neo4j_service, neo4j_service
+from services.retrieval import retrieval_service
+from services.schema import run_migrations
+from services.scoring_client import ScoringError, remote_scorer
+from services.warmup import warmup_service
 from utils.config import settings
 from utils.logger import logger
+from utils.metrics import CONTENT_TYPE, HTTP_REQUEST_SECONDS, registry
+from utils.osm_client import async_osm_client
 
 app = FastAPI(
     title="Affective Travelogue API",
@@ -19,6 +34,24 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def record_request_latency(request: Request, call_next):
+    started = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Label by route template so path parameters don't explode cardinality
+        route = request.scope.get("route")
+        HTTP_REQUEST_SECONDS.observe(
+            time.perf_counter() - started,
+            method=request.method,
+            route=route.path if route else "unmatched",
+            status=status,
+        )
+
 # Include routers
 app.include_router(routes.router)
 app.include_router(waypoints.router)
@@ -29,10 +62,73 @@ app.include_router(evaluate.router)
 async def health_check():
     return {"status": "healthy", "service": "affective-travelogue-backend"}
 
+async def scoring_ready() -> bool:
+    """
+    Whether the shared scoring process (if any) has loaded its models.
+    """
+    client = remote_scorer()
+    if client is None:
+        return True
+    try:
+        return (await asyncio.wait_for(client.call("ping"), 5.0))["ready"]
+    except (ScoringError, asyncio.TimeoutError):
+        return False
+
+@app.get("/health/ready")
+async def readiness_check():
+    # 503 until background warm-up has finished and the scoring process has
+    # its models, for load balancers that should hold traffic until then
+    scoring = await scoring_ready()
+    ready = warmup_service.ready and scoring
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "warmup": warmup_service.status,
+            "scoring": scoring,
+        },
+    )
+
+@app.get("/metrics", include_in_schema=False)
+async def metrics():
+    # Callback metrics and other workers' samples are read from disk
+    text = await asyncio.to_thread(registry.render)
+    return PlainTextResponse(text, media_type=CONTENT_TYPE)
+
 @app.on_event("startup")
 async def startup_event():
     logger.info("Starting Affective Travelogue Backend...")
+    await async_neo4j_service.connect()
+    if settings.NEO4J_MIGRATE_ON_STARTUP:
+        try:
+            applied = await run_migrations()
+            if applied:
+                logger.info(f"Applied schema migrations: {applied}")
+        except Exception as e:
+            logger.error(f"Schema migration failed: {e}")
+    await eval_service.start()
+    await job_service.start()
+    if settings.POI_ENRICHMENT_ENABLED:
+        await poi_enrichment_service.start()
+    warmup_service.start(settings.WARMUP_SERVICES)
+    if settings.METRICS_DIR:
+        registry.share(settings.METRICS_DIR, settings.METRICS_SHARE_INTERVAL)
+    # Move everything allocated by imports out of the collector's reach so
+    # full collections stay short instead of stalling early requests
+    gc.freeze()
 
 @app.on_event("shutdown")
 async def shutdown_event():
     logger.info("Shutting down Affective Travelogue Backend...")
+    await registry.stop_sharing()
+    await warmup_service.stop()
+    await poi_enrichment_service.stop()
+    await job_service.stop()
+    # Lets scoring already running finish, then stops the scoring processes
+    await eval_service.stop()
+    if remote_scorer():
+        await remote_scorer().aclose()
+    await async_osm_client.aclose()
+    await async_neo4j_service.close()
+    neo4j_service.close()
+    retrieval_service.save()
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.alias_generators import to_camel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class EvaluationBase(BaseModel):
@@ -22,3 +22,36 @@ class EvaluationResponse(BaseModel):
     created_at: datetime = Field(default_factory=datetime.utcnow)
 
     model_config = ConfigDict(from_attributes=True, alias_generator=to_camel, populate_by_name=True)
+
+class BulkEvaluationResult(BaseModel):
+    route_id: str
+    error: Optional[str] = None
+    bertscore_f1: Optional[float] = None
+    bertscore_precision: Optional[float] = None
+    bertscore_recall: Optional[float] = None
+    is_equivalent: Optional[bool] = None
+    human_sentiment: Optional[float] = None
+    ai_sentiment: Optional[float] = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class BulkEvaluationResponse(BaseModel):
+    results: List[BulkEvaluationResult]
+    statistics: dict
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class MetricSummary(BaseModel):
+    mean: Optional[float] = None
+    std: Optional[float] = None
+    median: Optional[float] = None
+
+class EvaluationStatsResponse(BaseModel):
+    count: int
+    equivalence_rate: Optional[float] = None
+    bertscore_f1: MetricSummary
+    human_sentiment: MetricSummary
+    ai_sentiment: MetricSummary
+    statistical_tests: dict
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
@@ -1,5 +1,5 @@
 from datetime import datetime
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import BaseModel, ConfigDict, Field
 from pydantic.alias_generators import to_camel
@@ -40,3 +40,36 @@ class RouteResponse(RouteBase):
     model_config = ConfigDict(
         from_attributes=True, alias_generator=to_camel, populate_by_name=True
     )
+
+
+class NearbyRoute(RouteResponse):
+    # Closest approach of the route (start or any waypoint) to the query point
+    distance_m: Optional[float] = None
+
+
+class SentimentPoint(BaseModel):
+    id: str
+    latitude: float
+    longitude: float
+    sentiment: Optional[float] = None
+    stored_at: datetime
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class SentimentTimeline(BaseModel):
+    route_id: str
+    points: List[SentimentPoint]
+    # Summary over the scored points only
+    mean: Optional[float] = None
+    minimum: Optional[float] = None
+    maximum: Optional[float] = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class RoutePage(BaseModel):
+    items: List[RouteResponse]
+    next_cursor: Optional[str] = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.alias_generators import to_camel
-from typing import Optional
+from typing import List, Optional
 from datetime import datetime
 
 class WaypointBase(BaseModel):
@@ -15,9 +15,41 @@ class WaypointBase(BaseModel):
 class WaypointCreate(WaypointBase):
     route_id: str
 
+class WaypointBatchItem(WaypointCreate):
+    # Client-generated key; retrying an upload with the same key never
+    # creates a second waypoint
+    idempotency_key: Optional[str] = Field(None, max_length=128)
+
 class WaypointResponse(WaypointBase):
     id: str
     transcription: Optional[str] = None
+    sentiment: Optional[float] = None
     stored_at: datetime
 
     model_config = ConfigDict(from_attributes=True, alias_generator=to_camel, populate_by_name=True)
+
+class NearbyWaypoint(WaypointResponse):
+    route_id: str
+    distance_m: Optional[float] = None
+
+class WaypointBatchResult(BaseModel):
+    index: int
+    status: str
+    waypoint: Optional[WaypointResponse] = None
+    errors: Optional[List[dict]] = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class WaypointBatchResponse(BaseModel):
+    created: int
+    duplicates: int
+    failed: int
+    results: List[WaypointBatchResult]
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+class WaypointPage(BaseModel):
+    items: List[WaypointResponse]
+    next_cursor: Optional[str] = None
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
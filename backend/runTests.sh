@@ -5,6 +5,7 @@ export UV_CACHE_DIR=./.uv_cache
 nohup uv run --env-file ../.env uvicorn main:app --port 8000 &
 
 hurl --test tests.hurl
+uv run python -m benchmarks.concurrent_evaluations
 
 
 # cleanup
@@ -0,0 +1,137 @@
+"""
+Shared scoring process for multi-worker deployments.
+
+Loads the BERTScore and embedding models once and serves every API worker
+over a unix socket (newline-delimited JSON, see services/scoring_client.py).
+Single-pair BERTScore requests from all workers go through one micro-batcher,
+so adding workers grows batches instead of splitting them. The socket is
+bound straight away: "ping" reports whether the models have loaded, and
+scoring requests received before then wait for them. Started by serve.py;
+by hand:
+
+    uv run python scoring_server.py --socket /tmp/affective-scoring.sock
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import signal
+
+from services.eval_service import eval_service
+from services.retrieval import retrieval_service
+from services.scoring_client import MAX_MESSAGE_BYTES, encode
+from utils.config import settings
+from utils.logger import logger
+
+# Set once the models have loaded (or failed to, so requests error out
+# instead of waiting forever)
+models_loaded = asyncio.Event()
+
+
+async def run_op(op: str, args: dict):
+    if op == "ping":
+        return {"pid": os.getpid(), "ready": models_loaded.is_set()}
+    await models_loaded.wait()
+    if op == "bertscore":
+        pairs = [tuple(pair) for pair in args["pairs"]]
+        if len(pairs) == 1:
+            return [await eval_service.acalculate_bertscore(*pairs[0])]
+        return await eval_service.acalculate_bertscore_batch(pairs)
+    if op == "embed":
+        vectors = await asyncio.to_thread(
+            retrieval_service.embedder.embed, args["texts"]
+        )
+        return vectors.tolist()
+    raise ValueError(f"Unknown operation {op!r}")
+
+
+async def handle_connection(reader, writer):
+    write_lock = asyncio.Lock()
+    tasks = set()
+
+    async def respond(line: bytes):
+        request = {}
+        try:
+            request = json.loads(line)
+            message = {
+                "id": request["id"],
+                "result": await run_op(request["op"], request.get("args", {})),
+            }
+        except Exception as e:
+            logger.error(f"Scoring request {request.get('op')} failed: {e}")
+            message = {"id": request.get("id"), "error": str(e)}
+        async with write_lock:
+            writer.write(encode(message))
+            await writer.drain()
+
+    try:
+        # Requests on one connection are answered as they finish, so a bulk
+        # batch does not hold up single pairs queued behind it
+        while line := await reader.readline():
+            task = asyncio.create_task(respond(line))
+            tasks.add(task)
+            task.add_done_callback(tasks.discard)
+    except (OSError, ValueError) as e:
+        logger.error(f"Scoring connection failed: {e}")
+    finally:
+        for task in tasks:
+            task.cancel()
+        writer.close()
+
+
+def warm_up():
+    try:
+        eval_service.warm_up()
+    except Exception as e:
+        logger.error(f"BERTScore model unavailable: {e}")
+    if settings.RETRIEVAL_ENABLED:
+        try:
+            retrieval_service.warm_up()
+        except Exception as e:
+            logger.error(f"Embedding model unavailable: {e}")
+
+
+async def load_models():
+    logger.info("Loading scoring models...")
+    try:
+        await asyncio.to_thread(warm_up)
+    finally:
+        models_loaded.set()
+    logger.info("Scoring models loaded")
+
+
+async def serve(path: str):
+    if os.path.exists(path):
+        os.unlink(path)
+    await eval_service.start()
+
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGTERM, signal.SIGINT):
+        loop.add_signal_handler(sig, stop.set)
+
+    server = await asyncio.start_unix_server(
+        handle_connection, path, limit=MAX_MESSAGE_BYTES
+    )
+    logger.info(f"Scoring server listening on {path}")
+    loading = asyncio.create_task(load_models())
+    async with server:
+        await stop.wait()
+    loading.cancel()
+
+    logger.info("Shutting down scoring server...")
+    await eval_service.stop()
+    if os.path.exists(path):
+        os.unlink(path)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--socket", default=settings.SCORING_SOCKET)
+    args = parser.parse_args()
+    if not args.socket:
+        parser.error("--socket is required when SCORING_SOCKET is not set")
+    # This process does the scoring itself rather than calling out to a socket
+    settings.SCORING_SOCKET = ""
+    asyncio.run(serve(args.socket))
@@ -0,0 +1,147 @@
+"""
+Production entrypoint: API workers on every core sharing one scoring process.
+
+Runs schema migrations once, then (with more than one worker) starts
+scoring_server.py and waits until it answers on its socket, and finally runs
+uvicorn with --workers. The scoring process loads the BERTScore and embedding
+models in the background; /health/ready reports 503 until it has. Workers
+reach it through SCORING_SOCKET instead of each loading the models, and share
+the SQLite POI cache and generation job store. Each worker publishes its
+metrics to a shared directory so /metrics on any of them covers all workers,
+with a `worker` label. SIGTERM/SIGINT are passed on
+to both processes, and when either exits the other is stopped.
+
+    uv run python serve.py --workers 4
+"""
+
+import argparse
+import asyncio
+import math
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from services.neo4j_service import async_neo4j_service
+from services.schema import run_migrations
+from services.scoring_client import ScoringClient, ScoringError
+from utils.config import settings
+from utils.cpu import available_cores
+from utils.logger import logger
+
+DEFAULT_SCORING_SOCKET = "/tmp/affective-scoring.sock"
+
+
+async def migrate() -> bool:
+    try:
+        applied = await run_migrations()
+        if applied:
+            logger.info(f"Applied schema migrations: {applied}")
+        return True
+    except Exception as e:
+        logger.error(f"Schema migration failed, workers will retry: {e}")
+        return False
+    finally:
+        await async_neo4j_service.close()
+
+
+def wait_for_scorer(process, path: str, timeout: float) -> bool:
+    """
+    Wait for a ping round trip, so a socket file left behind by an earlier
+    run is not mistaken for a live server.
+    """
+    client = ScoringClient(path, timeout=5.0)
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if process.poll() is not None:
+            return False
+        try:
+            client.call_sync("ping")
+            return True
+        except ScoringError:
+            time.sleep(0.2)
+    return False
+
+
+def stop_all(processes):
+    for process in processes:
+        if process.poll() is None:
+            process.terminate()
+    for process in processes:
+        try:
+            process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+def main(args) -> int:
+    workers = args.workers or settings.WEB_WORKERS or available_cores()
+    env = dict(os.environ)
+    if settings.NEO4J_MIGRATE_ON_STARTUP and asyncio.run(migrate()):
+        env["NEO4J_MIGRATE_ON_STARTUP"] = "false"
+
+    processes = []
+    if workers > 1:
+        # One Ollama concurrency limit for all workers, not one each, and the
+        # generation job workers spread across them
+        env["LLM_SLOT_DIR"] = settings.LLM_SLOT_DIR or tempfile.mkdtemp(
+            prefix="affective-llm-slots-"
+        )
+        env["GENERATION_WORKERS"] = str(
+            max(1, math.ceil(settings.GENERATION_WORKERS / workers))
+        )
+        # Any worker answering /metrics reports every worker's samples
+        env["METRICS_DIR"] = settings.METRICS_DIR or tempfile.mkdtemp(
+            prefix="affective-metrics-"
+        )
+        path = settings.SCORING_SOCKET or DEFAULT_SCORING_SOCKET
+        env["SCORING_SOCKET"] = path
+        if os.path.exists(path):
+            os.unlink(path)
+        scorer = subprocess.Popen(
+            [sys.executable, "scoring_server.py", "--socket", path], env=env
+        )
+        processes.append(scorer)
+        if not wait_for_scorer(scorer, path, settings.SCORING_STARTUP_TIMEOUT):
+            logger.error("Scoring server did not start")
+            stop_all(processes)
+            return 1
+
+    logger.info(f"Starting {workers} API workers")
+    processes.append(
+        subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "main:app",
+                "--host", args.host,
+                "--port", str(args.port),
+                "--workers", str(workers),
+            ],
+            env=env,
+        )
+    )
+
+    def forward(signum, frame):
+        for process in processes:
+            if process.poll() is None:
+                process.send_signal(signum)
+
+    signal.signal(signal.SIGTERM, forward)
+    signal.signal(signal.SIGINT, forward)
+
+    while all(process.poll() is None for process in processes):
+        time.sleep(0.5)
+    exited = next(process for process in processes if process.poll() is not None)
+    stop_all(processes)
+    return exited.returncode
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument(
+        "-w", "--workers", type=int, default=0, help="Default: one per core"
+    )
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=8000)
+    sys.exit(main(parser.parse_args()))
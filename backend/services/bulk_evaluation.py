@@ -0,0 +1,138 @@
+import asyncio
+
+from services.eval_service import ScoringUnavailableError, eval_service
+from services.llm_scheduler import LLMBusyError, Priority
+from services.neo4j_service import async_neo4j_service
+from services.rag_service import GenerationError, rag_service
+from services.retrieval import retrieval_service
+from utils.config import settings
+
+
+async def evaluate_batch(items) -> list[dict]:
+    """
+    Evaluate a batch of EvaluationCreate items: fetch each distinct route's
+    travelogue once, score all pairs in one BERTScore pass, and store the
+    evaluations in a single write.
+    """
+    route_ids = list(dict.fromkeys(item.route_id for item in items))
+    routes = dict(
+        zip(
+            route_ids,
+            await asyncio.gather(
+                *(async_neo4j_service.get_route(r) for r in route_ids)
+            ),
+        )
+    )
+
+    limit = asyncio.Semaphore(settings.GENERATION_WORKERS)
+
+    async def travelogue(route_id):
+        """
+        (travelogue, None), or (None, error) so that failed generations are
+        reported per item rather than scored and stored.
+        """
+        async with limit:
+            try:
+                text = await rag_service.run_generation(
+                    route_id, priority=Priority.BULK
+                )
+                return text, None
+            except LLMBusyError:
+                return None, "LLM busy"
+            except GenerationError as e:
+                return None, str(e)
+
+    found = [route_id for route_id in route_ids if routes[route_id]]
+    generated = dict(
+        zip(found, await asyncio.gather(*(travelogue(r) for r in found)))
+    )
+    travelogues = {r: text for r, (text, _) in generated.items() if text is not None}
+
+    scorable = [i for i, item in enumerate(items) if item.route_id in travelogues]
+    scoring_error = None
+    try:
+        scores, sentiments = await asyncio.gather(
+            eval_service.acalculate_bertscore_batch(
+                [
+                    (travelogues[items[i].route_id], items[i].human_journal)
+                    for i in scorable
+                ]
+            ),
+            eval_service.acalculate_sentiments(
+                [
+                    text
+                    for i in scorable
+                    for text in (
+                        items[i].human_journal,
+                        travelogues[items[i].route_id],
+                    )
+                ]
+            ),
+        )
+    except ScoringUnavailableError as e:
+        scoring_error = str(e)
+        scores, sentiments = [], []
+
+    results = [
+        {
+            "route_id": item.route_id,
+            "error": (
+                generated[item.route_id][1]
+                if item.route_id in generated
+                else "Route not found"
+            ),
+        }
+        for item in items
+    ]
+    if scoring_error:
+        # Reported per item and not stored, so it never counts as a score
+        for i in scorable:
+            results[i]["error"] = scoring_error
+        scorable = []
+    for n, (i, score) in enumerate(zip(scorable, scores)):
+        results[i] = {
+            "route_id": items[i].route_id,
+            "bertscore_f1": score["f1"],
+            "bertscore_precision": score["precision"],
+            "bertscore_recall": score["recall"],
+            "is_equivalent": score["is_equivalent"],
+            "human_sentiment": sentiments[2 * n],
+            "ai_sentiment": sentiments[2 * n + 1],
+        }
+
+    if scorable:
+        await async_neo4j_service.store_evaluations(
+            [(results[i]["route_id"], results[i]) for i in scorable]
+        )
+        await asyncio.to_thread(
+            retrieval_service.index_journals,
+            [(items[i].route_id, items[i].human_journal) for i in scorable],
+        )
+
+    return results
+
+
+async def evaluate_many(items, batch_size: int = None):
+    """
+    Async generator evaluating an iterable of EvaluationCreate items in batches,
+    yielding one result dict per item in input order.
+    """
+    batch_size = batch_size or settings.BULK_EVALUATION_BATCH_SIZE
+    batch = []
+    for item in items:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            for result in await evaluate_batch(batch):
+                yield result
+            batch = []
+    if batch:
+        for result in await evaluate_batch(batch):
+            yield result
+
+
+async def cohort_statistics(results: list[dict]) -> dict:
+    """
+    Run the statistical tests over the F1 scores of successful evaluations.
+    """
+    f1_scores = [r["bertscore_f1"] for r in results if "error" not in r]
+    return await eval_service.arun_statistical_tests(f1_scores)
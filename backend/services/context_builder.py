@@ -0,0 +1,183 @@
+import math
+
+from utils.config import settings
+from utils.geo import haversine_m
+from utils.sentiment import score_text
+
+# Rough characters-per-token ratio for English prose under Llama tokenizers;
+# close enough to budget against without loading a tokenizer
+CHARS_PER_TOKEN = 4
+TRIMMED_POIS_PER_CLUSTER = 2
+
+
+def estimate_tokens(text: str) -> int:
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _cluster(waypoints, route_pois, radius_m: float):
+    """
+    Group consecutive waypoints lying within radius_m of the first waypoint
+    of their group.
+    """
+    clusters = []
+    for wp, pois in zip(waypoints, route_pois):
+        current = clusters[-1] if clusters else None
+        if current and (
+            haversine_m(
+                current["anchor"]["latitude"],
+                current["anchor"]["longitude"],
+                wp["latitude"],
+                wp["longitude"],
+            )
+            <= radius_m
+        ):
+            current["waypoints"].append(wp)
+            current["pois"].extend(pois)
+        else:
+            clusters.append({"anchor": wp, "waypoints": [wp], "pois": list(pois)})
+    return clusters
+
+
+def _note_strength(wp) -> float:
+    sentiment = wp.get("sentiment")
+    if sentiment is None:
+        sentiment = score_text(wp.get("text_note")) or 0.0
+    return abs(sentiment)
+
+
+def _prepare(clusters, max_pois: int):
+    """
+    Reduce clusters to renderable blocks: their notes with sentiment strength,
+    and POI labels not already mentioned by an earlier block.
+    """
+    seen = set()
+    blocks = []
+    for index, cluster in enumerate(clusters):
+        members = cluster["waypoints"]
+        labels = []
+        for poi in cluster["pois"]:
+            key = (poi["name"], poi["type"])
+            if key in seen:
+                continue
+            seen.add(key)
+            labels.append(f"{poi['name']} ({poi['type']})")
+        blocks.append(
+            {
+                "index": index,
+                "latitude": sum(wp["latitude"] for wp in members) / len(members),
+                "longitude": sum(wp["longitude"] for wp in members) / len(members),
+                "size": len(members),
+                "notes": [
+                    (wp["text_note"], _note_strength(wp))
+                    for wp in members
+                    if wp.get("text_note")
+                ],
+                "pois": labels[:max_pois],
+            }
+        )
+    return blocks
+
+
+def _render(block) -> str:
+    if block.get("journal"):
+        return f"Another walker's journal from a similar walk:\n{block['journal']}\n"
+    if block["size"] == 1:
+        text = f"Waypoint at ({block['latitude']}, {block['longitude']}):\n"
+    else:
+        text = (
+            f"{block['size']} waypoints around "
+            f"({block['latitude']:.5f}, {block['longitude']:.5f}):\n"
+        )
+    for note, _ in block["notes"]:
+        text += f"- User Note: {note}\n"
+    if block["pois"]:
+        text += f"- Nearby Features: {', '.join(block['pois'])}\n"
+    return text
+
+
+def _trim(blocks, budget: int):
+    """
+    Drop content until the blocks fit the token budget, least informative
+    first: bare locations and related journals, then surplus POIs, then notes
+    with the weakest sentiment. A block that loses its last note is dropped
+    with its POIs, and blocks holding only POIs go last.
+    """
+    tokens = {b["index"]: estimate_tokens(_render(b)) for b in blocks}
+    live = {b["index"]: b for b in blocks}
+
+    def total():
+        return sum(tokens.values())
+
+    def drop(index):
+        del live[index]
+        del tokens[index]
+
+    for block in blocks:
+        if total() <= budget:
+            return list(live.values())
+        if not block["notes"] and not block["pois"]:
+            drop(block["index"])
+
+    for block in blocks:
+        if total() <= budget:
+            return list(live.values())
+        if block["index"] in live and len(block["pois"]) > TRIMMED_POIS_PER_CLUSTER:
+            block["pois"] = block["pois"][:TRIMMED_POIS_PER_CLUSTER]
+            tokens[block["index"]] = estimate_tokens(_render(block))
+
+    notes = sorted(
+        (
+            (note[1], block["index"], note)
+            for block in live.values()
+            for note in block["notes"]
+        ),
+        key=lambda n: n[0],
+    )
+    for _, index, note in notes:
+        if total() <= budget:
+            break
+        block = live[index]
+        block["notes"].remove(note)
+        if not block["notes"]:
+            drop(index)
+        else:
+            tokens[index] = estimate_tokens(_render(block))
+
+    for index in [i for i, block in live.items() if not block["notes"]]:
+        if total() <= budget:
+            break
+        drop(index)
+    return list(live.values())
+
+
+def build_context(
+    waypoints, route_pois, budget: int = None, retriever=None, route_id: str = None
+) -> tuple[str, dict]:
+    """
+    Render waypoints and their POIs as prompt context within a token budget.
+
+    Consecutive waypoints within CONTEXT_CLUSTER_RADIUS_M are merged into one
+    block and POIs already mentioned earlier on the walk are not repeated.
+    With a retriever (see services.retrieval), each block keeps its most
+    relevant POIs, and related journals are appended.
+    Returns (context, info) where info has the estimated token counts.
+    """
+    budget = budget or settings.LLM_CONTEXT_TOKEN_BUDGET
+    clusters = _cluster(waypoints, route_pois, settings.CONTEXT_CLUSTER_RADIUS_M)
+    journals = retriever.rank_segments(clusters, route_id) if retriever else []
+    blocks = _prepare(clusters, settings.CONTEXT_MAX_POIS_PER_WAYPOINT)
+    blocks += [
+        {"index": len(blocks) + i, "journal": text, "notes": [], "pois": []}
+        for i, text in enumerate(journals)
+    ]
+    full = "\n".join(_render(b) for b in blocks)
+    kept = _trim(blocks, budget)
+    context = "\n".join(_render(b) for b in kept)
+    info = {
+        "waypoints": len(waypoints),
+        "blocks": len(kept),
+        "journals": sum(1 for b in kept if b.get("journal")),
+        "estimated_tokens": estimate_tokens(context),
+        "untrimmed_tokens": estimate_tokens(full),
+    }
+    return context, info
@@ -0,0 +1,131 @@
+import asyncio
+
+from services.neo4j_service import async_neo4j_service
+from utils.config import settings
+from utils.logger import logger
+from utils.metrics import registry
+from utils.osm_client import async_osm_client
+
+POI_ENRICHMENT = registry.counter(
+    "poi_enrichment_waypoints_total",
+    "Waypoints handled by POI enrichment by result.",
+    ["result"],
+)
+
+
+class POIEnrichmentService:
+    """
+    Background linking of waypoints to nearby POIs.
+
+    Stored waypoints are queued and worker tasks drain the queue in batches,
+    so each batch costs at most one Overpass lookup (fewer with the tile
+    cache). Results are written to the graph as (:Waypoint)-[:NEAR]->(:POI),
+    which turns POI lookup at generation time into a graph read. Waypoints
+    that were dropped or failed are enriched on demand by enrich_missing.
+    """
+
+    def __init__(self, workers: int, queue_size: int, batch_size: int):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self._queue = None
+        self._tasks = []
+
+    async def start(self):
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} POI enrichment workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+        self._queue = None
+
+    @property
+    def queue_depth(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    def submit(self, waypoints):
+        """
+        Queue stored waypoints for enrichment. Waypoints that do not fit are
+        dropped and picked up when their route is next generated.
+        """
+        if self._queue is None:
+            return
+        for wp in waypoints:
+            try:
+                self._queue.put_nowait(
+                    {
+                        "id": wp["id"],
+                        "latitude": wp["latitude"],
+                        "longitude": wp["longitude"],
+                    }
+                )
+            except asyncio.QueueFull:
+                POI_ENRICHMENT.inc(result="dropped")
+
+    async def enrich(self, waypoints):
+        """
+        Look up POIs for waypoints and link them in the graph. Returns the
+        POIs per waypoint; waypoints whose lookup failed get an empty list and
+        are left unenriched so they are retried later.
+        """
+        found = await async_osm_client.query_route_pois(
+            [(wp["latitude"], wp["longitude"]) for wp in waypoints],
+            settings.POI_RADIUS_M,
+            require_complete=True,
+        )
+        complete = [
+            (wp, pois) for wp, pois in zip(waypoints, found) if pois is not None
+        ]
+        if complete:
+            await async_neo4j_service.store_waypoint_pois(*zip(*complete))
+        POI_ENRICHMENT.inc(len(complete), result="enriched")
+        POI_ENRICHMENT.inc(len(waypoints) - len(complete), result="failed")
+        return [pois or [] for pois in found]
+
+    async def enrich_missing(self, waypoints):
+        """
+        POIs per waypoint for context building: the linked POIs for enriched
+        waypoints, with any not yet enriched looked up (and stored) now.
+        """
+        pending = [wp for wp in waypoints if wp.get("pois_enriched_at") is None]
+        if pending:
+            logger.info(f"Enriching {len(pending)} waypoints on demand")
+            try:
+                for wp, pois in zip(pending, await self.enrich(pending)):
+                    wp["pois"] = pois
+            except Exception as e:
+                logger.error(f"On-demand POI enrichment failed: {e}")
+        return [wp.get("pois") or [] for wp in waypoints]
+
+    async def _worker(self, index: int):
+        while True:
+            batch = [await self._queue.get()]
+            while len(batch) < self.batch_size and not self._queue.empty():
+                batch.append(self._queue.get_nowait())
+            try:
+                await self.enrich(batch)
+            except Exception as e:
+                logger.error(f"POI enrichment of {len(batch)} waypoints failed: {e}")
+                POI_ENRICHMENT.inc(len(batch), result="failed")
+            finally:
+                for _ in batch:
+                    self._queue.task_done()
+
+
+poi_enrichment_service = POIEnrichmentService(
+    workers=settings.POI_ENRICHMENT_WORKERS,
+    queue_size=settings.POI_ENRICHMENT_QUEUE_SIZE,
+    batch_size=settings.POI_ENRICHMENT_BATCH_SIZE,
+)
+
+registry.gauge(
+    "poi_enrichment_queue_depth",
+    "Waypoints waiting for POI enrichment.",
+    callback=lambda: poi_enrichment_service.queue_depth,
+)
@@ -1,83 +1,426 @@
+import asyncio
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
 import numpy as np
-from bert_score import score
-from scipy import stats
-from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
 
+from services.scoring_client import ScoringError, remote_scorer
 from utils.config import settings
+from utils.cpu import available_cores
 from utils.logger import logger
+from utils.metrics import time_stage, timed
+from utils.sentiment import get_analyzer
+
+
+EQUIVALENCE_THRESHOLD = 0.85
+
+
+class ScoringUnavailableError(Exception):
+    """
+    BERTScore could not be computed: the scorer failed, timed out, or is
+    unreachable or still loading its model. Callers must not store an
+    evaluation without its score.
+    """
+
+    retry_after = 10
+
+
+def _load_scorer():
+    # Deferred so importing this module does not load torch
+    from bert_score import BERTScorer
+
+    logger.info(f"Loading BERTScore model {settings.BERTSCORE_MODEL}")
+    return BERTScorer(
+        model_type=settings.BERTSCORE_MODEL,
+        lang="en",
+        batch_size=settings.BERTSCORE_BATCH_SIZE,
+        device="cpu",  # Also set `export PYTORCH_ENABLE_MPS_FALLBACK=1` in terminal before running the app
+    )
+
+
+def _score_pairs(scorer, pairs: list[tuple[str, str]]) -> list[dict]:
+    P, R, F1 = scorer.score(
+        [ai for ai, _ in pairs],
+        [human for _, human in pairs],
+        verbose=False,
+    )
+    return [
+        {
+            "precision": float(p),
+            "recall": float(r),
+            "f1": float(f1),
+            "is_equivalent": float(f1) >= EQUIVALENCE_THRESHOLD,
+        }
+        for p, r, f1 in zip(P.tolist(), R.tolist(), F1.tolist())
+    ]
+
+
+def _sentiment(text: str) -> float:
+    try:
+        return get_analyzer().polarity_scores(text)["compound"]
+    except Exception as e:
+        logger.error(f"Sentiment calculation failed: {e}")
+        return 0.0
+
+
+def _sentiments(texts: list[str]) -> list[float]:
+    return [_sentiment(text) for text in texts]
+
+
+def _statistical_tests(f1_scores: list[float], threshold: float) -> dict:
+    if len(f1_scores) < 3:
+        return {"error": "Not enough samples for statistical testing"}
+
+    from scipy import stats
+
+    # Normality check
+    stat, p_val_norm = stats.shapiro(f1_scores)
+    is_normal = bool(p_val_norm > 0.05)
+
+    if is_normal:
+        # One-sample T-test
+        t_stat, p_val = stats.ttest_1samp(f1_scores, threshold, alternative="greater")
+        test_name = "One-Sample T-Test"
+    else:
+        # Wilcoxon Signed-Rank Test
+        adjusted = [x - threshold for x in f1_scores]
+        res = stats.wilcoxon(adjusted, alternative="greater")
+        t_stat, p_val = res.statistic, res.pvalue
+        test_name = "Wilcoxon Signed-Rank Test"
+
+    return {
+        "test_name": test_name,
+        "is_normal": is_normal,
+        "statistic": float(t_stat),
+        "p_value": float(p_val),
+        "reject_h0": bool(p_val < 0.05),
+        "mean": float(np.mean(f1_scores)),
+        "std": float(np.std(f1_scores)),
+    }
+
+
+# Scoring pool worker side: each worker process holds its own scorer
+_worker_scorer = None
+
+
+def _init_worker(torch_threads: int):
+    try:
+        import torch
+    except ImportError:
+        return
+    torch.set_num_threads(torch_threads)
+
+
+def _worker_score(pairs: list[tuple[str, str]]) -> list[dict]:
+    global _worker_scorer
+    if _worker_scorer is None:
+        _worker_scorer = _load_scorer()
+    return _score_pairs(_worker_scorer, pairs)
+
+
+class ScoringExecutor:
+    """
+    Runs CPU-bound scoring off the event loop.
+
+    Once started with processes > 0, work goes to a pool of worker processes
+    (spawned, so they inherit none of the API process's threads). Each loads
+    the BERTScore model once, on first use, and is capped at torch_threads
+    torch threads so the pool as a whole does not oversubscribe the cores.
+    Otherwise work runs on threads in this process.
+    """
+
+    def __init__(self, processes: int, torch_threads: int = 0):
+        self.processes = processes
+        self.torch_threads = torch_threads or max(
+            1, available_cores() // max(1, processes)
+        )
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pooled(self) -> bool:
+        return self._pool is not None
+
+    def start(self):
+        with self._lock:
+            if self.processes > 0 and self._pool is None:
+                self._pool = self._create_pool()
+                logger.info(
+                    f"Scoring pool: {self.processes} processes, "
+                    f"{self.torch_threads} torch threads each"
+                )
+
+    def _create_pool(self):
+        return ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.torch_threads,),
+        )
+
+    def _submit(self, fn, *args):
+        with self._lock:
+            try:
+                return self._pool.submit(fn, *args)
+            except BrokenProcessPool:
+                # A worker died (e.g. killed for memory); calls already in
+                # flight fail, later ones go to a fresh pool
+                logger.error("Scoring pool broken, restarting it")
+                self._pool.shutdown(wait=False, cancel_futures=True)
+                self._pool = self._create_pool()
+                return self._pool.submit(fn, *args)
+
+    async def run(self, fn, *args):
+        if self._pool is None:
+            return await asyncio.to_thread(fn, *args)
+        return await asyncio.wrap_future(self._submit(fn, *args))
+
+    def run_sync(self, fn, *args):
+        if self._pool is None:
+            return fn(*args)
+        return self._submit(fn, *args).result()
+
+    def warm_up(self):
+        """
+        Load the model in every worker. Workers are spawned on demand, so one
+        slow task per worker brings up the whole pool.
+        """
+        futures = [
+            self._submit(_worker_score, [("warm up", "warm up")])
+            for _ in range(self.processes)
+        ]
+        for future in futures:
+            future.result()
+
+    async def stop(self):
+        """
+        Let running tasks finish, cancel queued ones and shut the workers down.
+        """
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+
+class BertScoreBatcher:
+    """
+    Groups concurrent BERTScore requests into a single forward pass.
+
+    The first queued pair opens a batch that collects further pairs for up to
+    BERTSCORE_BATCH_WINDOW_MS (or BERTSCORE_MAX_BATCH pairs), then the whole
+    batch is scored in one call off the event loop. Up to `concurrency`
+    batches are scored at once (one per scoring process); further requests
+    keep collecting into the next batch meanwhile.
+    """
+
+    def __init__(self, service, max_batch: int, window_ms: int, concurrency: int = 1):
+        self.service = service
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self.concurrency = concurrency
+        self._queue = None
+        self._task = None
+        self._batches = set()
+
+    async def start(self):
+        self._queue = asyncio.Queue()
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._batches:
+            await asyncio.gather(*self._batches, return_exceptions=True)
+
+    async def score(self, ai_travelogue: str, human_journal: str) -> dict:
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put(((ai_travelogue, human_journal), future))
+        return await future
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        slots = asyncio.Semaphore(self.concurrency)
+        while True:
+            await slots.acquire()
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._score(batch))
+            self._batches.add(task)
+            task.add_done_callback(self._batches.discard)
+            task.add_done_callback(lambda _: slots.release())
+
+    async def _score(self, batch):
+        try:
+            results = await self.service.acalculate_bertscore_batch(
+                [pair for pair, _ in batch]
+            )
+        except ScoringUnavailableError as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(batch, results):
+            if not future.done():
+                future.set_result(result)
 
 
 class EvaluationService:
     def __init__(self):
-        self.analyzer = SentimentIntensityAnalyzer()
+        self._scorer = None
+        self._scorer_lock = threading.Lock()
+        self.executor = ScoringExecutor(
+            settings.SCORING_PROCESSES, settings.SCORING_TORCH_THREADS
+        )
+        self.batcher = BertScoreBatcher(
+            self,
+            max_batch=settings.BERTSCORE_MAX_BATCH,
+            window_ms=settings.BERTSCORE_BATCH_WINDOW_MS,
+            concurrency=max(1, settings.SCORING_PROCESSES),
+        )
+
+    @property
+    def scorer(self):
+        """
+        Long-lived in-process BERTScorer, used when there is no scoring pool;
+        the model and tokenizer are loaded once.
+        """
+        if self._scorer is None:
+            with self._scorer_lock:
+                if self._scorer is None:
+                    self._scorer = _load_scorer()
+        return self._scorer
+
+    async def start(self):
+        # With a shared scoring process BERTScore runs there, and VADER and
+        # the statistical tests are light enough for threads
+        if not remote_scorer():
+            self.executor.start()
+        await self.batcher.start()
+
+    def warm_up(self):
+        """
+        Load the model and run one tiny pass so the first request does not
+        pay for model loading or first-call kernel setup. With a shared
+        scoring process, only check that it is reachable.
+        """
+        client = remote_scorer()
+        if client:
+            client.call_sync("ping")
+        elif self.executor.pooled:
+            self.executor.warm_up()
+        else:
+            self.scorer.score(["warm up"], ["warm up"], verbose=False)
+
+    async def stop(self):
+        await self.batcher.stop()
+        await self.executor.stop()
+
+    @timed("bertscore", "batch")
+    def calculate_bertscore_batch(self, pairs: list[tuple[str, str]]) -> list[dict]:
+        """
+        Calculate BERTScore for many (ai_travelogue, human_journal) pairs in one pass
+        """
+        if not pairs:
+            return []
+        try:
+            client = remote_scorer()
+            if client:
+                return client.call_sync("bertscore", pairs=pairs)
+            if self.executor.pooled:
+                return self.executor.run_sync(_worker_score, pairs)
+            return _score_pairs(self.scorer, pairs)
+        except Exception as e:
+            logger.error(f"BERTScore calculation failed: {e}")
+            raise ScoringUnavailableError(f"BERTScore calculation failed: {e}") from e
+
+    async def acalculate_bertscore_batch(
+        self, pairs: list[tuple[str, str]]
+    ) -> list[dict]:
+        """
+        Calculate BERTScore for many pairs in one pass, off the event loop
+        """
+        client = remote_scorer()
+        if client is None and not self.executor.pooled:
+            return await asyncio.to_thread(self.calculate_bertscore_batch, pairs)
+        if not pairs:
+            return []
+        with time_stage("bertscore", "batch"):
+            try:
+                if client:
+                    return await client.call("bertscore", pairs=pairs)
+                return await self.executor.run(_worker_score, pairs)
+            except Exception as e:
+                logger.error(f"BERTScore calculation failed: {e}")
+                raise ScoringUnavailableError(
+                    f"BERTScore calculation failed: {e}"
+                ) from e
 
     def calculate_bertscore(self, ai_travelogue: str, human_journal: str):
         """
         Calculate BERTScore F1 value
         """
+        return self.calculate_bertscore_batch([(ai_travelogue, human_journal)])[0]
+
+    async def acalculate_bertscore(self, ai_travelogue: str, human_journal: str):
+        """
+        Calculate BERTScore via the micro-batching queue (the shared scoring
+        process's queue when there is one)
+        """
+        client = remote_scorer()
+        if client is None:
+            return await self.batcher.score(ai_travelogue, human_journal)
         try:
-            P, R, F1 = score(
-                [ai_travelogue],
-                [human_journal],
-                lang="en",
-                model_type=settings.BERTSCORE_MODEL,
-                verbose=False,
-                device="cpu",  # Also set `export PYTORCH_ENABLE_MPS_FALLBACK=1` in terminal before running the app
+            scores = await client.call(
+                "bertscore", pairs=[(ai_travelogue, human_journal)]
             )
-            return {
-                "precision": float(P[0].item()),
-                "recall": float(R[0].item()),
-                "f1": float(F1[0].item()),
-                "is_equivalent": F1[0].item() >= 0.85,
-            }
-        except Exception as e:
+            return scores[0]
+        except ScoringError as e:
             logger.error(f"BERTScore calculation failed: {e}")
-            return {"precision": 0, "recall": 0, "f1": 0, "is_equivalent": False}
+            raise ScoringUnavailableError(f"BERTScore calculation failed: {e}") from e
 
+    @timed("vader", "evaluation")
     def calculate_sentiment(self, text: str) -> float:
         """
         Calculate VADER compound sentiment score.
         """
-        try:
-            scores = self.analyzer.polarity_scores(text)
-            return scores["compound"]
-        except Exception as e:
-            logger.error(f"Sentiment calculation failed: {e}")
-            return 0.0
+        return _sentiment(text)
 
-    def run_statistical_tests(self, f1_scores: list[float], threshold: float = 0.85):
+    @timed("vader", "evaluation")
+    async def acalculate_sentiments(self, texts: list[str]) -> list[float]:
         """
-        Run Shapiro-Wilk and T-Test/Wilcoxon.
+        VADER compound sentiment scores for several texts, on the scoring
+        executor.
         """
-        if len(f1_scores) < 3:
-            return {"error": "Not enough samples for statistical testing"}
+        return await self.executor.run(_sentiments, texts)
 
-        # Normality check
-        stat, p_val_norm = stats.shapiro(f1_scores)
-        is_normal = p_val_norm > 0.05
+    def run_statistical_tests(
+        self, f1_scores: list[float], threshold: float = EQUIVALENCE_THRESHOLD
+    ):
+        """
+        Run Shapiro-Wilk and T-Test/Wilcoxon.
+        """
+        return _statistical_tests(f1_scores, threshold)
 
-        if is_normal:
-            # One-sample T-test
-            t_stat, p_val = stats.ttest_1samp(
-                f1_scores, threshold, alternative="greater"
-            )
-            test_name = "One-Sample T-Test"
-        else:
-            # Wilcoxon Signed-Rank Test
-            adjusted = [x - threshold for x in f1_scores]
-            res = stats.wilcoxon(adjusted, alternative="greater")
-            t_stat, p_val = res.statistic, res.pvalue
-            test_name = "Wilcoxon Signed-Rank Test"
-
-        return {
-            "test_name": test_name,
-            "is_normal": is_normal,
-            "statistic": float(t_stat),
-            "p_value": float(p_val),
-            "reject_h0": p_val < 0.05,
-            "mean": float(np.mean(f1_scores)),
-            "std": float(np.std(f1_scores)),
-        }
+    async def arun_statistical_tests(
+        self, f1_scores: list[float], threshold: float = EQUIVALENCE_THRESHOLD
+    ):
+        """
+        Run the statistical tests on the scoring executor.
+        """
+        return await self.executor.run(_statistical_tests, f1_scores, threshold)
 
 
 eval_service = EvaluationService()
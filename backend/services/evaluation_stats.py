@@ -0,0 +1,61 @@
+import numpy as np
+
+from services.eval_service import eval_service
+from services.neo4j_service import async_neo4j_service
+from utils.running_stats import STATS_FIELDS, summarise_stats
+
+
+class EvaluationStatsService:
+    """
+    Cohort-level evaluation statistics.
+
+    Unfiltered requests are answered from the running aggregates that
+    AsyncNeo4jService maintains on every evaluation write (medians are read
+    from their fixed-bin histograms). The statistical tests need the raw F1
+    scores, so they are only recomputed when the evaluation count changes.
+    Filtered requests project just the scored properties of the matching
+    evaluations.
+    """
+
+    def __init__(self):
+        self._tests_cache = (None, None)
+
+    async def get_statistics(self, **filters) -> dict:
+        if any(value is not None for value in filters.values()):
+            return await self._filtered_statistics(filters)
+
+        summary = summarise_stats(await async_neo4j_service.get_evaluation_stats())
+        count, tests = self._tests_cache
+        if count != summary["count"]:
+            rows = await async_neo4j_service.get_evaluation_values()
+            f1_scores = [row["bertscore_f1"] for row in rows]
+            tests = await eval_service.arun_statistical_tests(f1_scores)
+            self._tests_cache = (summary["count"], tests)
+        summary["statistical_tests"] = tests
+        return summary
+
+    async def _filtered_statistics(self, filters: dict) -> dict:
+        rows = await async_neo4j_service.get_evaluation_values(**filters)
+        count = len(rows)
+        summary = {
+            "count": count,
+            "equivalence_rate": (
+                sum(1 for row in rows if row["is_equivalent"]) / count
+                if count
+                else None
+            ),
+        }
+        for field in STATS_FIELDS:
+            values = np.array([row[field] for row in rows], dtype=float)
+            summary[field] = {
+                "mean": float(values.mean()) if count else None,
+                "std": float(values.std()) if count else None,
+                "median": float(np.median(values)) if count else None,
+            }
+        summary["statistical_tests"] = await eval_service.arun_statistical_tests(
+            [row["bertscore_f1"] for row in rows]
+        )
+        return summary
+
+
+evaluation_stats_service = EvaluationStatsService()
@@ -0,0 +1,386 @@
+import asyncio
+import fcntl
+import json
+import os
+import sqlite3
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from services.llm_scheduler import LLMBusyError, Priority
+from services.rag_service import GenerationError, rag_service
+from utils.config import settings
+from utils.logger import logger
+from utils.metrics import registry
+from utils.sqlite import connect_shared
+
+
+JOB_TIMESTAMPS = ("created_at", "started_at", "finished_at")
+
+
+class QueueFullError(Exception):
+    pass
+
+
+class JobStore:
+    """
+    Generation job records in a SQLite file shared by the API worker
+    processes, so a job can be polled through any worker whichever one runs
+    it. A partial unique index allows one queued or running job per route.
+
+    Each job records the instance token of the process that queued it. A
+    process holds an flock on a file named after its token for as long as it
+    lives, so an exited owner is detected even after its PID has been reused
+    (a container restart starts workers with the same low PIDs).
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.owner = uuid.uuid4().hex
+        # An in-memory store is private to this process, so it needs no
+        # owner files
+        self._owners_dir = None if path == ":memory:" else f"{path}.owners"
+        self._owner_file = None
+        self._lock = threading.Lock()
+        self._conn = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """
+        The shared connection, opened (and this process' owner lock claimed)
+        on first use so that importing the module touches no files. Called
+        with self._lock held.
+        """
+        if self._conn is not None:
+            return self._conn
+        conn = connect_shared(self.path)
+        conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS generation_jobs (
+                id TEXT PRIMARY KEY,
+                route_id TEXT NOT NULL,
+                status TEXT NOT NULL,
+                pid INTEGER NOT NULL,
+                owner TEXT,
+                created_at TEXT NOT NULL,
+                finished_at TEXT,
+                job TEXT NOT NULL
+            );
+            CREATE UNIQUE INDEX IF NOT EXISTS generation_jobs_active_route
+                ON generation_jobs (route_id)
+                WHERE status IN ('queued', 'running');
+            CREATE INDEX IF NOT EXISTS generation_jobs_created_at
+                ON generation_jobs (created_at);
+            """
+        )
+        columns = {row[1] for row in conn.execute("PRAGMA table_info(generation_jobs)")}
+        if "owner" not in columns:
+            try:
+                conn.execute("ALTER TABLE generation_jobs ADD COLUMN owner TEXT")
+            except sqlite3.OperationalError:
+                pass  # Added by another worker in the meantime
+        self._owner_file = self._claim_owner()
+        self._conn = conn
+        return conn
+
+    def _claim_owner(self):
+        if self._owners_dir is None:
+            return None
+        # Locked before it is renamed into place, so a sweep in another
+        # process never sees it unlocked
+        os.makedirs(self._owners_dir, exist_ok=True)
+        path = os.path.join(self._owners_dir, f"{self.owner}.lock")
+        owner_file = open(f"{path}.new", "w")
+        fcntl.flock(owner_file, fcntl.LOCK_EX)
+        os.rename(f"{path}.new", path)
+        return owner_file
+
+    def _live_owners(self) -> set:
+        """
+        Tokens of processes that still hold their owner lock. Lock files
+        left by exited processes are removed.
+        """
+        if self._owners_dir is None:
+            return {self.owner}
+        live = set()
+        for name in os.listdir(self._owners_dir):
+            if not name.endswith(".lock"):
+                continue
+            path = os.path.join(self._owners_dir, name)
+            try:
+                fd = os.open(path, os.O_RDONLY)
+            except FileNotFoundError:
+                continue
+            try:
+                fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                live.add(name.removesuffix(".lock"))
+            else:
+                os.unlink(path)
+            finally:
+                os.close(fd)
+        return live
+
+    def _dump(self, job) -> str:
+        return json.dumps(
+            {
+                key: value.isoformat() if isinstance(value, datetime) else value
+                for key, value in job.items()
+            }
+        )
+
+    def _load(self, row):
+        if row is None:
+            return None
+        job = json.loads(row[0])
+        for key in JOB_TIMESTAMPS:
+            if job[key]:
+                job[key] = datetime.fromisoformat(job[key])
+        return job
+
+    def _finished_at(self, job):
+        return job["finished_at"].isoformat() if job["finished_at"] else None
+
+    def insert(self, job):
+        """
+        Store a new job. Returns (job, True), or (active job, False) if the
+        route already has a queued or running job.
+        """
+        with self._lock:
+            try:
+                with self._connection() as conn:
+                    conn.execute(
+                        "INSERT INTO generation_jobs "
+                        "(id, route_id, status, pid, owner, created_at, job) "
+                        "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                        (
+                            job["id"],
+                            job["route_id"],
+                            job["status"],
+                            os.getpid(),
+                            self.owner,
+                            job["created_at"].isoformat(),
+                            self._dump(job),
+                        ),
+                    )
+                return job, True
+            except sqlite3.IntegrityError:
+                row = self._connection().execute(
+                    "SELECT job FROM generation_jobs "
+                    "WHERE route_id = ? AND status IN ('queued', 'running')",
+                    (job["route_id"],),
+                ).fetchone()
+        active = self._load(row)
+        # The active job may have finished in between; try again
+        return (active, False) if active else self.insert(job)
+
+    def save(self, job):
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "UPDATE generation_jobs SET status = ?, finished_at = ?, job = ? "
+                "WHERE id = ?",
+                (job["status"], self._finished_at(job), self._dump(job), job["id"]),
+            )
+
+    def delete(self, job_id: str):
+        with self._lock, self._connection() as conn:
+            conn.execute("DELETE FROM generation_jobs WHERE id = ?", (job_id,))
+
+    def get(self, job_id: str):
+        with self._lock:
+            row = self._connection().execute(
+                "SELECT job FROM generation_jobs WHERE id = ?", (job_id,)
+            ).fetchone()
+        return self._load(row)
+
+    def list(self, route_id: str = None):
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT job FROM generation_jobs "
+                "WHERE ? IS NULL OR route_id = ? ORDER BY created_at DESC",
+                (route_id, route_id),
+            ).fetchall()
+        return [self._load(row) for row in rows]
+
+    def counts(self) -> dict:
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT status, COUNT(*) FROM generation_jobs GROUP BY status"
+            ).fetchall()
+        return dict(rows)
+
+    def prune(self, cutoff: datetime):
+        with self._lock, self._connection() as conn:
+            conn.execute(
+                "DELETE FROM generation_jobs "
+                "WHERE finished_at IS NOT NULL AND finished_at < ?",
+                (cutoff.isoformat(),),
+            )
+
+    def fail_orphans(self) -> int:
+        """
+        Fail queued or running jobs whose worker process has exited, so their
+        routes can be submitted again.
+        """
+        with self._lock:
+            rows = self._connection().execute(
+                "SELECT job, owner FROM generation_jobs "
+                "WHERE status IN ('queued', 'running')"
+            ).fetchall()
+        # Swept after the read: an owner of a row read above had claimed its
+        # lock file before inserting, so it is seen here unless it exited
+        live = self._live_owners()
+        orphans = [self._load(row) for row in rows if row[1] not in live]
+        for job in orphans:
+            job["status"] = "failed"
+            job["error"] = "Worker exited before the job finished"
+            job["finished_at"] = datetime.utcnow()
+            self.save(job)
+        return len(orphans)
+
+
+class GenerationJobService:
+    """
+    Queue of travelogue generation jobs.
+
+    A fixed pool of worker tasks drains a bounded asyncio queue, so at most
+    GENERATION_WORKERS LLM generations run at once per process. Job records
+    live in a JobStore shared between processes. Submitting a route that
+    already has a queued or running job returns that job instead of a new one.
+    """
+
+    def __init__(self, workers: int, queue_size: int, store: JobStore):
+        self.workers = workers
+        self.queue_size = queue_size
+        self.store = store
+        self._queue = None
+        self._tasks = []
+        # Store calls may wait on other workers' SQLite locks, so they run off
+        # the event loop; one thread keeps a job's progress writes in order
+        self._store_thread = ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="job-store"
+        )
+
+    def _store(self, fn, *args):
+        return asyncio.get_running_loop().run_in_executor(
+            self._store_thread, fn, *args
+        )
+
+    async def start(self):
+        orphans = await self._store(self.store.fail_orphans)
+        if orphans:
+            logger.warning(f"Failed {orphans} generation jobs left by exited workers")
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._tasks = [
+            asyncio.create_task(self._worker(i)) for i in range(self.workers)
+        ]
+        logger.info(f"Started {self.workers} generation workers")
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def submit(self, route_id: str):
+        """
+        Queue a generation job for a route. Returns (job, created).
+        """
+        await self._prune()
+        job = {
+            "id": str(uuid.uuid4()),
+            "route_id": route_id,
+            "status": "queued",
+            "stage": "queued",
+            "progress": 0.0,
+            "travelogue": None,
+            "error": None,
+            "created_at": datetime.utcnow(),
+            "started_at": None,
+            "finished_at": None,
+        }
+        job, created = await self._store(self.store.insert, job)
+        if not created:
+            return job, False
+        try:
+            self._queue.put_nowait(job["id"])
+        except asyncio.QueueFull:
+            await self._store(self.store.delete, job["id"])
+            raise QueueFullError("Generation queue is full")
+        return job, True
+
+    async def get(self, job_id: str):
+        return await self._store(self.store.get, job_id)
+
+    async def list_jobs(self, route_id: str = None):
+        return await self._store(self.store.list, route_id)
+
+    async def _prune(self):
+        """
+        Forget finished jobs older than the retention window.
+        """
+        await self._store(
+            self.store.prune,
+            datetime.utcnow()
+            - timedelta(seconds=settings.GENERATION_JOB_RETENTION_SECONDS),
+        )
+
+    async def _worker(self, index: int):
+        while True:
+            job_id = await self._queue.get()
+            try:
+                job = await self.get(job_id)
+                if job:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job):
+        def progress(stage: str, fraction: float):
+            job["stage"] = stage
+            job["progress"] = fraction
+            # Not awaited; the final save below is queued behind it
+            self._store(self.store.save, dict(job))
+
+        job["status"] = "running"
+        job["started_at"] = datetime.utcnow()
+        await self._store(self.store.save, dict(job))
+        try:
+            while True:
+                try:
+                    job["travelogue"] = await rag_service.run_generation(
+                        job["route_id"],
+                        progress=progress,
+                        priority=Priority.BACKGROUND,
+                    )
+                    break
+                except LLMBusyError as e:
+                    # Background jobs wait for the LLM (possibly busy with
+                    # other workers' generations) instead of failing
+                    await asyncio.sleep(e.retry_after)
+            job["status"] = "completed"
+        except Exception as e:
+            if not isinstance(e, GenerationError):
+                logger.error(f"Generation job {job['id']} crashed: {e}")
+            job["status"] = "failed"
+            job["error"] = str(e)
+        finally:
+            job["finished_at"] = datetime.utcnow()
+            await self._store(self.store.save, dict(job))
+
+
+job_service = GenerationJobService(
+    workers=settings.GENERATION_WORKERS,
+    queue_size=settings.GENERATION_QUEUE_SIZE,
+    store=JobStore(settings.GENERATION_JOB_DB_PATH),
+)
+
+registry.gauge(
+    "generation_jobs",
+    "Retained generation jobs by status, across all workers.",
+    ["status"],
+    callback=lambda: {
+        (status,): job_service.store.counts().get(status, 0)
+        for status in ("queued", "running", "completed", "failed")
+    },
+)
@@ -0,0 +1,270 @@
+import asyncio
+import fcntl
+import heapq
+import itertools
+import math
+import os
+import time
+from contextlib import asynccontextmanager
+from enum import IntEnum
+
+from utils.config import settings
+from utils.logger import logger
+from utils.metrics import registry
+
+QUEUE_WAIT_SECONDS = registry.histogram(
+    "llm_queue_wait_seconds",
+    "Time generations waited for an LLM slot.",
+    ["priority"],
+)
+
+
+class Priority(IntEnum):
+    INTERACTIVE = 0
+    BACKGROUND = 1
+    BULK = 2
+
+
+class LLMBusyError(Exception):
+    def __init__(self, message: str, retry_after: int):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class SharedSlots:
+    """
+    Counting semaphore shared by processes: one lock file per slot in
+    `directory`, held with flock. The kernel drops the lock of a process
+    that dies, so a crashed worker cannot leak a slot. Waiters poll, so there
+    is no ordering between processes.
+    """
+
+    def __init__(self, directory: str, count: int, poll_interval: float = 0.05):
+        os.makedirs(directory, exist_ok=True)
+        self.directory = directory
+        self.count = count
+        self.poll_interval = poll_interval
+        self._files = {}
+        self._held = set()
+
+    def _try_acquire(self):
+        for slot in range(self.count):
+            # flock on a file this process already holds would succeed again
+            if slot in self._held:
+                continue
+            if slot not in self._files:
+                self._files[slot] = open(
+                    os.path.join(self.directory, f"slot-{slot}.lock"), "w"
+                )
+            try:
+                fcntl.flock(self._files[slot], fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                continue
+            self._held.add(slot)
+            return slot
+        return None
+
+    async def acquire(self) -> int:
+        while (slot := self._try_acquire()) is None:
+            await asyncio.sleep(self.poll_interval)
+        return slot
+
+    def release(self, slot: int):
+        self._held.discard(slot)
+        fcntl.flock(self._files[slot], fcntl.LOCK_UN)
+
+
+class LLMScheduler:
+    """
+    Admission control for LLM generations.
+
+    At most max_in_flight generations run at once. Others wait in a bounded
+    queue ordered by priority then arrival, and a finishing generation hands
+    its slot straight to the next waiter. Requests beyond the queue bound, or
+    still waiting after queue_timeout seconds, raise LLMBusyError.
+
+    With `shared` slots, a generation must also hold one of those, so that
+    max_in_flight bounds all worker processes together rather than each.
+    """
+
+    def __init__(
+        self,
+        max_in_flight: int,
+        queue_size: int,
+        queue_timeout: float,
+        shared: SharedSlots = None,
+    ):
+        self.max_in_flight = max_in_flight
+        self.queue_size = queue_size
+        self.queue_timeout = queue_timeout
+        self.shared = shared
+        self.in_flight = 0
+        self._waiters = []
+        self._seq = itertools.count()
+        self._service_time = None
+        self.counters = {
+            "admitted": 0,
+            "rejected": 0,
+            "queue_timeouts": 0,
+            "generation_timeouts": 0,
+            "completed": 0,
+        }
+        self._wait_total = 0.0
+        self._wait_max = 0.0
+
+    @property
+    def queue_depth(self) -> int:
+        return len(self._waiters)
+
+    def is_full(self) -> bool:
+        return self.in_flight >= self.max_in_flight and (
+            self.queue_depth >= self.queue_size
+        )
+
+    def retry_after(self) -> int:
+        """
+        Seconds until a slot is likely to free up, from the recent average
+        generation time and the current queue depth.
+        """
+        if self._service_time is None:
+            return 5
+        waves = (self.queue_depth + 1) / self.max_in_flight
+        return min(max(math.ceil(self._service_time * waves), 1), 300)
+
+    async def acquire(self, priority: Priority = Priority.INTERACTIVE):
+        started = time.monotonic()
+        if self.in_flight < self.max_in_flight and not self._waiters:
+            self.in_flight += 1
+            self._record_wait(0.0, priority)
+            return
+
+        if self.queue_depth >= self.queue_size:
+            self.counters["rejected"] += 1
+            raise LLMBusyError("LLM generation queue is full", self.retry_after())
+
+        future = asyncio.get_running_loop().create_future()
+        entry = (int(priority), next(self._seq), future)
+        heapq.heappush(self._waiters, entry)
+        try:
+            async with asyncio.timeout(self.queue_timeout):
+                await future
+        except BaseException as e:
+            if entry in self._waiters:
+                self._waiters.remove(entry)
+                heapq.heapify(self._waiters)
+            elif future.done() and not future.cancelled():
+                # The slot was handed over just as we gave up; pass it on
+                self.release()
+            if isinstance(e, TimeoutError):
+                self.counters["queue_timeouts"] += 1
+                raise LLMBusyError(
+                    "Timed out waiting for an LLM slot", self.retry_after()
+                ) from e
+            raise
+        self._record_wait(time.monotonic() - started, priority)
+
+    def release(self, service_time: float = None):
+        if service_time is not None:
+            self.counters["completed"] += 1
+            # Exponentially weighted so Retry-After tracks recent load
+            self._service_time = (
+                service_time
+                if self._service_time is None
+                else 0.8 * self._service_time + 0.2 * service_time
+            )
+        while self._waiters:
+            _, _, future = heapq.heappop(self._waiters)
+            if not future.done():
+                future.set_result(None)
+                return
+        self.in_flight -= 1
+
+    @asynccontextmanager
+    async def slot(self, priority: Priority = Priority.INTERACTIVE, timeout=None):
+        """
+        Hold an LLM slot for the body of the block, which is cut off with
+        TimeoutError after `timeout` seconds.
+        """
+        await self.acquire(priority)
+        shared_slot = None
+        if self.shared:
+            try:
+                async with asyncio.timeout(self.queue_timeout):
+                    shared_slot = await self.shared.acquire()
+            except BaseException as e:
+                self.release()
+                if isinstance(e, TimeoutError):
+                    self.counters["queue_timeouts"] += 1
+                    raise LLMBusyError(
+                        "Timed out waiting for an LLM slot", self.retry_after()
+                    ) from e
+                raise
+        started = time.monotonic()
+        try:
+            async with asyncio.timeout(timeout):
+                yield
+        except TimeoutError:
+            self.counters["generation_timeouts"] += 1
+            logger.warning(f"LLM generation timed out after {timeout}s")
+            raise
+        finally:
+            if shared_slot is not None:
+                self.shared.release(shared_slot)
+            self.release(time.monotonic() - started)
+
+    def _record_wait(self, seconds: float, priority: Priority):
+        QUEUE_WAIT_SECONDS.observe(seconds, priority=Priority(priority).name.lower())
+        self.counters["admitted"] += 1
+        self._wait_total += seconds
+        self._wait_max = max(self._wait_max, seconds)
+
+    def stats(self) -> dict:
+        admitted = self.counters["admitted"]
+        return {
+            "max_in_flight": self.max_in_flight,
+            "in_flight": self.in_flight,
+            "queue_size": self.queue_size,
+            "queue_depth": self.queue_depth,
+            "waiting_by_priority": {
+                p.name.lower(): sum(1 for w in self._waiters if w[0] == p)
+                for p in Priority
+            },
+            **self.counters,
+            "avg_wait_seconds": self._wait_total / admitted if admitted else 0.0,
+            "max_wait_seconds": self._wait_max,
+            "avg_generation_seconds": self._service_time,
+        }
+
+
+llm_scheduler = LLMScheduler(
+    max_in_flight=settings.LLM_MAX_IN_FLIGHT,
+    queue_size=settings.LLM_QUEUE_SIZE,
+    queue_timeout=settings.LLM_QUEUE_TIMEOUT,
+    shared=(
+        SharedSlots(settings.LLM_SLOT_DIR, settings.LLM_MAX_IN_FLIGHT)
+        if settings.LLM_SLOT_DIR
+        else None
+    ),
+)
+
+registry.gauge(
+    "llm_in_flight",
+    "LLM generations currently holding a slot.",
+    callback=lambda: llm_scheduler.in_flight,
+)
+registry.gauge(
+    "llm_max_in_flight",
+    "Maximum concurrent LLM generations.",
+    callback=lambda: llm_scheduler.max_in_flight,
+)
+registry.gauge(
+    "llm_queue_depth",
+    "LLM generations waiting for a slot.",
+    callback=lambda: llm_scheduler.queue_depth,
+)
+registry.counter(
+    "llm_scheduler_events_total",
+    "LLM scheduler admissions, rejections, timeouts and completions.",
+    ["event"],
+    callback=lambda: {(name,): value for name, value in llm_scheduler.counters.items()},
+)
@@ -1,21 +1,352 @@
 import uuid
-from datetime import datetime
+from contextlib import asynccontextmanager, contextmanager
+from datetime import datetime, timedelta
 
 import neo4j.time
-from neo4j import GraphDatabase
+from neo4j import AsyncGraphDatabase, GraphDatabase
 
 from utils.config import settings
+from utils.geo import haversine_m
 from utils.logger import logger
+from utils.metrics import instrument, registry
+from utils.sentiment import score_text
+from utils.running_stats import (
+    batch_aggregates,
+    empty_stats_cypher,
+    merge_stats_cypher,
+)
 
+# Each open session holds at most one pooled connection, so this tracks pool
+# usage against neo4j_pool_max_size
+NEO4J_SESSIONS = registry.gauge(
+    "neo4j_sessions_in_use",
+    "Neo4j sessions currently open, by driver.",
+    ["driver"],
+)
 
-class Neo4jService:
-    def __init__(self):
-        self.driver = GraphDatabase.driver(
-            settings.NEO4J_URI, auth=(settings.NEO4J_USER, settings.NEO4J_PASSWORD)
-        )
+CREATE_ROUTE_QUERY = """
+CREATE (r:Route {
+    id: $id,
+    name: $name,
+    start_lat: $start_lat,
+    start_lon: $start_lon,
+    start_location: point({latitude: $start_lat, longitude: $start_lon}),
+    end_lat: $end_lat,
+    end_lon: $end_lon,
+    distance_km: $distance_km,
+    created_at: $created_at,
+    status: 'active'
+})
+RETURN r
+"""
 
-    def close(self):
-        self.driver.close()
+GET_ROUTE_QUERY = "MATCH (r:Route {id: $id}) RETURN r"
+
+STORE_WAYPOINT_QUERY = """
+MATCH (r:Route {id: $route_id})
+CREATE (w:Waypoint {
+    id: $id,
+    latitude: $latitude,
+    longitude: $longitude,
+    location: point({latitude: $latitude, longitude: $longitude}),
+    text_note: $text_note,
+    voice_blob_url: $voice_blob_url,
+    image_url: $image_url,
+    sentiment: $sentiment,
+    stored_at: $stored_at
+})
+CREATE (r)-[:HAS_WAYPOINT]->(w)
+RETURN w
+"""
+
+STORE_WAYPOINTS_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Route {id: row.route_id})
+MERGE (w:Waypoint {idempotency_key: row.idempotency_key})
+ON CREATE SET
+    w.id = row.id,
+    w.latitude = row.latitude,
+    w.longitude = row.longitude,
+    w.location = point({latitude: row.latitude, longitude: row.longitude}),
+    w.text_note = row.text_note,
+    w.voice_blob_url = row.voice_blob_url,
+    w.image_url = row.image_url,
+    w.sentiment = row.sentiment,
+    w.stored_at = row.stored_at
+MERGE (r)-[:HAS_WAYPOINT]->(w)
+RETURN row.index AS index, w, w.id = row.id AS created
+"""
+
+GET_WAYPOINTS_QUERY = """
+MATCH (r:Route {id: $id})-[:HAS_WAYPOINT]->(w:Waypoint)
+RETURN w ORDER BY w.stored_at
+"""
+
+# Route and its ordered waypoints in one round trip, projected to only the
+# properties context building and travelogue caching need, with the POIs
+# linked to each waypoint by enrichment
+ROUTE_CONTEXT_QUERY = """
+MATCH (r:Route {id: $id})
+OPTIONAL MATCH (r)-[:HAS_WAYPOINT]->(w:Waypoint)
+WITH r, w ORDER BY w.stored_at
+WITH r, collect(
+    w {
+        .id, .latitude, .longitude, .text_note, .sentiment, .stored_at,
+        .pois_enriched_at,
+        pois: [(w)-[n:NEAR]->(p:POI) | {
+            id: p.osm_id, name: p.name, type: p.type,
+            lat: p.latitude, lon: p.longitude, distance_m: n.distance_m
+        }]
+    }
+) AS waypoints
+RETURN r {.id, .name, .status, .travelogue, .travelogue_hash} AS route, waypoints
+"""
+
+ROUTE_PROJECTION = (
+    "r {.id, .name, .start_lat, .start_lon, .end_lat, .end_lon, "
+    ".distance_km, .created_at, .status}"
+)
+
+WAYPOINT_PROJECTION = (
+    "w {.id, .latitude, .longitude, .text_note, .voice_blob_url, .image_url, "
+    ".transcription, .sentiment, .stored_at}"
+)
+
+ROUTE_FILTER = """
+WHERE ($status IS NULL OR r.status = $status)
+  AND ($created_after IS NULL OR r.created_at >= $created_after)
+  AND ($created_before IS NULL OR r.created_at < $created_before)
+"""
+
+# Keyset pagination, newest first: the cursor is the (created_at, id) of the
+# last route on the previous page
+LIST_ROUTES_QUERY = f"""
+MATCH (r:Route)
+{ROUTE_FILTER}
+  AND ($cursor_at IS NULL OR r.created_at < $cursor_at
+       OR (r.created_at = $cursor_at AND r.id < $cursor_id))
+RETURN {ROUTE_PROJECTION} AS r
+ORDER BY r.created_at DESC, r.id DESC
+LIMIT $limit
+"""
+
+EXPORT_ROUTES_QUERY = f"""
+MATCH (r:Route)
+{ROUTE_FILTER}
+RETURN {ROUTE_PROJECTION} AS r
+ORDER BY r.created_at
+"""
+
+# Waypoints in walk order. Grouping on r makes a missing route return no row
+# rather than one row with an empty list
+LIST_WAYPOINTS_QUERY = f"""
+MATCH (r:Route {{id: $id}})
+OPTIONAL MATCH (r)-[:HAS_WAYPOINT]->(w:Waypoint)
+WHERE $cursor_at IS NULL OR w.stored_at > $cursor_at
+      OR (w.stored_at = $cursor_at AND w.id > $cursor_id)
+WITH r, w ORDER BY w.stored_at, w.id LIMIT $limit
+RETURN r.id AS route_id, collect({WAYPOINT_PROJECTION}) AS waypoints
+"""
+
+EXPORT_WAYPOINTS_QUERY = f"""
+MATCH (:Route {{id: $id}})-[:HAS_WAYPOINT]->(w:Waypoint)
+RETURN {WAYPOINT_PROJECTION} AS w
+ORDER BY w.stored_at, w.id
+"""
+
+# Spatial queries are answered from the point indexes on Waypoint.location and
+# Route.start_location; distances are in metres
+NEARBY_WAYPOINTS_QUERY = f"""
+WITH point({{latitude: $latitude, longitude: $longitude}}) AS centre
+MATCH (w:Waypoint)
+WHERE point.distance(w.location, centre) <= $radius
+MATCH (r:Route)-[:HAS_WAYPOINT]->(w)
+RETURN {WAYPOINT_PROJECTION} AS w, r.id AS route_id,
+       point.distance(w.location, centre) AS distance_m
+ORDER BY distance_m
+LIMIT $limit
+"""
+
+WAYPOINTS_IN_BBOX_QUERY = f"""
+MATCH (w:Waypoint)
+WHERE point.withinBBox(
+    w.location,
+    point({{latitude: $south, longitude: $west}}),
+    point({{latitude: $north, longitude: $east}})
+)
+MATCH (r:Route)-[:HAS_WAYPOINT]->(w)
+RETURN {WAYPOINT_PROJECTION} AS w, r.id AS route_id, null AS distance_m
+ORDER BY w.stored_at
+LIMIT $limit
+"""
+
+# Routes that started or passed within the radius, nearest approach first
+NEARBY_ROUTES_QUERY = f"""
+WITH point({{latitude: $latitude, longitude: $longitude}}) AS centre
+CALL {{
+    WITH centre
+    MATCH (w:Waypoint)
+    WHERE point.distance(w.location, centre) <= $radius
+    MATCH (r:Route)-[:HAS_WAYPOINT]->(w)
+    RETURN r, point.distance(w.location, centre) AS distance
+    UNION ALL
+    WITH centre
+    MATCH (r:Route)
+    WHERE point.distance(r.start_location, centre) <= $radius
+    RETURN r, point.distance(r.start_location, centre) AS distance
+}}
+WITH r, min(distance) AS distance_m
+RETURN {ROUTE_PROJECTION} AS r, distance_m
+ORDER BY distance_m
+LIMIT $limit
+"""
+
+ROUTES_IN_BBOX_QUERY = f"""
+WITH point({{latitude: $south, longitude: $west}}) AS lower,
+     point({{latitude: $north, longitude: $east}}) AS upper
+CALL {{
+    WITH lower, upper
+    MATCH (w:Waypoint)
+    WHERE point.withinBBox(w.location, lower, upper)
+    MATCH (r:Route)-[:HAS_WAYPOINT]->(w)
+    RETURN r
+    UNION
+    WITH lower, upper
+    MATCH (r:Route)
+    WHERE point.withinBBox(r.start_location, lower, upper)
+    RETURN r
+}}
+RETURN {ROUTE_PROJECTION} AS r, null AS distance_m
+ORDER BY r.created_at DESC
+LIMIT $limit
+"""
+
+STORE_TRAVELOGUE_QUERY = """
+MATCH (r:Route {id: $id})
+SET r.travelogue = $travelogue,
+    r.travelogue_hash = $travelogue_hash,
+    r.travelogue_generated_at = $generated_at
+RETURN r
+"""
+
+STORE_EVALUATIONS_QUERY = """
+UNWIND $rows AS row
+MATCH (r:Route {id: row.route_id})
+CREATE (e:Evaluation {
+    id: row.id,
+    bertscore_f1: row.bertscore_f1,
+    bertscore_precision: row.bertscore_precision,
+    bertscore_recall: row.bertscore_recall,
+    is_equivalent: row.is_equivalent,
+    human_sentiment: row.human_sentiment,
+    ai_sentiment: row.ai_sentiment,
+    created_at: $created_at
+})
+CREATE (r)-[:HAS_EVALUATION]->(e)
+RETURN e
+"""
+
+# Setting (and removing) a property takes the stats node's write lock, held
+# until the transaction commits. Every evaluation write takes it before
+# reading the aggregates, so concurrent writers are serialised and each one
+# sees the previous one's evaluations and aggregates together. A node
+# without a count has just been created here (or was cleared by a migration)
+# and still has to be built from the stored evaluations
+LOCK_EVALUATION_STATS_QUERY = """
+MERGE (s:EvaluationStats {scope: 'all'})
+SET s._lock = true
+REMOVE s._lock
+RETURN s.count IS NOT NULL AS built
+"""
+
+MERGE_EVALUATION_STATS_QUERY = f"""
+MATCH (s:EvaluationStats {{scope: 'all'}})
+WITH s, s.count AS na, s.count + $count AS n
+{merge_stats_cypher()}
+RETURN s
+"""
+
+GET_EVALUATION_STATS_QUERY = (
+    "MATCH (s:EvaluationStats {scope: 'all'}) WHERE s.count IS NOT NULL RETURN s"
+)
+
+RESET_EVALUATION_STATS_QUERY = (
+    f"MATCH (s:EvaluationStats {{scope: 'all'}}) {empty_stats_cypher()} RETURN s"
+)
+
+EVALUATION_VALUES_QUERY = """
+MATCH (r:Route)-[:HAS_EVALUATION]->(e:Evaluation)
+WHERE ($route_id IS NULL OR r.id = $route_id)
+  AND ($route_status IS NULL OR r.status = $route_status)
+  AND ($created_after IS NULL OR e.created_at >= $created_after)
+  AND ($created_before IS NULL OR e.created_at < $created_before)
+RETURN e.bertscore_f1 AS bertscore_f1,
+       e.human_sentiment AS human_sentiment,
+       e.ai_sentiment AS ai_sentiment,
+       e.is_equivalent AS is_equivalent
+"""
+
+
+# A route's per-waypoint sentiment in walk order; scores are stored at write
+# time so the timeline is a single projected read
+SENTIMENT_TIMELINE_QUERY = """
+MATCH (r:Route {id: $id})
+OPTIONAL MATCH (r)-[:HAS_WAYPOINT]->(w:Waypoint)
+WITH r, w ORDER BY w.stored_at
+RETURN r.id AS route_id,
+       collect(w {.id, .latitude, .longitude, .sentiment, .stored_at}) AS points
+"""
+
+# Backfill pages through unscored notes by id so blank notes are never revisited
+UNSCORED_WAYPOINTS_QUERY = """
+MATCH (w:Waypoint)
+WHERE w.text_note IS NOT NULL
+  AND ($rescore OR w.sentiment IS NULL)
+  AND ($after IS NULL OR w.id > $after)
+RETURN w.id AS id, w.text_note AS text_note
+ORDER BY w.id
+LIMIT $limit
+"""
+
+STORE_SENTIMENTS_QUERY = """
+UNWIND $rows AS row
+MATCH (w:Waypoint {id: row.id})
+SET w.sentiment = row.sentiment
+"""
+
+# POIs are shared between waypoints (and routes) by OSM id. The waypoint is
+# marked enriched even when it has no POIs so it is not looked up again
+STORE_WAYPOINT_POIS_QUERY = """
+UNWIND $rows AS row
+MATCH (w:Waypoint {id: row.waypoint_id})
+SET w.pois_enriched_at = $enriched_at
+WITH w, row
+UNWIND row.pois AS poi
+MERGE (p:POI {osm_id: poi.id})
+SET p.name = poi.name,
+    p.type = poi.type,
+    p.latitude = poi.lat,
+    p.longitude = poi.lon,
+    p.location = point({latitude: poi.lat, longitude: poi.lon})
+MERGE (w)-[n:NEAR]->(p)
+SET n.distance_m = poi.distance_m
+"""
+
+
+def _driver_options():
+    return {
+        "auth": (settings.NEO4J_USER, settings.NEO4J_PASSWORD),
+        "max_connection_pool_size": settings.NEO4J_MAX_POOL_SIZE,
+        "connection_acquisition_timeout": settings.NEO4J_ACQUISITION_TIMEOUT,
+        "max_connection_lifetime": settings.NEO4J_MAX_CONNECTION_LIFETIME,
+    }
+
+
+class _Neo4jQueries:
+    """
+    Node formatting and query parameter building shared by the sync and
+    async services.
+    """
 
     def _format_node(self, node):
         if not node:
@@ -26,125 +357,502 @@ class Neo4jService:
                 formatted[key] = value.to_native()
         return formatted
 
-    def create_route(self, route_data):
-        with self.driver.session() as session:
-            route_id = str(uuid.uuid4())
-            query = """
-            CREATE (r:Route {
-                id: $id,
-                name: $name,
-                start_lat: $start_lat,
-                start_lon: $start_lon,
-                end_lat: $end_lat,
-                end_lon: $end_lon,
-                distance_km: $distance_km,
-                created_at: $created_at,
-                status: 'active'
-            })
-            RETURN r
-            """
+    def _format_route_context(self, record):
+        if not record:
+            return None, []
+        waypoints = [self._format_node(wp) for wp in record["waypoints"]]
+        for wp in waypoints:
+            wp["pois"] = sorted(wp.get("pois") or [], key=lambda p: p["distance_m"])
+        return dict(record["route"]), waypoints
+
+    def _format_spatial(self, record, key: str):
+        formatted = self._format_node(record[key])
+        formatted["distance_m"] = record["distance_m"]
+        if "route_id" in record.keys():
+            formatted["route_id"] = record["route_id"]
+        return formatted
+
+    def _route_params(self, route_data):
+        return {
+            "id": str(uuid.uuid4()),
+            "name": route_data.name,
+            "start_lat": route_data.start_lat,
+            "start_lon": route_data.start_lon,
+            "end_lat": route_data.end_lat,
+            "end_lon": route_data.end_lon,
+            "distance_km": route_data.distance_km,
+            "created_at": datetime.utcnow(),
+        }
+
+    def _update_route_query(self, update_fields: dict) -> str:
+        # Build dynamic SET clause based on the input field data
+        set_clauses = ", ".join([f"r.{k} = ${k}" for k in update_fields.keys()])
+        return f"MATCH (r:Route {{id: $id}}) SET {set_clauses} RETURN r"
+
+    def _waypoint_params(self, waypoint_data):
+        return {
+            "route_id": waypoint_data.route_id,
+            "id": str(uuid.uuid4()),
+            "latitude": waypoint_data.latitude,
+            "longitude": waypoint_data.longitude,
+            "text_note": waypoint_data.text_note,
+            "voice_blob_url": waypoint_data.voice_blob_url,
+            "image_url": waypoint_data.image_url,
+            "sentiment": score_text(waypoint_data.text_note),
+            "stored_at": datetime.utcnow(),
+        }
+
+    def _waypoint_rows(self, items: list[tuple[int, object]]):
+        # Waypoints are ordered by stored_at, so offset each row by a
+        # microsecond to keep the upload order within a single batch
+        now = datetime.utcnow()
+        rows = []
+        for offset, (index, waypoint_data) in enumerate(items):
+            row = self._waypoint_params(waypoint_data)
+            row["index"] = index
+            row["stored_at"] = now + timedelta(microseconds=offset)
+            # Keys are scoped to their route so clients only need per-route uniqueness
+            key = waypoint_data.idempotency_key or row["id"]
+            row["idempotency_key"] = f"{waypoint_data.route_id}:{key}"
+            rows.append(row)
+        return rows
+
+    def _poi_rows(self, waypoints, route_pois):
+        return [
+            {
+                "waypoint_id": wp["id"],
+                "pois": [
+                    {
+                        **poi,
+                        "distance_m": haversine_m(
+                            wp["latitude"], wp["longitude"], poi["lat"], poi["lon"]
+                        ),
+                    }
+                    for poi in pois
+                ],
+            }
+            for wp, pois in zip(waypoints, route_pois)
+        ]
+
+    def _evaluation_rows(self, items: list[tuple[str, dict]]):
+        return [
+            {
+                "id": str(uuid.uuid4()),
+                "route_id": route_id,
+                "bertscore_f1": data["bertscore_f1"],
+                "bertscore_precision": data["bertscore_precision"],
+                "bertscore_recall": data["bertscore_recall"],
+                "is_equivalent": data["is_equivalent"],
+                "human_sentiment": data["human_sentiment"],
+                "ai_sentiment": data["ai_sentiment"],
+            }
+            for route_id, data in items
+        ]
+
+    def _evaluation_filters(
+        self, route_id=None, route_status=None, created_after=None, created_before=None
+    ):
+        return {
+            "route_id": route_id,
+            "route_status": route_status,
+            "created_after": created_after,
+            "created_before": created_before,
+        }
+
+
+@instrument("neo4j", exclude=("close",))
+class Neo4jService(_Neo4jQueries):
+    """
+    Blocking driver for scripts run outside the event loop (the sentiment
+    backfill). The API uses AsyncNeo4jService.
+    """
+
+    def __init__(self):
+        self._driver = None
+
+    @property
+    def driver(self):
+        # Created on first use so importing the service never touches Neo4j
+        if self._driver is None:
+            self._driver = GraphDatabase.driver(settings.NEO4J_URI, **_driver_options())
+        return self._driver
+
+    def close(self):
+        if self._driver is not None:
+            self._driver.close()
+            self._driver = None
+
+    @contextmanager
+    def _session(self):
+        NEO4J_SESSIONS.inc(driver="sync")
+        try:
+            with self.driver.session() as session:
+                yield session
+        finally:
+            NEO4J_SESSIONS.dec(driver="sync")
+
+    def get_unscored_waypoints(self, limit: int, after=None, rescore=False):
+        """
+        Next page of (id, text_note) pairs whose sentiment has not been scored,
+        ordered by id. With rescore, every note is returned.
+        """
+        with self._session() as session:
             result = session.run(
-                query,
-                id=route_id,
-                name=route_data.name,
-                start_lat=route_data.start_lat,
-                start_lon=route_data.start_lon,
-                end_lat=route_data.end_lat,
-                end_lon=route_data.end_lon,
-                distance_km=route_data.distance_km,
-                created_at=datetime.utcnow(),
-            )
-            return self._format_node(result.single()["r"])
-
-    def get_route(self, route_id: str):
-        with self.driver.session() as session:
-            query = "MATCH (r:Route {id: $id}) RETURN r"
-            result = session.run(query, id=route_id)
-            record = result.single()
+                UNSCORED_WAYPOINTS_QUERY, limit=limit, after=after, rescore=rescore
+            )
+            return [(record["id"], record["text_note"]) for record in result]
+
+    def store_waypoint_sentiments(self, rows: list[dict]):
+        with self._session() as session:
+            session.execute_write(
+                lambda tx: tx.run(STORE_SENTIMENTS_QUERY, rows=rows).consume()
+            )
+
+
+@instrument("neo4j", exclude=("connect", "close"))
+class AsyncNeo4jService(_Neo4jQueries):
+    """
+    AsyncGraphDatabase-backed service used by the API. The driver (and its
+    connection pool) is created by connect() on application startup and
+    closed on shutdown.
+    """
+
+    def __init__(self):
+        self._driver = None
+
+    @property
+    def driver(self):
+        if self._driver is None:
+            self._driver = AsyncGraphDatabase.driver(
+                settings.NEO4J_URI, **_driver_options()
+            )
+        return self._driver
+
+    async def connect(self):
+        try:
+            await self.driver.verify_connectivity()
+        except Exception as e:
+            logger.error(f"Neo4j is not reachable yet: {e}")
+
+    async def close(self):
+        if self._driver is not None:
+            await self._driver.close()
+            self._driver = None
+
+    @asynccontextmanager
+    async def _session(self):
+        NEO4J_SESSIONS.inc(driver="async")
+        try:
+            async with self.driver.session() as session:
+                yield session
+        finally:
+            NEO4J_SESSIONS.dec(driver="async")
+
+    async def create_route(self, route_data):
+        async with self._session() as session:
+            result = await session.run(
+                CREATE_ROUTE_QUERY, **self._route_params(route_data)
+            )
+            record = await result.single()
+            return self._format_node(record["r"])
+
+    async def get_route(self, route_id: str):
+        async with self._session() as session:
+            result = await session.run(GET_ROUTE_QUERY, id=route_id)
+            record = await result.single()
             return self._format_node(record["r"]) if record else None
 
-    def update_route(self, route_id: str, update_data):
-        with self.driver.session() as session:
-            # Build dynamic SET clause based on the input field data
-            update_fields = update_data.model_dump(exclude_unset=True)
-            if not update_fields:
-                return self.get_route(route_id)
+    async def update_route(self, route_id: str, update_data):
+        update_fields = update_data.model_dump(exclude_unset=True)
+        if not update_fields:
+            return await self.get_route(route_id)
+
+        async with self._session() as session:
+            query = self._update_route_query(update_fields)
+            result = await session.run(query, id=route_id, **update_fields)
+            record = await result.single()
+            return self._format_node(record["r"]) if record else None
+
+    async def store_waypoint(self, waypoint_data):
+        async with self._session() as session:
+            result = await session.run(
+                STORE_WAYPOINT_QUERY, **self._waypoint_params(waypoint_data)
+            )
+            record = await result.single()
+            return self._format_node(record["w"])
+
+    async def store_waypoints(self, items: list[tuple[int, object]]):
+        """
+        Store many (index, WaypointBatchItem) pairs in one UNWIND transaction.
+        Returns {index: (waypoint, created)}; indexes whose route does not
+        exist are absent.
+        """
+        rows = self._waypoint_rows(items)
+
+        async def write(tx):
+            result = await tx.run(STORE_WAYPOINTS_QUERY, rows=rows)
+            return {
+                record["index"]: (self._format_node(record["w"]), record["created"])
+                async for record in result
+            }
+
+        async with self._session() as session:
+            return await session.execute_write(write)
+
+    async def get_waypoints(self, route_id: str):
+        async with self._session() as session:
+            result = await session.run(GET_WAYPOINTS_QUERY, id=route_id)
+            return [self._format_node(record["w"]) async for record in result]
+
+    async def store_waypoint_pois(self, waypoints, route_pois):
+        """
+        Link each waypoint to its POIs (Overpass dicts) with NEAR
+        relationships, merging POI nodes by OSM id.
+        """
+        rows = self._poi_rows(waypoints, route_pois)
+
+        async def write(tx):
+            await (
+                await tx.run(
+                    STORE_WAYPOINT_POIS_QUERY,
+                    rows=rows,
+                    enriched_at=datetime.utcnow(),
+                )
+            ).consume()
+
+        async with self._session() as session:
+            await session.execute_write(write)
+
+    async def get_route_with_waypoints(self, route_id: str):
+        """
+        Return (route, waypoints) from a single projected query, or (None, [])
+        if the route does not exist.
+        """
+        async with self._session() as session:
+            result = await session.run(ROUTE_CONTEXT_QUERY, id=route_id)
+            return self._format_route_context(await result.single())
+
+    async def get_sentiment_timeline(self, route_id: str):
+        """
+        A route's waypoint sentiment scores in walk order, or None if the
+        route does not exist.
+        """
+        async with self._session() as session:
+            result = await session.run(SENTIMENT_TIMELINE_QUERY, id=route_id)
+            record = await result.single()
+            if not record:
+                return None
+            return [self._format_node(point) for point in record["points"]]
+
+    async def list_routes(
+        self,
+        limit: int,
+        cursor=None,
+        status=None,
+        created_after=None,
+        created_before=None,
+    ):
+        """
+        One keyset page of routes, newest first. `cursor` is the
+        (created_at, id) of the last route on the previous page.
+        """
+        cursor_at, cursor_id = cursor or (None, None)
+        async with self._session() as session:
+            result = await session.run(
+                LIST_ROUTES_QUERY,
+                limit=limit,
+                cursor_at=cursor_at,
+                cursor_id=cursor_id,
+                status=status,
+                created_after=created_after,
+                created_before=created_before,
+            )
+            return [self._format_node(record["r"]) async for record in result]
+
+    async def stream_routes(self, status=None, created_after=None, created_before=None):
+        """
+        Yield every matching route straight from the driver cursor.
+        """
+        async with self._session() as session:
+            result = await session.run(
+                EXPORT_ROUTES_QUERY,
+                status=status,
+                created_after=created_after,
+                created_before=created_before,
+            )
+            async for record in result:
+                yield self._format_node(record["r"])
+
+    async def list_waypoints(self, route_id: str, limit: int, cursor=None):
+        """
+        One keyset page of a route's waypoints in walk order, or None if the
+        route does not exist.
+        """
+        cursor_at, cursor_id = cursor or (None, None)
+        async with self._session() as session:
+            result = await session.run(
+                LIST_WAYPOINTS_QUERY,
+                id=route_id,
+                limit=limit,
+                cursor_at=cursor_at,
+                cursor_id=cursor_id,
+            )
+            record = await result.single()
+            if not record:
+                return None
+            return [self._format_node(wp) for wp in record["waypoints"]]
+
+    async def stream_waypoints(self, route_id: str):
+        """
+        Yield a route's waypoints in walk order straight from the driver cursor.
+        """
+        async with self._session() as session:
+            result = await session.run(EXPORT_WAYPOINTS_QUERY, id=route_id)
+            async for record in result:
+                yield self._format_node(record["w"])
+
+    async def find_waypoints_near(
+        self, latitude: float, longitude: float, radius: float, limit: int
+    ):
+        async with self._session() as session:
+            result = await session.run(
+                NEARBY_WAYPOINTS_QUERY,
+                latitude=latitude,
+                longitude=longitude,
+                radius=radius,
+                limit=limit,
+            )
+            return [self._format_spatial(record, "w") async for record in result]
+
+    async def find_waypoints_in_bbox(self, bbox: tuple, limit: int):
+        south, west, north, east = bbox
+        async with self._session() as session:
+            result = await session.run(
+                WAYPOINTS_IN_BBOX_QUERY,
+                south=south,
+                west=west,
+                north=north,
+                east=east,
+                limit=limit,
+            )
+            return [self._format_spatial(record, "w") async for record in result]
 
-            set_clauses = ", ".join([f"r.{k} = ${k}" for k in update_fields.keys()])
-            query = f"MATCH (r:Route {{id: $id}}) SET {set_clauses} RETURN r"
+    async def find_routes_near(
+        self, latitude: float, longitude: float, radius: float, limit: int
+    ):
+        async with self._session() as session:
+            result = await session.run(
+                NEARBY_ROUTES_QUERY,
+                latitude=latitude,
+                longitude=longitude,
+                radius=radius,
+                limit=limit,
+            )
+            return [self._format_spatial(record, "r") async for record in result]
 
-            params = {"id": route_id, **update_fields}
-            result = session.run(query, **params)
-            record = result.single()
+    async def find_routes_in_bbox(self, bbox: tuple, limit: int):
+        south, west, north, east = bbox
+        async with self._session() as session:
+            result = await session.run(
+                ROUTES_IN_BBOX_QUERY,
+                south=south,
+                west=west,
+                north=north,
+                east=east,
+                limit=limit,
+            )
+            return [self._format_spatial(record, "r") async for record in result]
+
+    async def store_travelogue(
+        self, route_id: str, travelogue: str, content_hash: str
+    ):
+        async with self._session() as session:
+            result = await session.run(
+                STORE_TRAVELOGUE_QUERY,
+                id=route_id,
+                travelogue=travelogue,
+                travelogue_hash=content_hash,
+                generated_at=datetime.utcnow(),
+            )
+            record = await result.single()
             return self._format_node(record["r"]) if record else None
 
-    def store_waypoint(self, waypoint_data):
-        with self.driver.session() as session:
-            wp_id = str(uuid.uuid4())
-            query = """
-            MATCH (r:Route {id: $route_id})
-            CREATE (w:Waypoint {
-                id: $id,
-                latitude: $latitude,
-                longitude: $longitude,
-                text_note: $text_note,
-                voice_blob_url: $voice_blob_url,
-                image_url: $image_url,
-                stored_at: $stored_at
-            })
-            CREATE (r)-[:HAS_WAYPOINT]->(w)
-            RETURN w
-            """
-            result = session.run(
-                query,
-                route_id=waypoint_data.route_id,
-                id=wp_id,
-                latitude=waypoint_data.latitude,
-                longitude=waypoint_data.longitude,
-                text_note=waypoint_data.text_note,
-                voice_blob_url=waypoint_data.voice_blob_url,
-                image_url=waypoint_data.image_url,
-                stored_at=datetime.utcnow(),
-            )
-            return self._format_node(result.single()["w"])
-
-    def get_waypoints(self, route_id: str):
-        with self.driver.session() as session:
-            query = """
-            MATCH (r:Route {id: $id})-[:HAS_WAYPOINT]->(w:Waypoint)
-            RETURN w ORDER BY w.stored_at
-            """
-            result = session.run(query, id=route_id)
-            return [self._format_node(record["w"]) for record in result]
-
-    def store_evaluation(self, route_id: str, evaluation_data: dict):
-        with self.driver.session() as session:
-            query = """
-            MATCH (r:Route {id: $route_id})
-            CREATE (e:Evaluation {
-                bertscore_f1: $bertscore_f1,
-                bertscore_precision: $bertscore_precision,
-                bertscore_recall: $bertscore_recall,
-                is_equivalent: $is_equivalent,
-                human_sentiment: $human_sentiment,
-                ai_sentiment: $ai_sentiment,
-                created_at: $created_at
-            })
-            CREATE (r)-[:HAS_EVALUATION]->(e)
-            RETURN e
-            """
-            result = session.run(
-                query,
-                route_id=route_id,
-                bertscore_f1=evaluation_data["bertscore_f1"],
-                bertscore_precision=evaluation_data["bertscore_precision"],
-                bertscore_recall=evaluation_data["bertscore_recall"],
-                is_equivalent=evaluation_data["is_equivalent"],
-                human_sentiment=evaluation_data["human_sentiment"],
-                ai_sentiment=evaluation_data["ai_sentiment"],
-                created_at=datetime.utcnow(),
+    async def store_evaluation(self, route_id: str, evaluation_data: dict):
+        stored = await self.store_evaluations([(route_id, evaluation_data)])
+        return stored[0] if stored else None
+
+    async def store_evaluations(self, items: list[tuple[str, dict]]):
+        """
+        Store many (route_id, evaluation_data) pairs in a single UNWIND write,
+        folding them into the running evaluation aggregates in the same
+        transaction. Aggregates that do not exist yet are first built from the
+        evaluations already stored, so earlier evaluations are not left out.
+        """
+        rows = self._evaluation_rows(items)
+
+        async def write(tx):
+            await self._lock_evaluation_stats(tx)
+            result = await tx.run(
+                STORE_EVALUATIONS_QUERY, rows=rows, created_at=datetime.utcnow()
             )
-            return self._format_node(result.single()["e"])
+            nodes = [self._format_node(record["e"]) async for record in result]
+            if nodes:
+                await tx.run(MERGE_EVALUATION_STATS_QUERY, **batch_aggregates(nodes))
+            return nodes
+
+        async with self._session() as session:
+            return await session.execute_write(write)
+
+    async def get_evaluation_stats(self):
+        """
+        Running aggregates over all evaluations, built from the Evaluation
+        nodes if they have never been computed.
+        """
+        async with self._session() as session:
+            result = await session.run(GET_EVALUATION_STATS_QUERY)
+            record = await result.single()
+            if record:
+                return dict(record["s"])
+            return await session.execute_write(self._lock_evaluation_stats)
+
+    async def _lock_evaluation_stats(self, tx):
+        """
+        Take the stats node's write lock for the rest of the transaction,
+        building the aggregates first if they are missing. Returns them.
+        """
+        result = await tx.run(LOCK_EVALUATION_STATS_QUERY)
+        if not (await result.single())["built"]:
+            return await self._rebuild_evaluation_stats(tx)
+        result = await tx.run(GET_EVALUATION_STATS_QUERY)
+        return dict((await result.single())["s"])
+
+    async def _rebuild_evaluation_stats(self, tx):
+        result = await tx.run(EVALUATION_VALUES_QUERY, **self._evaluation_filters())
+        rows = [record.data() async for record in result]
+        result = await tx.run(RESET_EVALUATION_STATS_QUERY)
+        if rows:
+            result = await tx.run(
+                MERGE_EVALUATION_STATS_QUERY, **batch_aggregates(rows)
+            )
+        return dict((await result.single())["s"])
+
+    async def get_evaluation_values(self, **filters):
+        """
+        Project only the scored properties of evaluations matching the filters
+        (route_id, route_status, created_after, created_before).
+        """
+        async with self._session() as session:
+            result = await session.run(
+                EVALUATION_VALUES_QUERY, **self._evaluation_filters(**filters)
+            )
+            return [record.data() async for record in result]
 
 
 neo4j_service = Neo4jService()
+async_neo4j_service = AsyncNeo4jService()
+
+registry.gauge(
+    "neo4j_pool_max_size",
+    "Connection pool size of each Neo4j driver.",
+    callback=lambda: settings.NEO4J_MAX_POOL_SIZE,
+)
@@ -1,46 +1,118 @@
-import requests
-from langchain_core.output_parsers import StrOutputParser
-from langchain_core.prompts import ChatPromptTemplate
-from langchain_ollama import OllamaLLM
+import asyncio
+import hashlib
+import json
 
-from services.neo4j_service import neo4j_service
+from services.context_builder import build_context
+from services.enrichment_service import poi_enrichment_service
+from services.llm_scheduler import LLMBusyError, Priority, llm_scheduler
+from services.neo4j_service import async_neo4j_service
+from services.retrieval import retrieval_service
 from utils.config import settings
 from utils.logger import logger
-from utils.osm_client import osm_client
+from utils.metrics import registry, time_stage
+
+# Bump whenever the prompt template changes so cached travelogues are regenerated
+PROMPT_VERSION = "2"
+
+
+TRAVELOGUE_CACHE = registry.counter(
+    "travelogue_cache_lookups_total",
+    "Stored travelogue lookups by result.",
+    ["result"],
+)
+
+
+class GenerationError(Exception):
+    pass
+
+
+class RouteNotFoundError(GenerationError):
+    pass
+
+
+class GenerationTimeoutError(GenerationError):
+    pass
 
 
 class RAGService:
     def __init__(self):
-        self.llm = OllamaLLM(
-            base_url=settings.OLLAMA_HOST, model=settings.LLM_MODEL, temperature=0.7
-        )
+        self._llm = None
+        self._chain = None
 
-    def build_context(self, route_id: str):
+    @property
+    def llm(self):
         """
-        Fetch waypoints, query POIs, and construct context string.
+        Shared Ollama client; LangChain is imported on first use so workers
+        that never generate do not load it.
         """
-        route = neo4j_service.get_route(route_id)
-        if not route:
-            return None, None
+        if self._llm is None:
+            from langchain_ollama import OllamaLLM
+
+            self._llm = OllamaLLM(
+                base_url=settings.OLLAMA_HOST, model=settings.LLM_MODEL, temperature=0.7
+            )
+        return self._llm
+
+    def warm_up(self):
+        self._build_chain()
+
+    async def _aformat_waypoints(self, route, waypoints):
+        """
+        Prompt context for a loaded route. Waypoints not yet enriched are
+        looked up concurrently over a pooled connection and linked in the
+        graph.
+        """
+        route_pois = await poi_enrichment_service.enrich_missing(waypoints)
+        # Off the event loop: retrieval may embed the route's notes and POIs
+        return await asyncio.to_thread(
+            self._format_context, route, waypoints, route_pois
+        )
 
-        waypoints = neo4j_service.get_waypoints(route_id)
+    def travelogue_hash(self, route, waypoints) -> str:
+        """
+        Content hash of everything that shapes a generated travelogue: the
+        route name, its waypoints, the model and prompt versions, and the
+        context budget settings.
+        """
+        content = {
+            "route": [route["id"], route["name"]],
+            "waypoints": [
+                [wp["id"], wp["latitude"], wp["longitude"], wp.get("text_note")]
+                for wp in waypoints
+            ],
+            "model": settings.LLM_MODEL,
+            "prompt": PROMPT_VERSION,
+            "context": [
+                settings.LLM_CONTEXT_TOKEN_BUDGET,
+                settings.CONTEXT_CLUSTER_RADIUS_M,
+                settings.CONTEXT_MAX_POIS_PER_WAYPOINT,
+                settings.RETRIEVAL_ENABLED and settings.EMBEDDING_MODEL,
+                settings.RETRIEVAL_JOURNALS_TOP_K,
+            ],
+        }
+        return hashlib.sha256(
+            json.dumps(content, sort_keys=True).encode("utf-8")
+        ).hexdigest()
 
-        context_parts = []
-        for wp in waypoints:
-            pois = osm_client.query_pois(wp["latitude"], wp["longitude"])
-            wp_context = f"Waypoint at ({wp['latitude']}, {wp['longitude']}):\n"
-            if wp["text_note"]:
-                wp_context += f"- User Note: {wp['text_note']}\n"
-            if pois:
-                wp_context += f"- Nearby Features: {', '.join([p['name'] + ' (' + str(p['type']) + ')' for p in pois[:5]])}\n"
-            context_parts.append(wp_context)
+    def _format_context(self, route, waypoints, route_pois):
+        context, info = build_context(
+            waypoints, route_pois, retriever=retrieval_service, route_id=route["id"]
+        )
+        if info["estimated_tokens"] < info["untrimmed_tokens"]:
+            logger.info(
+                f"Context trimmed from ~{info['untrimmed_tokens']} to "
+                f"~{info['estimated_tokens']} tokens ({info['blocks']} blocks "
+                f"for {info['waypoints']} waypoints)"
+            )
+        return context
 
-        return route, chr(10).join(context_parts)
+    def _build_chain(self):
+        # The chain is stateless, so it is built once and shared
+        if self._chain is not None:
+            return self._chain
 
-    def generate_travelogue(self, route_id: str) -> str:
-        route, context_data = self.build_context(route_id)
-        if not route:
-            return "Route not found."
+        from langchain_core.output_parsers import StrOutputParser
+        from langchain_core.prompts import ChatPromptTemplate
 
         # Define the LangChain Prompt Template
         prompt = ChatPromptTemplate.from_messages(
@@ -61,17 +133,127 @@ class RAGService:
         )
 
         # Create the LangChain processing pipeline
-        chain = prompt | self.llm | StrOutputParser()
+        self._chain = prompt | self.llm | StrOutputParser()
+        return self._chain
 
+    async def aload_route(self, route_id: str):
+        """
+        Fetch a route and its waypoints in one round trip, with the content
+        hash of its travelogue. Raises RouteNotFoundError.
+        """
+        route, waypoints = await async_neo4j_service.get_route_with_waypoints(route_id)
+        if not route:
+            raise RouteNotFoundError("Route not found.")
+        return route, waypoints, self.travelogue_hash(route, waypoints)
+
+    def needs_generation(self, loaded, refresh: bool = False) -> bool:
+        """
+        Whether a route loaded by aload_route needs the LLM, i.e. has no
+        stored travelogue matching its current content (or refresh is set).
+        """
+        route, _, content_hash = loaded
+        return refresh or route.get("travelogue_hash") != content_hash
+
+    async def run_generation(
+        self,
+        route_id: str,
+        progress=None,
+        refresh: bool = False,
+        loaded=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ) -> str:
+        """
+        Return the travelogue for a route, raising GenerationError on failure
+        or LLMBusyError if no LLM slot could be obtained.
+
+        A travelogue stored on the Route is reused while its content hash still
+        matches; otherwise (or with refresh) a new one is generated and stored.
+        `progress` is called with (stage, fraction) as work advances, and
+        `loaded` may pass in the result of an earlier aload_route call.
+        """
+        report = progress or (lambda stage, fraction: None)
+
+        report("building_context", 0.1)
+        loaded = loaded or await self.aload_route(route_id)
+        route, waypoints, content_hash = loaded
+        if not self.needs_generation(loaded, refresh):
+            logger.info(f"Reusing stored travelogue for route: {route_id}")
+            TRAVELOGUE_CACHE.inc(result="hit")
+            report("completed", 1.0)
+            return route["travelogue"]
+        TRAVELOGUE_CACHE.inc(result="miss")
+
+        context_data = await self._aformat_waypoints(route, waypoints)
+
+        chain = self._build_chain()
         try:
-            logger.info(f"Generating travelogue via LangChain for route: {route_id}")
-            response = chain.invoke(
-                {"route_name": route["name"], "context": context_data}
-            )
-            return response
+            async with llm_scheduler.slot(priority, settings.LLM_REQUEST_TIMEOUT):
+                report("generating", 0.5)
+                logger.info(
+                    f"Generating travelogue via LangChain for route: {route_id}"
+                )
+                with time_stage("llm", "invoke"):
+                    response = await chain.ainvoke(
+                        {"route_name": route["name"], "context": context_data}
+                    )
+        except LLMBusyError:
+            raise
+        except TimeoutError as e:
+            raise GenerationTimeoutError("Generation timed out") from e
         except Exception as e:
             logger.error(f"LangChain generation failed: {e}")
-            return f"Generation failed: {str(e)}"
+            raise GenerationError(f"Generation failed: {str(e)}") from e
+
+        await async_neo4j_service.store_travelogue(route_id, response, content_hash)
+        report("completed", 1.0)
+        return response
+
+    async def astream_generation(
+        self,
+        route_id: str,
+        refresh: bool = False,
+        loaded=None,
+        priority: Priority = Priority.INTERACTIVE,
+    ):
+        """
+        Async generator yielding travelogue text chunks as the LLM produces
+        them. The complete text is stored on the Route once the stream ends;
+        a still-valid stored travelogue is yielded as a single chunk.
+        """
+        loaded = loaded or await self.aload_route(route_id)
+        route, waypoints, content_hash = loaded
+        if not self.needs_generation(loaded, refresh):
+            logger.info(f"Reusing stored travelogue for route: {route_id}")
+            TRAVELOGUE_CACHE.inc(result="hit")
+            yield route["travelogue"]
+            return
+        TRAVELOGUE_CACHE.inc(result="miss")
+
+        context_data = await self._aformat_waypoints(route, waypoints)
+        chain = self._build_chain()
+        chunks = []
+        try:
+            async with llm_scheduler.slot(priority, settings.LLM_REQUEST_TIMEOUT):
+                logger.info(
+                    f"Streaming travelogue via LangChain for route: {route_id}"
+                )
+                with time_stage("llm", "stream"):
+                    async for chunk in chain.astream(
+                        {"route_name": route["name"], "context": context_data}
+                    ):
+                        chunks.append(chunk)
+                        yield chunk
+        except LLMBusyError:
+            raise
+        except TimeoutError as e:
+            raise GenerationTimeoutError("Generation timed out") from e
+        except Exception as e:
+            logger.error(f"LangChain generation failed: {e}")
+            raise GenerationError(f"Generation failed: {str(e)}") from e
+
+        await async_neo4j_service.store_travelogue(
+            route_id, "".join(chunks), content_hash
+        )
 
 
 rag_service = RAGService()
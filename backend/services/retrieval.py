@@ -0,0 +1,230 @@
+import hashlib
+import threading
+
+import numpy as np
+
+from services.scoring_client import remote_scorer
+from utils.config import settings
+from utils.logger import logger
+from utils.metrics import registry, timed
+from utils.vector_index import VectorIndex
+
+
+class TextEmbedder:
+    """
+    Sentence embeddings on CPU: mean-pooled, unit-normalised hidden states of
+    a small transformer, computed in batches. Uses transformers directly
+    (already installed for BERTScore) rather than sentence-transformers.
+    """
+
+    def __init__(self, model_name: str, batch_size: int):
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    # Deferred so importing this module does not load torch
+                    from transformers import AutoModel, AutoTokenizer
+
+                    logger.info(f"Loading embedding model {self.model_name}")
+                    tokenizer = AutoTokenizer.from_pretrained(self.model_name)
+                    model = AutoModel.from_pretrained(self.model_name).eval()
+                    self._model = (tokenizer, model)
+        return self._model
+
+    @timed("embedding", "batch")
+    def embed(self, texts: list[str]) -> np.ndarray:
+        import torch
+
+        tokenizer, model = self._load()
+        batches = []
+        for i in range(0, len(texts), self.batch_size):
+            encoded = tokenizer(
+                texts[i : i + self.batch_size],
+                padding=True,
+                truncation=True,
+                max_length=256,
+                return_tensors="pt",
+            )
+            with torch.inference_mode():
+                hidden = model(**encoded).last_hidden_state
+            mask = encoded["attention_mask"].unsqueeze(-1).to(hidden.dtype)
+            pooled = (hidden * mask).sum(1) / mask.sum(1).clamp(min=1e-9)
+            batches.append(torch.nn.functional.normalize(pooled, dim=1).numpy())
+        return np.vstack(batches)
+
+
+def _unit(vector: np.ndarray) -> np.ndarray:
+    norm = np.linalg.norm(vector)
+    return vector / norm if norm else vector
+
+
+class RetrievalService:
+    """
+    Relevance ranking for prompt context over a local vector index.
+
+    Notes and POI descriptions of a route are embedded (once, then cached in
+    the index) when it is generated. For each segment of the walk the index
+    is queried with the segment's notes for the most relevant of the POIs
+    near it, so the per-segment POI cap keeps the most relevant rather than
+    the nearest. Which notes to keep is left to the sentiment-based budget
+    trimming in context_builder.
+    """
+
+    def __init__(self, embedder: TextEmbedder, index: VectorIndex):
+        self.embedder = embedder
+        self.index = index
+        self._disabled = False
+
+    @property
+    def enabled(self) -> bool:
+        return settings.RETRIEVAL_ENABLED and not self._disabled
+
+    def warm_up(self):
+        self._embed(["warm up"])
+
+    def _embed(self, texts: list[str]) -> np.ndarray:
+        # The shared scoring process holds the model when there is one
+        client = remote_scorer()
+        if client:
+            return np.asarray(client.call_sync("embed", texts=texts), dtype=np.float32)
+        return self.embedder.embed(texts)
+
+    def save(self):
+        self.index.save()
+
+    def _save_if_due(self):
+        # Writing re-reads and merges the whole file, so new entries are
+        # persisted in batches (and at shutdown) rather than per request
+        if self.index.unsaved >= settings.VECTOR_INDEX_SAVE_EVERY:
+            self.index.save()
+
+    def _ensure(self, items: dict[str, tuple[str, str]]):
+        """
+        Embed, in one batch, the {key: (text, route_id)} items not yet indexed
+        with their current text.
+        """
+        missing = self.index.missing({key: text for key, (text, _) in items.items()})
+        if missing:
+            vectors = self._embed([items[key][0] for key in missing])
+            self.index.add(
+                missing,
+                [items[key][0] for key in missing],
+                vectors,
+                [items[key][1] for key in missing],
+            )
+            self._save_if_due()
+
+    def rank_segments(self, clusters, route_id: str = None) -> list[str]:
+        """
+        Replace each cluster's POIs with the CONTEXT_MAX_POIS_PER_WAYPOINT of
+        them most relevant to its notes (or to the whole walk's, if it has
+        none), skipping POIs already picked for an earlier cluster. Returns
+        excerpts of related journals from other routes
+        (RETRIEVAL_JOURNALS_TOP_K), best first. Clusters are left untouched if
+        the embedding model is unavailable.
+        """
+        if not self.enabled:
+            return []
+        try:
+            return self._rank_segments(clusters, route_id)
+        except (ImportError, OSError) as e:
+            # The model is missing or cannot be downloaded; generation goes on
+            # with spatial ordering rather than retrying on every request
+            logger.error(f"Retrieval disabled, embedding model unavailable: {e}")
+            self._disabled = True
+        except Exception as e:
+            logger.error(f"Retrieval failed, using spatial ordering: {e}")
+        return []
+
+    def _rank_segments(self, clusters, route_id):
+        items = {}
+        for cluster in clusters:
+            for wp in cluster["waypoints"]:
+                if wp.get("text_note"):
+                    items[f"note:{wp['id']}"] = (wp["text_note"], route_id)
+            for poi in cluster["pois"]:
+                items[f"poi:{poi['id']}"] = (f"{poi['name']} ({poi['type']})", None)
+        if not items:
+            return []
+        self._ensure(items)
+
+        note_keys = [key for key in items if key.startswith("note:")]
+        route_query = (
+            _unit(self.index.vectors(note_keys).mean(axis=0)) if note_keys else None
+        )
+        # POIs are only candidates for the segments they are near, as the
+        # context places them at that segment's location
+        picked = set()
+        for cluster in clusters:
+            noted = [wp for wp in cluster["waypoints"] if wp.get("text_note")]
+            if noted:
+                notes = self.index.vectors([f"note:{wp['id']}" for wp in noted])
+                query = _unit(notes.mean(axis=0))
+            else:
+                query = route_query
+            if query is None or not cluster["pois"]:
+                continue
+            candidates = {
+                f"poi:{poi['id']}": poi
+                for poi in cluster["pois"]
+                if (poi["name"], poi["type"]) not in picked
+            }
+            hits = self.index.search(
+                query,
+                settings.CONTEXT_MAX_POIS_PER_WAYPOINT,
+                kind="poi",
+                keys=candidates,
+            )
+            cluster["pois"] = [candidates[key] for key, _, _, _ in hits]
+            picked.update((poi["name"], poi["type"]) for poi in cluster["pois"])
+
+        if route_query is None or not settings.RETRIEVAL_JOURNALS_TOP_K:
+            return []
+        return [
+            text[: settings.RETRIEVAL_JOURNAL_MAX_CHARS]
+            for _, text, _, _ in self.index.search(
+                route_query,
+                settings.RETRIEVAL_JOURNALS_TOP_K,
+                kind="journal",
+                exclude_route=route_id,
+            )
+        ]
+
+    def index_journals(self, journals: list[tuple[str, str]]):
+        """
+        Add (route_id, human_journal) pairs to the index, when journals are
+        retrieved at all (RETRIEVAL_JOURNALS_TOP_K > 0).
+        """
+        if not self.enabled or settings.RETRIEVAL_JOURNALS_TOP_K <= 0:
+            return
+        items = {
+            f"journal:{route_id}:{hashlib.sha1(text.encode('utf-8')).hexdigest()}": (
+                text,
+                route_id,
+            )
+            for route_id, text in journals
+        }
+        try:
+            self._ensure(items)
+        except Exception as e:
+            logger.error(f"Indexing {len(items)} journals failed: {e}")
+
+
+retrieval_service = RetrievalService(
+    TextEmbedder(settings.EMBEDDING_MODEL, settings.EMBEDDING_BATCH_SIZE),
+    VectorIndex(
+        settings.VECTOR_INDEX_PATH if settings.RETRIEVAL_ENABLED else None,
+        model=settings.EMBEDDING_MODEL,
+    ),
+)
+
+registry.gauge(
+    "vector_index_items",
+    "Embeddings held in the retrieval vector index.",
+    callback=lambda: len(retrieval_service.index),
+)
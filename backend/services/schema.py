@@ -0,0 +1,117 @@
+from datetime import datetime
+
+from services.neo4j_service import async_neo4j_service
+from utils.logger import logger
+
+# Ordered schema migrations. Each statement must be idempotent on its own
+# (IF NOT EXISTS / guarded writes) so a partially applied version can be
+# re-run safely; applied versions are recorded as (:SchemaMigration) nodes.
+MIGRATIONS = [
+    (
+        1,
+        "Uniqueness constraints on ids and lookup indexes",
+        [
+            "CREATE CONSTRAINT route_id_unique IF NOT EXISTS "
+            "FOR (r:Route) REQUIRE r.id IS UNIQUE",
+            "CREATE CONSTRAINT waypoint_id_unique IF NOT EXISTS "
+            "FOR (w:Waypoint) REQUIRE w.id IS UNIQUE",
+            "MATCH (e:Evaluation) WHERE e.id IS NULL SET e.id = randomUUID()",
+            "CREATE CONSTRAINT evaluation_id_unique IF NOT EXISTS "
+            "FOR (e:Evaluation) REQUIRE e.id IS UNIQUE",
+            "CREATE CONSTRAINT evaluation_stats_scope_unique IF NOT EXISTS "
+            "FOR (s:EvaluationStats) REQUIRE s.scope IS UNIQUE",
+            "CREATE CONSTRAINT schema_migration_version_unique IF NOT EXISTS "
+            "FOR (m:SchemaMigration) REQUIRE m.version IS UNIQUE",
+            "CREATE INDEX waypoint_stored_at IF NOT EXISTS "
+            "FOR (w:Waypoint) ON (w.stored_at)",
+            "CREATE INDEX route_status IF NOT EXISTS FOR (r:Route) ON (r.status)",
+            "CREATE INDEX evaluation_created_at IF NOT EXISTS "
+            "FOR (e:Evaluation) ON (e.created_at)",
+        ],
+    ),
+    (
+        2,
+        "Idempotency keys for batched waypoint uploads",
+        [
+            "CREATE CONSTRAINT waypoint_idempotency_key_unique IF NOT EXISTS "
+            "FOR (w:Waypoint) REQUIRE w.idempotency_key IS UNIQUE",
+        ],
+    ),
+    (
+        3,
+        "Index for paginated route listing",
+        [
+            "CREATE INDEX route_created_at IF NOT EXISTS "
+            "FOR (r:Route) ON (r.created_at)",
+        ],
+    ),
+    (
+        4,
+        "Point locations and spatial indexes",
+        [
+            "MATCH (w:Waypoint) "
+            "WHERE w.location IS NULL AND w.latitude IS NOT NULL "
+            "SET w.location = "
+            "point({latitude: w.latitude, longitude: w.longitude})",
+            "MATCH (r:Route) "
+            "WHERE r.start_location IS NULL AND r.start_lat IS NOT NULL "
+            "SET r.start_location = "
+            "point({latitude: r.start_lat, longitude: r.start_lon})",
+            "CREATE POINT INDEX waypoint_location IF NOT EXISTS "
+            "FOR (w:Waypoint) ON (w.location)",
+            "CREATE POINT INDEX route_start_location IF NOT EXISTS "
+            "FOR (r:Route) ON (r.start_location)",
+        ],
+    ),
+    (
+        5,
+        "Shared POI nodes for waypoint enrichment",
+        [
+            "CREATE CONSTRAINT poi_osm_id_unique IF NOT EXISTS "
+            "FOR (p:POI) REQUIRE p.osm_id IS UNIQUE",
+            "CREATE POINT INDEX poi_location IF NOT EXISTS "
+            "FOR (p:POI) ON (p.location)",
+        ],
+    ),
+    (
+        6,
+        "Rebuild evaluation aggregates that may have missed older evaluations",
+        [
+            # Rebuilt from the Evaluation nodes on the next read or write
+            "MATCH (s:EvaluationStats {scope: 'all'}) DETACH DELETE s",
+        ],
+    ),
+]
+
+
+async def applied_versions(session) -> set[int]:
+    result = await session.run("MATCH (m:SchemaMigration) RETURN m.version AS version")
+    return {record["version"] async for record in result}
+
+
+async def run_migrations(service=async_neo4j_service) -> list[int]:
+    """
+    Apply every migration newer than those recorded in the database.
+    Returns the versions applied by this call.
+    """
+    applied = []
+    async with service.driver.session() as session:
+        done = await applied_versions(session)
+        for version, description, statements in MIGRATIONS:
+            if version in done:
+                continue
+            logger.info(f"Applying schema migration {version}: {description}")
+            for statement in statements:
+                await (await session.run(statement)).consume()
+            result = await session.run(
+                """
+                MERGE (m:SchemaMigration {version: $version})
+                SET m.description = $description, m.applied_at = $applied_at
+                """,
+                version=version,
+                description=description,
+                applied_at=datetime.utcnow(),
+            )
+            await result.consume()
+            applied.append(version)
+    return applied
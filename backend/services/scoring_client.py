@@ -0,0 +1,129 @@
+import asyncio
+import itertools
+import json
+import socket
+
+from utils.config import settings
+from utils.logger import logger
+
+# Longest request or response line; bulk BERTScore batches and embedding
+# responses run to a few MB
+MAX_MESSAGE_BYTES = 64 * 1024 * 1024
+
+
+class ScoringError(Exception):
+    pass
+
+
+def encode(message: dict) -> bytes:
+    return json.dumps(message).encode("utf-8") + b"\n"
+
+
+class ScoringClient:
+    """
+    Client for the shared scoring process (scoring_server.py) on a unix
+    socket.
+
+    Messages are newline-delimited JSON: {"id", "op", "args"} requests and
+    {"id", "result"} or {"id", "error"} responses. The async side keeps one
+    pipelined connection per worker and matches responses to requests by id;
+    the sync side, for code already running in a thread, opens a short-lived
+    connection per call.
+    """
+
+    def __init__(self, path: str, timeout: float):
+        self.path = path
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._pending = {}
+        self._writer = None
+        self._reader_task = None
+        self._connect_lock = None
+
+    async def _connection(self):
+        if self._connect_lock is None:
+            self._connect_lock = asyncio.Lock()
+        async with self._connect_lock:
+            if self._writer is None or self._writer.is_closing():
+                reader, self._writer = await asyncio.open_unix_connection(
+                    self.path, limit=MAX_MESSAGE_BYTES
+                )
+                self._reader_task = asyncio.create_task(self._read(reader))
+        return self._writer
+
+    async def _read(self, reader):
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                future = self._pending.get(message.get("id"))
+                if future is None or future.done():
+                    continue
+                if "error" in message:
+                    future.set_exception(ScoringError(message["error"]))
+                else:
+                    future.set_result(message["result"])
+        except (OSError, ValueError) as e:
+            logger.error(f"Scoring server connection failed: {e}")
+        finally:
+            self._writer = None
+            for future in self._pending.values():
+                if not future.done():
+                    future.set_exception(ScoringError("Scoring server disconnected"))
+
+    async def call(self, op: str, **args):
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        try:
+            writer = await self._connection()
+            writer.write(encode({"id": request_id, "op": op, "args": args}))
+            await writer.drain()
+            return await asyncio.wait_for(future, self.timeout)
+        except OSError as e:
+            raise ScoringError(f"Scoring server unavailable: {e}") from e
+        except asyncio.TimeoutError as e:
+            raise ScoringError(f"Scoring server timed out on {op}") from e
+        finally:
+            self._pending.pop(request_id, None)
+
+    def call_sync(self, op: str, **args):
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(self.timeout)
+                sock.connect(self.path)
+                sock.sendall(encode({"id": 0, "op": op, "args": args}))
+                with sock.makefile("rb") as stream:
+                    line = stream.readline(MAX_MESSAGE_BYTES)
+        except OSError as e:
+            raise ScoringError(f"Scoring server unavailable: {e}") from e
+        if not line:
+            raise ScoringError("Scoring server closed the connection")
+        message = json.loads(line)
+        if "error" in message:
+            raise ScoringError(message["error"])
+        return message["result"]
+
+    async def aclose(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+
+_client = None
+
+
+def remote_scorer():
+    """
+    Client for the shared scoring process when SCORING_SOCKET is set, or None
+    to score in-process.
+    """
+    global _client
+    if not settings.SCORING_SOCKET:
+        return None
+    if _client is None:
+        _client = ScoringClient(settings.SCORING_SOCKET, settings.SCORING_TIMEOUT)
+    return _client
@@ -0,0 +1,61 @@
+import asyncio
+import time
+
+from services.eval_service import eval_service
+from services.rag_service import rag_service
+from services.retrieval import retrieval_service
+from utils.logger import logger
+from utils.sentiment import get_analyzer
+
+WARMUP_TARGETS = {
+    "sentiment": get_analyzer,
+    "llm": rag_service.warm_up,
+    "embeddings": retrieval_service.warm_up,
+    "bertscore": eval_service.warm_up,
+}
+
+
+class WarmupService:
+    """
+    Loads heavy dependencies in the background after startup so the API is
+    healthy immediately and the first real request does not pay for them.
+    """
+
+    def __init__(self):
+        self.status = {}
+        self._task = None
+
+    def start(self, targets: list[str]):
+        unknown = [t for t in targets if t not in WARMUP_TARGETS]
+        if unknown:
+            logger.warning(f"Ignoring unknown warm-up targets: {unknown}")
+        targets = [t for t in targets if t in WARMUP_TARGETS]
+        self.status = {t: {"state": "pending", "seconds": None} for t in targets}
+        if targets:
+            self._task = asyncio.create_task(self._run(targets))
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    @property
+    def ready(self) -> bool:
+        return all(s["state"] != "pending" for s in self.status.values())
+
+    async def _run(self, targets: list[str]):
+        for target in targets:
+            started = time.perf_counter()
+            try:
+                await asyncio.to_thread(WARMUP_TARGETS[target])
+                state = "ready"
+            except Exception as e:
+                logger.error(f"Warm-up of {target} failed: {e}")
+                state = "failed"
+            seconds = time.perf_counter() - started
+            self.status[target] = {"state": state, "seconds": round(seconds, 3)}
+            logger.info(f"Warm-up of {target}: {state} in {seconds:.2f}s")
+
+
+warmup_service = WarmupService()
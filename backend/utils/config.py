@@ -9,6 +9,10 @@ class Settings(BaseSettings):
     NEO4J_URI: str = "neo4j+s://localhost:7687"
     NEO4J_USER: str = "neo4j"
     NEO4J_PASSWORD: str = "password"
+    NEO4J_MIGRATE_ON_STARTUP: bool = True
+    NEO4J_MAX_POOL_SIZE: int = 50
+    NEO4J_ACQUISITION_TIMEOUT: float = 30.0
+    NEO4J_MAX_CONNECTION_LIFETIME: int = 3600
 
     # Ollama host configuration
     OLLAMA_HOST: str = "http://localhost:11434"
@@ -16,13 +20,108 @@ class Settings(BaseSettings):
     # AI Models
     LLM_MODEL: str = "llama3.1:8b"
     BERTSCORE_MODEL: str = "roberta-large"
+    BERTSCORE_BATCH_SIZE: int = 16
+    BERTSCORE_MAX_BATCH: int = 32
+    BERTSCORE_BATCH_WINDOW_MS: int = 50
+    BULK_EVALUATION_BATCH_SIZE: int = 32
+
+    # Scoring executor: evaluation scoring (BERTScore, VADER, statistical
+    # tests) runs in SCORING_PROCESSES worker processes, each loading the model
+    # once and using SCORING_TORCH_THREADS torch threads (0 = cores divided
+    # among the processes). 0 processes scores on threads in the API process
+    SCORING_PROCESSES: int = 1
+    SCORING_TORCH_THREADS: int = 0
+
+    # Generation jobs (records are kept in SQLite so every API worker sees them)
+    GENERATION_WORKERS: int = 2
+    GENERATION_QUEUE_SIZE: int = 32
+    GENERATION_JOB_RETENTION_SECONDS: int = 3600
+    GENERATION_JOB_DB_PATH: str = ".cache/generation_jobs.sqlite3"
+
+    # LLM scheduling: at most LLM_MAX_IN_FLIGHT generations reach Ollama at
+    # once; further requests wait in a bounded priority queue. The queue is
+    # per API worker process. With LLM_SLOT_DIR set (serve.py sets it for
+    # several workers) the in-flight limit holds across all workers, through
+    # lock files in that directory
+    LLM_MAX_IN_FLIGHT: int = 2
+    LLM_QUEUE_SIZE: int = 16
+    LLM_QUEUE_TIMEOUT: float = 60.0
+    LLM_REQUEST_TIMEOUT: float = 300.0
+    LLM_SLOT_DIR: str = ""
+
+    # Prompt context: estimated-token budget for the journey data, and the
+    # radius within which consecutive waypoints are merged into one block
+    LLM_CONTEXT_TOKEN_BUDGET: int = 1500
+    CONTEXT_CLUSTER_RADIUS_M: float = 75.0
+    CONTEXT_MAX_POIS_PER_WAYPOINT: int = 5
+
+    # Waypoint ingestion
+    WAYPOINT_BATCH_MAX_SIZE: int = 500
+
+    # Listing
+    PAGE_SIZE_DEFAULT: int = 50
+    PAGE_SIZE_MAX: int = 500
+    SPATIAL_RADIUS_MAX_M: float = 50_000
+
+    # Heavy dependencies load on first use; these are loaded in the background
+    # at startup instead. Add "embeddings" and/or "bertscore" to preload the
+    # models in-process; set to [] for lean workers that only serve CRUD routes
+    WARMUP_SERVICES: List[str] = ["sentiment", "llm"]
+
+    # Serving (serve.py): API worker processes (0 = one per core) and the
+    # unix socket of the shared scoring process. With SCORING_SOCKET set,
+    # BERTScore and embeddings are computed by that process instead of
+    # loading the models in every worker. SCORING_STARTUP_TIMEOUT bounds the
+    # wait for its socket to answer, not for the models to load
+    WEB_WORKERS: int = 0
+    SCORING_SOCKET: str = ""
+    SCORING_TIMEOUT: float = 120.0
+    SCORING_STARTUP_TIMEOUT: float = 30.0
 
     # API configuration
     LOG_LEVEL: str = "INFO"
     CORS_ORIGINS: List[str] = ["http://localhost:5173", "http://localhost:8000"]
 
+    # With METRICS_DIR set (serve.py sets it for several workers) each worker
+    # publishes its metrics there every METRICS_SHARE_INTERVAL seconds, and
+    # /metrics on any worker reports all of them with a `worker` label
+    METRICS_DIR: str = ""
+    METRICS_SHARE_INTERVAL: float = 5.0
+
     # External APIs
     OPENSTREETMAP_API_TIMEOUT: int = 10
+    OSM_MAX_CONCURRENCY: int = 4
+    OSM_TILES_PER_REQUEST: int = 16
+    OSM_MAX_RETRY_AFTER: int = 30
+
+    # POI tile cache
+    POI_CACHE_ENABLED: bool = True
+    POI_CACHE_PATH: str = ".cache/poi_cache.sqlite3"
+    POI_CACHE_TTL_SECONDS: int = 7 * 24 * 3600
+    POI_CACHE_MAX_TILES: int = 20000
+    POI_CACHE_TILE_DEG: float = 0.005
+
+    # POI enrichment: waypoints are linked to nearby POIs in the graph by
+    # background workers at ingest, so generation does not wait on Overpass
+    POI_RADIUS_M: int = 500
+    POI_ENRICHMENT_ENABLED: bool = True
+    POI_ENRICHMENT_WORKERS: int = 1
+    POI_ENRICHMENT_QUEUE_SIZE: int = 1000
+    POI_ENRICHMENT_BATCH_SIZE: int = 50
+
+    # Retrieval: waypoint notes, POI descriptions and human journals are
+    # embedded into a local vector index, and context keeps the POIs most
+    # relevant to each segment of the walk. Journals from other routes
+    # are off by default as they would bleed into the journal comparison
+    RETRIEVAL_ENABLED: bool = True
+    EMBEDDING_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    EMBEDDING_BATCH_SIZE: int = 32
+    VECTOR_INDEX_PATH: str = ".cache/vector_index.npz"
+    # New entries are written to the file once this many accumulate, and at
+    # shutdown
+    VECTOR_INDEX_SAVE_EVERY: int = 200
+    RETRIEVAL_JOURNALS_TOP_K: int = 0
+    RETRIEVAL_JOURNAL_MAX_CHARS: int = 600
 
     class Config:
         env_file = ".env"
@@ -0,0 +1,8 @@
+import os
+
+
+def available_cores() -> int:
+    # Respects CPU affinity (e.g. a container's cpuset), unlike os.cpu_count
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
@@ -0,0 +1,84 @@
+import math
+
+EARTH_RADIUS_M = 6_371_000
+METRES_PER_DEGREE_LAT = 111_320
+
+
+def haversine_m(lat1: float, lon1: float, lat2: float, lon2: float) -> float:
+    """
+    Great-circle distance between two coordinates in metres.
+    """
+    phi1, phi2 = math.radians(lat1), math.radians(lat2)
+    d_phi = math.radians(lat2 - lat1)
+    d_lambda = math.radians(lon2 - lon1)
+    a = (
+        math.sin(d_phi / 2) ** 2
+        + math.cos(phi1) * math.cos(phi2) * math.sin(d_lambda / 2) ** 2
+    )
+    return 2 * EARTH_RADIUS_M * math.asin(math.sqrt(a))
+
+
+def radius_bbox(latitude: float, longitude: float, radius_m: float):
+    """
+    Bounding box (south, west, north, east) enclosing a circle of radius_m.
+    """
+    d_lat = radius_m / METRES_PER_DEGREE_LAT
+    cos_lat = max(math.cos(math.radians(latitude)), 1e-6)
+    d_lon = radius_m / (METRES_PER_DEGREE_LAT * cos_lat)
+    return (
+        max(latitude - d_lat, -90.0),
+        max(longitude - d_lon, -180.0),
+        min(latitude + d_lat, 90.0),
+        min(longitude + d_lon, 180.0),
+    )
+
+
+def check_bbox(south: float, west: float, north: float, east: float):
+    """
+    Validate a (south, west, north, east) box. West may exceed east for boxes
+    crossing the antimeridian, but south must not exceed north.
+    """
+    if not (-90 <= south <= 90 and -90 <= north <= 90):
+        raise ValueError("Latitudes must be between -90 and 90")
+    if not (-180 <= west <= 180 and -180 <= east <= 180):
+        raise ValueError("Longitudes must be between -180 and 180")
+    if south > north:
+        raise ValueError("south must not be greater than north")
+    return south, west, north, east
+
+
+def tile_key(latitude: float, longitude: float, tile_deg: float) -> str:
+    """
+    Key of the fixed-size lat/lon grid tile containing a coordinate.
+    The tile size is part of the key so changing it never reuses stale tiles.
+    """
+    return f"{tile_deg}:{math.floor(latitude / tile_deg)}:{math.floor(longitude / tile_deg)}"
+
+
+def tile_bbox(key: str):
+    """
+    Bounding box (south, west, north, east) of a tile key.
+    """
+    deg, iy, ix = key.split(":")
+    tile_deg = float(deg)
+    south, west = int(iy) * tile_deg, int(ix) * tile_deg
+    return (
+        round(south, 7),
+        round(west, 7),
+        round(south + tile_deg, 7),
+        round(west + tile_deg, 7),
+    )
+
+
+def tiles_for_radius(
+    latitude: float, longitude: float, radius_m: float, tile_deg: float
+) -> list[str]:
+    """
+    All tile keys intersecting the bounding box of a radius query.
+    """
+    south, west, north, east = radius_bbox(latitude, longitude, radius_m)
+    tiles = []
+    for iy in range(math.floor(south / tile_deg), math.floor(north / tile_deg) + 1):
+        for ix in range(math.floor(west / tile_deg), math.floor(east / tile_deg) + 1):
+            tiles.append(f"{tile_deg}:{iy}:{ix}")
+    return tiles
@@ -0,0 +1,362 @@
+import asyncio
+import functools
+import inspect
+import json
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager
+
+# Prometheus text exposition format
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+DEFAULT_BUCKETS = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0,
+)
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _format_labels(names, values, extra: dict = None) -> str:
+    pairs = list(zip(names, values)) + list((extra or {}).items())
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value))
+
+
+class _Metric:
+    kind = "untyped"
+
+    def __init__(self, name: str, documentation: str, labels=(), callback=None):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labels)
+        # Callback metrics read their value(s) at scrape time: a number, or a
+        # dict of label-value tuples to numbers
+        self.callback = callback
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def _key(self, labels: dict) -> tuple:
+        return tuple(str(labels.get(name, "")) for name in self.labelnames)
+
+    def _current(self) -> dict:
+        if self.callback is None:
+            with self._lock:
+                return dict(self._values)
+        value = self.callback()
+        return value if isinstance(value, dict) else {(): value}
+
+    def samples(self, extra: dict = None):
+        for key, value in sorted(self._current().items()):
+            labels = _format_labels(self.labelnames, key, extra)
+            yield f"{self.name}{labels} {_format_value(value)}"
+
+    def render(self, extra: dict = None, other_samples=()) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.kind}",
+        ]
+        lines.extend(self.samples(extra))
+        lines.extend(other_samples)
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount: float = 1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labels)
+        self.buckets = tuple(sorted(buckets)) + (math.inf,)
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = {
+                    "counts": [0] * len(self.buckets),
+                    "sum": 0.0,
+                    "count": 0,
+                }
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    state["counts"][i] += 1
+                    break
+            state["sum"] += value
+            state["count"] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - started, **labels)
+
+    def samples(self, extra: dict = None):
+        with self._lock:
+            states = {
+                key: (list(s["counts"]), s["sum"], s["count"])
+                for key, s in self._values.items()
+            }
+        for key, (counts, total, count) in sorted(states.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                labels = _format_labels(
+                    self.labelnames, key, {**(extra or {}), "le": _format_value(bound)}
+                )
+                yield f"{self.name}_bucket{labels} {cumulative}"
+            labels = _format_labels(self.labelnames, key, extra)
+            yield f"{self.name}_sum{labels} {_format_value(total)}"
+            yield f"{self.name}_count{labels} {count}"
+
+
+class MetricsRegistry:
+    """
+    Process-wide collection of metrics rendered for /metrics.
+
+    Under several API worker processes a scrape reaches just one of them. With
+    share(), every process writes its samples, labelled with its pid as
+    `worker`, to a shared directory every few seconds, and whichever worker
+    is scraped renders them all. Aggregate across workers in queries, e.g.
+    `sum without (worker) (rate(stage_errors_total[5m]))`. Other workers'
+    samples lag by up to one interval, and those not refreshed for three
+    (exited workers) are dropped.
+    """
+
+    def __init__(self):
+        self._metrics = {}
+        self._directory = None
+        self._interval = None
+        self._task = None
+
+    def _register(self, metric):
+        if metric.name in self._metrics:
+            raise ValueError(f"Metric {metric.name} is already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name, documentation, labels=(), callback=None) -> Counter:
+        return self._register(Counter(name, documentation, labels, callback))
+
+    def gauge(self, name, documentation, labels=(), callback=None) -> Gauge:
+        return self._register(Gauge(name, documentation, labels, callback))
+
+    def histogram(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        return self._register(Histogram(name, documentation, labels, buckets))
+
+    def share(self, directory: str, interval: float):
+        """
+        Start publishing this process's samples to `directory`, and include
+        other processes' in render(). Needs a running event loop.
+        """
+        os.makedirs(directory, exist_ok=True)
+        self._directory = directory
+        self._interval = interval
+        self._task = asyncio.create_task(self._publish())
+
+    async def stop_sharing(self):
+        if self._task:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+        if self._directory:
+            try:
+                os.unlink(self._snapshot_path(os.getpid()))
+            except FileNotFoundError:
+                pass
+            self._directory = None
+
+    def _snapshot_path(self, pid: int) -> str:
+        return os.path.join(self._directory, f"{pid}.json")
+
+    def _worker(self):
+        return {"worker": os.getpid()} if self._directory else None
+
+    def _write_snapshot(self):
+        worker = self._worker()
+        snapshot = {
+            name: list(metric.samples(worker))
+            for name, metric in self._metrics.items()
+        }
+        path = self._snapshot_path(os.getpid())
+        with open(f"{path}.tmp", "w") as f:
+            json.dump(snapshot, f)
+        os.replace(f"{path}.tmp", path)
+
+    async def _publish(self):
+        while True:
+            try:
+                # Callback metrics may query SQLite, so off the event loop
+                await asyncio.to_thread(self._write_snapshot)
+            except OSError:
+                pass  # Retried next interval; scrapes still show this worker
+            await asyncio.sleep(self._interval)
+
+    def _other_snapshots(self) -> list[dict]:
+        own = os.path.basename(self._snapshot_path(os.getpid()))
+        cutoff = time.time() - 3 * self._interval
+        snapshots = []
+        for name in os.listdir(self._directory):
+            if not name.endswith(".json") or name == own:
+                continue
+            path = os.path.join(self._directory, name)
+            try:
+                if os.path.getmtime(path) < cutoff:
+                    os.unlink(path)
+                    continue
+                with open(path) as f:
+                    snapshots.append(json.load(f))
+            except (OSError, ValueError):
+                continue
+        return snapshots
+
+    def render(self) -> str:
+        if not self._directory:
+            return "\n".join(m.render() for m in self._metrics.values()) + "\n"
+        others = self._other_snapshots()
+        worker = self._worker()
+        return (
+            "\n".join(
+                metric.render(
+                    worker,
+                    [line for snapshot in others for line in snapshot.get(name, [])],
+                )
+                for name, metric in self._metrics.items()
+            )
+            + "\n"
+        )
+
+
+registry = MetricsRegistry()
+
+HTTP_REQUEST_SECONDS = registry.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template (time to response start).",
+    ["method", "route", "status"],
+)
+STAGE_SECONDS = registry.histogram(
+    "stage_duration_seconds",
+    "Duration of instrumented pipeline stages.",
+    ["stage", "operation"],
+)
+STAGE_ERRORS = registry.counter(
+    "stage_errors_total",
+    "Instrumented stage calls that raised.",
+    ["stage", "operation"],
+)
+STAGE_IN_PROGRESS = registry.gauge(
+    "stage_in_progress",
+    "Instrumented stage calls currently running.",
+    ["stage"],
+)
+
+
+@contextmanager
+def time_stage(stage: str, operation: str):
+    """
+    Time a block as one call of a pipeline stage.
+    """
+    STAGE_IN_PROGRESS.inc(stage=stage)
+    started = time.perf_counter()
+    try:
+        yield
+    except BaseException:
+        STAGE_ERRORS.inc(stage=stage, operation=operation)
+        raise
+    finally:
+        STAGE_IN_PROGRESS.dec(stage=stage)
+        STAGE_SECONDS.observe(
+            time.perf_counter() - started, stage=stage, operation=operation
+        )
+
+
+def timed(stage: str, operation: str = None):
+    """
+    Decorator timing each call of a function, coroutine function or async
+    generator (until exhausted) as a pipeline stage.
+    """
+
+    def decorate(func):
+        name = operation or func.__name__
+
+        if inspect.isasyncgenfunction(func):
+
+            @functools.wraps(func)
+            async def agen_wrapper(*args, **kwargs):
+                with time_stage(stage, name):
+                    async for item in func(*args, **kwargs):
+                        yield item
+
+            return agen_wrapper
+
+        if inspect.iscoroutinefunction(func):
+
+            @functools.wraps(func)
+            async def async_wrapper(*args, **kwargs):
+                with time_stage(stage, name):
+                    return await func(*args, **kwargs)
+
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with time_stage(stage, name):
+                return func(*args, **kwargs)
+
+        return wrapper
+
+    return decorate
+
+
+def instrument(stage: str, exclude=()):
+    """
+    Class decorator applying `timed(stage)` to every public method defined on
+    the class itself.
+    """
+
+    def decorate(cls):
+        for name, attr in list(vars(cls).items()):
+            if name.startswith("_") or name in exclude or not inspect.isfunction(attr):
+                continue
+            setattr(cls, name, timed(stage)(attr))
+        return cls
+
+    return decorate
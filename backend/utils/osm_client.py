@@ -1,65 +1,302 @@
-import time
+import asyncio
 
-import requests
+import httpx
 
 from utils.config import settings
+from utils.geo import haversine_m, tile_bbox, tile_key, tiles_for_radius
 from utils.logger import logger
+from utils.metrics import registry, timed
+from utils.poi_cache import create_poi_cache
 
+POI_TAGS = ["amenity", "leisure", "natural", "tourism", "historic"]
+OVERPASS_URL = "https://overpass-api.de/api/interpreter"
 
-class OSMClient:
-    def __init__(self):
-        self.overpass_url = "https://overpass-api.de/api/interpreter"
+OVERPASS_RETRIES = registry.counter(
+    "overpass_retries_total", "Overpass requests retried after a failure."
+)
 
-    def query_pois(self, latitude, longitude, radius=500):
+
+def _retry_delay(response, attempt: int) -> float:
+    """
+    Seconds to wait before retrying: Overpass' Retry-After when it sends one
+    with a rate-limit response, otherwise exponential backoff.
+    """
+    if response is not None:
+        retry_after = response.headers.get("Retry-After")
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), settings.OSM_MAX_RETRY_AFTER)
+    return 2**attempt
+
+
+class _OverpassBase:
+    """
+    Query building, parsing and cache bucketing for the Overpass client.
+    """
+
+    def __init__(self, cache=None):
+        self.overpass_url = OVERPASS_URL
+        self.cache = cache
+
+    def _build_query(self, filters: list[str]) -> str:
         """
-        Query Overpass API for POIs around a coordinate
+        Wrap a list of spatial filters in an Overpass union over all POI tags.
+        """
+        statements = "\n".join(
+            f'  node["{tag}"]{spatial};' for spatial in filters for tag in POI_TAGS
+        )
+        return (
+            f"[out:json][timeout:{settings.OPENSTREETMAP_API_TIMEOUT}];\n"
+            f"(\n{statements}\n);\n"
+            "out body;\n"
+        )
+
+    def _parse_elements(self, elements: list[dict]) -> list[dict]:
+        pois = []
+        for element in elements:
+            tags = element.get("tags", {})
+            name = tags.get("name", "Unnamed POI")
+            poi_type = next((tags[t] for t in POI_TAGS if tags.get(t)), None)
+            pois.append(
+                {
+                    "id": element.get("id"),
+                    "name": name,
+                    "type": poi_type,
+                    "lat": element.get("lat"),
+                    "lon": element.get("lon"),
+                }
+            )
+        return pois
+
+    def _tile_filters(self, tiles: list[str]) -> list[str]:
+        """
+        Bounding-box filters covering the given tiles, merging horizontally
+        adjacent tiles in the same grid row into a single box.
+        """
+        rows = {}
+        for t in tiles:
+            deg, iy, ix = t.split(":")
+            rows.setdefault((deg, int(iy)), []).append(int(ix))
+
+        filters = []
+        for (deg, iy), columns in sorted(rows.items()):
+            columns.sort()
+            run_start = prev = columns[0]
+            for ix in columns[1:] + [None]:
+                if ix is not None and ix == prev + 1:
+                    prev = ix
+                    continue
+                south, west, _, _ = tile_bbox(f"{deg}:{iy}:{run_start}")
+                _, _, north, east = tile_bbox(f"{deg}:{iy}:{prev}")
+                filters.append(f"({south},{west},{north},{east})")
+                if ix is not None:
+                    run_start = prev = ix
+        return filters
+
+    def _bucket_tiles(self, tiles: list[str], pois: list[dict]):
         """
-        query = f"""
-        [out:json][timeout:{settings.OPENSTREETMAP_API_TIMEOUT}];
-        (
-          node["amenity"](around:{radius},{latitude},{longitude});
-          node["leisure"](around:{radius},{latitude},{longitude});
-          node["natural"](around:{radius},{latitude},{longitude});
-          node["tourism"](around:{radius},{latitude},{longitude});
-          node["historic"](around:{radius},{latitude},{longitude});
-        );
-        out body;
+        Assign POIs fetched for a set of tiles to the tile containing each one.
         """
+        buckets = {t: [] for t in tiles}
+        for poi in pois:
+            if poi["lat"] is None or poi["lon"] is None:
+                continue
+            key = tile_key(poi["lat"], poi["lon"], settings.POI_CACHE_TILE_DEG)
+            if key in buckets:
+                buckets[key].append(poi)
+        return buckets
 
-        print(query)  # Temporarily print query for testing on Overpass Turbo
+    def _within_radius(self, pois, latitude, longitude, radius):
+        """
+        Deduplicate POIs by OSM id and keep those within radius, nearest first.
+        """
+        nearby = {}
+        for poi in pois:
+            distance = haversine_m(latitude, longitude, poi["lat"], poi["lon"])
+            if distance <= radius:
+                nearby[poi["id"]] = (distance, poi)
+        return [poi for _, poi in sorted(nearby.values(), key=lambda item: item[0])]
+
+    def _coordinate_tiles(self, coordinates, radius):
+        return [
+            tiles_for_radius(lat, lon, radius, settings.POI_CACHE_TILE_DEG)
+            for lat, lon in coordinates
+        ]
+
+    def _assign(self, coordinates, coordinate_tiles, tiles, radius):
+        return [
+            self._within_radius(
+                (poi for t in ts for poi in tiles.get(t, [])), lat, lon, radius
+            )
+            for (lat, lon), ts in zip(coordinates, coordinate_tiles)
+        ]
+
+
+class AsyncOSMClient(_OverpassBase):
+    """
+    asyncio-native Overpass client on a pooled httpx connection.
+
+    Uncached tiles are split into chunks of OSM_TILES_PER_REQUEST and fetched
+    concurrently, with at most OSM_MAX_CONCURRENCY requests in flight.
+    """
+
+    def __init__(self, cache=None):
+        super().__init__(cache)
+        self._client = None
+        self._semaphore = None
+
+    def _get_client(self):
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                timeout=settings.OPENSTREETMAP_API_TIMEOUT,
+                limits=httpx.Limits(
+                    max_connections=settings.OSM_MAX_CONCURRENCY,
+                    max_keepalive_connections=settings.OSM_MAX_CONCURRENCY,
+                ),
+            )
+            self._semaphore = asyncio.Semaphore(settings.OSM_MAX_CONCURRENCY)
+        return self._client
+
+    async def aclose(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+    @timed("overpass", "fetch")
+    async def _fetch(self, query: str):
+        """
+        POST a query to Overpass with retries. Returns parsed POIs or None on failure.
+        """
+        client = self._get_client()
+        logger.debug(f"Overpass query:\n{query}")
 
         retries = 3
         for i in range(retries):
+            response = None
             try:
-                response = requests.post(
-                    self.overpass_url,
-                    data={"data": query},
-                    timeout=settings.OPENSTREETMAP_API_TIMEOUT,
-                )
-                response.raise_for_status()
-                data = response.json()
-
-                pois = []
-                for element in data.get("elements", []):
-                    tags = element.get("tags", {})
-                    name = tags.get("name", "Unnamed POI")
-                    poi_type = (
-                        tags.get("amenity")
-                        or tags.get("leisure")
-                        or tags.get("natural")
-                        or tags.get("tourism")
-                        or tags.get("historic")
+                async with self._semaphore:
+                    response = await client.post(
+                        self.overpass_url, data={"data": query}
                     )
-                    pois.append({"name": name, "type": poi_type})
-
-                return pois
+                response.raise_for_status()
+                return self._parse_elements(response.json().get("elements", []))
             except Exception as e:
                 logger.error(f"OSM Query failed (attempt {i + 1}): {e}")
                 if i < retries - 1:
-                    time.sleep(2**i)  # Exponential backoff
-                else:
-                    return []
-        return []
+                    # The semaphore is released while backing off so other
+                    # lookups keep flowing
+                    OVERPASS_RETRIES.inc()
+                    await asyncio.sleep(_retry_delay(response, i))
+        return None
+
+    async def _fetch_tiles(self, tiles: list[str]):
+        """
+        Fetch uncached tiles in concurrent chunks and bucket the results per
+        tile. Tiles from failed chunks are left out of the result.
+        """
+        size = settings.OSM_TILES_PER_REQUEST
+        chunks = [tiles[i : i + size] for i in range(0, len(tiles), size)]
+        results = await asyncio.gather(
+            *(self._fetch(self._build_query(self._tile_filters(c))) for c in chunks)
+        )
+
+        buckets = {}
+        for chunk, pois in zip(chunks, results):
+            if pois is not None:
+                buckets.update(self._bucket_tiles(chunk, pois))
+        return buckets
+
+    async def query_pois(self, latitude, longitude, radius=500):
+        """
+        Query Overpass API for POIs around a coordinate
+        """
+        return (await self.query_route_pois([(latitude, longitude)], radius))[0]
+
+    @timed("overpass")
+    async def query_route_pois(self, coordinates, radius=500, require_complete=False):
+        """
+        Query POIs for every (latitude, longitude) of a route, assigning
+        results back to each coordinate by haversine distance. Tiles already
+        in the cache are served locally. With require_complete, coordinates
+        whose lookup hit a failed Overpass request get None instead of a
+        possibly partial list.
+        """
+        coordinates = list(coordinates)
+        if not coordinates:
+            return []
+
+        if self.cache is None:
+            size = settings.OSM_TILES_PER_REQUEST
+            chunks = [
+                coordinates[i : i + size] for i in range(0, len(coordinates), size)
+            ]
+            results = await asyncio.gather(
+                *(
+                    self._fetch(
+                        self._build_query(
+                            [f"(around:{radius},{lat},{lon})" for lat, lon in chunk]
+                        )
+                    )
+                    for chunk in chunks
+                )
+            )
+            pois = [p for r in results for p in r or [] if p["lat"] is not None]
+            assigned = [
+                self._within_radius(pois, lat, lon, radius) for lat, lon in coordinates
+            ]
+            if require_complete:
+                assigned = [
+                    None if results[i // size] is None else found
+                    for i, found in enumerate(assigned)
+                ]
+            return assigned
+
+        coordinate_tiles = self._coordinate_tiles(coordinates, radius)
+        tiles = list(dict.fromkeys(t for ts in coordinate_tiles for t in ts))
+        cached = await asyncio.to_thread(self.cache.get_many, tiles)
+        missing = [t for t in tiles if t not in cached]
+        if missing:
+            fetched = await self._fetch_tiles(missing)
+            if fetched:
+                await asyncio.to_thread(self.cache.put_many, fetched)
+                cached.update(fetched)
+
+        assigned = self._assign(coordinates, coordinate_tiles, cached, radius)
+        if require_complete:
+            assigned = [
+                found if all(t in cached for t in ts) else None
+                for found, ts in zip(assigned, coordinate_tiles)
+            ]
+        return assigned
+
+
+poi_cache = create_poi_cache()
+async_osm_client = AsyncOSMClient(cache=poi_cache)
+
+
+def _poi_cache_stats():
+    return poi_cache.stats() if poi_cache is not None else {}
 
 
-osm_client = OSMClient()
+registry.counter(
+    "poi_cache_lookups_total",
+    "POI tile cache lookups by result.",
+    ["result"],
+    callback=lambda: {
+        (result,): _poi_cache_stats().get(key, 0)
+        for result, key in (
+            ("hit", "hits"),
+            ("miss", "misses"),
+            ("expired", "expired"),
+        )
+    },
+)
+registry.gauge(
+    "poi_cache_hit_ratio",
+    "Share of POI tile lookups served from the cache.",
+    callback=lambda: _poi_cache_stats().get("hit_ratio", 0.0),
+)
+registry.gauge(
+    "poi_cache_tiles",
+    "Tiles held in the POI cache.",
+    callback=lambda: _poi_cache_stats().get("size", 0),
+)
@@ -0,0 +1,22 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(timestamp: datetime, id: str) -> str:
+    """
+    Opaque keyset cursor for the (timestamp, id) of the last item on a page.
+    """
+    payload = json.dumps([timestamp.isoformat(), id]).encode("utf-8")
+    return base64.urlsafe_b64encode(payload).decode("ascii")
+
+
+def decode_cursor(cursor: str):
+    """
+    Inverse of encode_cursor. Raises ValueError for malformed cursors.
+    """
+    try:
+        timestamp, id = json.loads(base64.urlsafe_b64decode(cursor.encode("ascii")))
+        return datetime.fromisoformat(timestamp), str(id)
+    except (TypeError, ValueError, UnicodeError) as e:
+        raise ValueError("Invalid cursor") from e
@@ -0,0 +1,172 @@
+import json
+import sqlite3
+import threading
+import time
+
+from utils.config import settings
+from utils.logger import logger
+from utils.sqlite import connect_shared
+
+
+class POICache:
+    """
+    Persistent tile cache for Overpass POIs.
+
+    POIs are stored per grid tile (see utils.geo) in SQLite so that a radius
+    query fully covered by fresh tiles can be answered without a network call.
+    Tiles expire after `ttl_seconds` and the least recently used tiles are
+    evicted once more than `max_tiles` are held. The file can be shared by
+    several worker processes; hit/miss counters are per process.
+    """
+
+    def __init__(self, path: str, ttl_seconds: int, max_tiles: int):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_tiles = max_tiles
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = None
+        self._unavailable = False
+
+    def _connection(self):
+        """
+        The shared connection, opened on first use so that importing the
+        module touches no files. Returns None if the file cannot be opened,
+        in which case lookups fall back to live queries. Called with
+        self._lock held.
+        """
+        if self._conn is not None or self._unavailable:
+            return self._conn
+        try:
+            conn = connect_shared(self.path)
+            conn.execute(
+                """
+                CREATE TABLE IF NOT EXISTS poi_tiles (
+                    tile TEXT PRIMARY KEY,
+                    pois TEXT NOT NULL,
+                    fetched_at REAL NOT NULL,
+                    accessed_at REAL NOT NULL
+                )
+                """
+            )
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS poi_tiles_accessed ON poi_tiles (accessed_at)"
+            )
+            conn.commit()
+        except (sqlite3.Error, OSError) as e:
+            logger.error(f"POI cache unavailable, falling back to live queries: {e}")
+            self._unavailable = True
+            return None
+        self._conn = conn
+        return conn
+
+    def get_many(self, tiles: list[str]) -> dict[str, list[dict]]:
+        """
+        Return the fresh cached tiles among `tiles`, keyed by tile.
+        Missing and expired tiles are simply absent from the result.
+        """
+        if not tiles:
+            return {}
+
+        now = time.time()
+        placeholders = ", ".join("?" for _ in tiles)
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return {}
+            rows = conn.execute(
+                f"SELECT tile, pois, fetched_at FROM poi_tiles WHERE tile IN ({placeholders})",
+                list(tiles),
+            ).fetchall()
+
+            found, stale = {}, []
+            for tile, pois, fetched_at in rows:
+                if now - fetched_at > self.ttl_seconds:
+                    stale.append(tile)
+                else:
+                    found[tile] = json.loads(pois)
+
+            if stale:
+                conn.executemany(
+                    "DELETE FROM poi_tiles WHERE tile = ?", [(t,) for t in stale]
+                )
+            if found:
+                conn.executemany(
+                    "UPDATE poi_tiles SET accessed_at = ? WHERE tile = ?",
+                    [(now, t) for t in found],
+                )
+            conn.commit()
+
+            self.hits += len(found)
+            self.misses += len(tiles) - len(found)
+            self.expired += len(stale)
+        return found
+
+    def put_many(self, tiles: dict[str, list[dict]]):
+        """
+        Store freshly fetched tiles and evict the least recently used overflow.
+        """
+        if not tiles:
+            return
+
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            if conn is None:
+                return
+            conn.executemany(
+                "INSERT OR REPLACE INTO poi_tiles (tile, pois, fetched_at, accessed_at) VALUES (?, ?, ?, ?)",
+                [(t, json.dumps(pois), now, now) for t, pois in tiles.items()],
+            )
+            (count,) = conn.execute("SELECT COUNT(*) FROM poi_tiles").fetchone()
+            overflow = count - self.max_tiles
+            if overflow > 0:
+                conn.execute(
+                    "DELETE FROM poi_tiles WHERE tile IN "
+                    "(SELECT tile FROM poi_tiles ORDER BY accessed_at LIMIT ?)",
+                    (overflow,),
+                )
+                self.evictions += overflow
+            conn.commit()
+
+    def stats(self) -> dict:
+        with self._lock:
+            conn = self._connection()
+            size = 0
+            if conn is not None:
+                (size,) = conn.execute("SELECT COUNT(*) FROM poi_tiles").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "expired": self.expired,
+            "evictions": self.evictions,
+            "size": size,
+            "hit_ratio": self.hits / lookups if lookups else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            conn = self._connection()
+            if conn is not None:
+                conn.execute("DELETE FROM poi_tiles")
+                conn.commit()
+
+    def close(self):
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_poi_cache():
+    if not settings.POI_CACHE_ENABLED:
+        return None
+    return POICache(
+        settings.POI_CACHE_PATH,
+        ttl_seconds=settings.POI_CACHE_TTL_SECONDS,
+        max_tiles=settings.POI_CACHE_MAX_TILES,
+    )
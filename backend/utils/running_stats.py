@@ -0,0 +1,107 @@
+import math
+
+# Evaluation properties with running aggregates, and the value range of each
+# property's fixed-bin histogram (used for approximate medians)
+STATS_FIELDS = {
+    "bertscore_f1": (0.0, 1.0),
+    "human_sentiment": (-1.0, 1.0),
+    "ai_sentiment": (-1.0, 1.0),
+}
+HISTOGRAM_BINS = 200
+
+
+def _bin(value: float, low: float, high: float) -> int:
+    index = int((value - low) / (high - low) * HISTOGRAM_BINS)
+    return min(max(index, 0), HISTOGRAM_BINS - 1)
+
+
+def batch_aggregates(rows: list[dict]) -> dict:
+    """
+    Count, mean, sum of squared deviations (M2) and histogram of each stats
+    field over a batch of evaluations, shaped as parameters for merging into
+    the stored running aggregates.
+    """
+    params = {
+        "count": len(rows),
+        "equivalent": sum(1 for row in rows if row["is_equivalent"]),
+    }
+    for field, (low, high) in STATS_FIELDS.items():
+        values = [float(row[field]) for row in rows]
+        mean = sum(values) / len(values) if values else 0.0
+        histogram = [0] * HISTOGRAM_BINS
+        for value in values:
+            histogram[_bin(value, low, high)] += 1
+        params[f"{field}_mean"] = mean
+        params[f"{field}_m2"] = sum((value - mean) ** 2 for value in values)
+        params[f"{field}_hist"] = histogram
+    return params
+
+
+def merge_stats_cypher(node: str = "s") -> str:
+    """
+    Cypher SET clause merging batch aggregates ($count, $<field>_mean, ...)
+    into a stats node using Chan et al.'s parallel variance update. Expects
+    `na` (stored count) and `n` (combined count) to be in scope.
+    """
+    clauses = [
+        f"{node}.count = n",
+        f"{node}.equivalent_count = {node}.equivalent_count + $equivalent",
+    ]
+    for field in STATS_FIELDS:
+        delta = f"(${field}_mean - {node}.{field}_mean)"
+        clauses += [
+            f"{node}.{field}_m2 = {node}.{field}_m2 + ${field}_m2"
+            f" + {delta} ^ 2 * na * $count / n",
+            f"{node}.{field}_mean = {node}.{field}_mean + {delta} * $count / n",
+            f"{node}.{field}_hist = [i IN range(0, {HISTOGRAM_BINS - 1})"
+            f" | {node}.{field}_hist[i] + ${field}_hist[i]]",
+        ]
+    return "SET " + ",\n    ".join(clauses)
+
+
+def empty_stats_cypher(node: str = "s") -> str:
+    """
+    Cypher SET clause initialising an empty stats node.
+    """
+    clauses = [f"{node}.count = 0", f"{node}.equivalent_count = 0"]
+    for field in STATS_FIELDS:
+        clauses += [
+            f"{node}.{field}_mean = 0.0",
+            f"{node}.{field}_m2 = 0.0",
+            f"{node}.{field}_hist = [i IN range(1, {HISTOGRAM_BINS}) | 0]",
+        ]
+    return "SET " + ", ".join(clauses)
+
+
+def histogram_median(histogram: list[int], low: float, high: float):
+    """
+    Approximate median as the midpoint of the bin holding the middle value.
+    """
+    total = sum(histogram)
+    if not total:
+        return None
+    width = (high - low) / len(histogram)
+    seen = 0
+    for index, count in enumerate(histogram):
+        seen += count
+        if seen >= total / 2:
+            return low + (index + 0.5) * width
+    return high
+
+
+def summarise_stats(stats: dict) -> dict:
+    """
+    Mean/std/median per field and the equivalence rate from a stats node.
+    """
+    count = stats.get("count", 0)
+    summary = {
+        "count": count,
+        "equivalence_rate": stats["equivalent_count"] / count if count else None,
+    }
+    for field, (low, high) in STATS_FIELDS.items():
+        summary[field] = {
+            "mean": stats[f"{field}_mean"] if count else None,
+            "std": math.sqrt(stats[f"{field}_m2"] / count) if count else None,
+            "median": histogram_median(stats[f"{field}_hist"], low, high),
+        }
+    return summary
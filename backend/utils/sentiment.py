@@ -0,0 +1,35 @@
+from typing import Optional
+
+from utils.metrics import timed
+
+_analyzer = None
+
+
+def get_analyzer():
+    """
+    Shared VADER analyzer, imported and built on first use (once per process,
+    including process-pool workers).
+    """
+    global _analyzer
+    if _analyzer is None:
+        from vaderSentiment.vaderSentiment import SentimentIntensityAnalyzer
+
+        _analyzer = SentimentIntensityAnalyzer()
+    return _analyzer
+
+
+@timed("vader", "note")
+def score_text(text: Optional[str]) -> Optional[float]:
+    """
+    VADER compound score of a note, or None if there is nothing to score.
+    """
+    if not text or not text.strip():
+        return None
+    return get_analyzer().polarity_scores(text)["compound"]
+
+
+def score_batch(rows: list[tuple[str, str]]) -> list[dict]:
+    """
+    Score (waypoint_id, text) pairs into rows for a sentiment UNWIND write.
+    """
+    return [{"id": id, "sentiment": score_text(text)} for id, text in rows]
@@ -0,0 +1,17 @@
+import os
+import sqlite3
+
+
+def connect_shared(path: str) -> sqlite3.Connection:
+    """
+    SQLite connection to a database file shared by several processes (the API
+    workers): WAL lets readers proceed during a write, and writers wait for
+    the lock instead of failing straight away.
+    """
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    conn = sqlite3.connect(path, timeout=10.0, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    return conn
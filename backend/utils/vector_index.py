@@ -0,0 +1,214 @@
+import fcntl
+import os
+import threading
+
+import numpy as np
+
+from utils.logger import logger
+
+
+class VectorIndex:
+    """
+    Flat (exact) cosine-similarity index over unit-normalised embeddings.
+
+    Items are keyed by "<kind>:<id>" and carry their kind, owning route (if
+    any) and text, so entries are re-embedded only when their text changes.
+    A brute-force dot product over a few tens of thousands of 384-d vectors
+    takes well under a millisecond per query, so no ANN structure is needed
+    at this scale. The index persists to a single .npz file, tagged with the
+    embedding model so vectors from another model are never mixed in.
+    """
+
+    def __init__(self, path: str = None, dim: int = None, model: str = ""):
+        self.path = path
+        self.dim = dim
+        self.model = model
+        self._lock = threading.Lock()
+        self._positions = {}
+        self._kinds = []
+        self._route_ids = []
+        self._texts = []
+        self._keys = []
+        self._vectors = np.zeros((0, dim or 0), dtype=np.float32)
+        # Entries added since the file was last written
+        self.unsaved = 0
+        if path and os.path.exists(path):
+            self.load()
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def missing(self, items: dict[str, str]) -> list[str]:
+        """
+        Keys among {key: text} that are absent or stored with different text.
+        """
+        with self._lock:
+            return [
+                key
+                for key, text in items.items()
+                if key not in self._positions
+                or self._texts[self._positions[key]] != text
+            ]
+
+    def add(self, keys, texts, vectors, route_ids=None):
+        """
+        Insert or replace entries. `vectors` must already be unit-normalised.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        route_ids = route_ids or [None] * len(keys)
+        with self._lock:
+            self.unsaved += len(keys)
+            if self._keys and vectors.shape[1] != self.dim:
+                logger.warning(
+                    f"Embedding size changed from {self.dim} to "
+                    f"{vectors.shape[1]}, clearing the vector index"
+                )
+                self._clear()
+            if not self._keys:
+                self.dim = vectors.shape[1]
+                self._vectors = np.zeros((0, self.dim), dtype=np.float32)
+            appended = []
+            for key, text, vector, route_id in zip(keys, texts, vectors, route_ids):
+                position = self._positions.get(key)
+                if position is not None:
+                    self._vectors[position] = vector
+                    self._texts[position] = text
+                    self._route_ids[position] = route_id
+                    continue
+                self._positions[key] = len(self._keys)
+                appended.append(vector)
+                self._keys.append(key)
+                self._kinds.append(key.split(":", 1)[0])
+                self._texts.append(text)
+                self._route_ids.append(route_id)
+            if appended:
+                self._vectors = np.vstack([self._vectors, np.stack(appended)])
+
+    def _clear(self):
+        self._positions = {}
+        self._kinds = []
+        self._route_ids = []
+        self._texts = []
+        self._keys = []
+
+    def vectors(self, keys) -> np.ndarray:
+        """
+        Stored vectors for keys, in order; unknown keys raise KeyError.
+        """
+        with self._lock:
+            return self._vectors[[self._positions[key] for key in keys]]
+
+    def search(
+        self,
+        query,
+        k: int,
+        kind: str = None,
+        exclude_route: str = None,
+        keys=None,
+    ):
+        """
+        Top-k entries by cosine similarity to a unit query vector, optionally
+        restricted to one kind, to the given keys, and excluding one route's
+        entries. Returns [(key, text, route_id, score)], best first.
+        """
+        query = np.asarray(query, dtype=np.float32)
+        with self._lock:
+            if not self._keys or query.shape[-1] != self.dim:
+                return []
+            scores = self._vectors @ query
+            mask = np.ones(len(self._keys), dtype=bool)
+            if keys is not None:
+                allowed = np.zeros(len(self._keys), dtype=bool)
+                allowed[
+                    [self._positions[key] for key in keys if key in self._positions]
+                ] = True
+                mask &= allowed
+            if kind is not None:
+                mask &= np.array([item_kind == kind for item_kind in self._kinds])
+            if exclude_route is not None:
+                mask &= np.array([r != exclude_route for r in self._route_ids])
+            scores = np.where(mask, scores, -np.inf)
+            top = np.argsort(-scores)[:k]
+            return [
+                (self._keys[i], self._texts[i], self._route_ids[i], float(scores[i]))
+                for i in top
+                if np.isfinite(scores[i])
+            ]
+
+    def save(self):
+        """
+        Write the index, first taking in entries another process saved to the
+        same file since it was loaded, so workers do not drop each other's.
+        Does nothing if no entries were added since the last write.
+        """
+        if not self.path or not self.unsaved:
+            return
+        directory = os.path.dirname(self.path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(f"{self.path}.lock", "w") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            if os.path.exists(self.path):
+                self._merge(self._read())
+            with self._lock:
+                # Written to a temporary file first so a crash never leaves a
+                # truncated index behind
+                tmp = f"{self.path}.tmp.npz"
+                np.savez(
+                    tmp,
+                    keys=np.array(self._keys, dtype=str),
+                    texts=np.array(self._texts, dtype=str),
+                    route_ids=np.array([r or "" for r in self._route_ids], dtype=str),
+                    vectors=self._vectors,
+                    model=np.array(self.model),
+                )
+                os.replace(tmp, self.path)
+                self.unsaved = 0
+
+    def _read(self):
+        try:
+            with np.load(self.path) as data:
+                model = str(data["model"]) if "model" in data else ""
+                if model != self.model:
+                    logger.warning(
+                        f"Vector index {self.path} holds {model or 'unknown'} "
+                        f"embeddings, not {self.model}; ignoring it"
+                    )
+                    return None
+                return (
+                    data["keys"].tolist(),
+                    data["texts"].tolist(),
+                    [r or None for r in data["route_ids"].tolist()],
+                    data["vectors"],
+                )
+        except (OSError, KeyError, ValueError) as e:
+            logger.error(f"Unreadable vector index {self.path}: {e}")
+            return None
+
+    def _merge(self, stored):
+        # Entries held here win over the file's copy of the same key
+        if not stored:
+            return
+        keys, texts, route_ids, vectors = stored
+        with self._lock:
+            if self._keys and vectors.shape[1] != self.dim:
+                return
+            new = [i for i, key in enumerate(keys) if key not in self._positions]
+        if new:
+            self.add(
+                [keys[i] for i in new],
+                [texts[i] for i in new],
+                vectors[new],
+                [route_ids[i] for i in new],
+            )
+
+    def load(self):
+        stored = self._read()
+        if stored is None:
+            logger.error("Starting with an empty vector index")
+            return
+        keys, texts, route_ids, vectors = stored
+        if keys:
+            self.add(keys, texts, vectors, route_ids)
+        self.unsaved = 0
+        logger.info(f"Loaded {len(keys)} vectors from {self.path}")